@@ -2,7 +2,12 @@ from flask import Flask
 from .config import Config
 from .models import db
 from flask_login import LoginManager
-from .models import User
+from .user_cache import user_cache
+from .fragment_cache import fragment_cache
+from .passwords import password_hasher
+from .ratelimit import auth_limiter
+from .profiling import profiler, profiling_bp
+from .pubsub import broker
 
 login_manager = LoginManager()
 login_manager.login_view = "auth.login"
@@ -10,37 +15,58 @@ login_manager.login_view = "auth.login"
 
 @login_manager.user_loader
 def load_user(user_id: str):
-    # Minimal user loader; OK if DB is empty for this prototype
+    # Served from the identity cache; only misses touch the database
     try:
-        from .models import User
-        return User.query.get(int(user_id))
-    except Exception:
+        return user_cache.load(int(user_id))
+    except ValueError:
         return None
 
 
-def create_app():
+def create_app(config_overrides=None):
+    """
+    Build the app. This does not touch the database: schema creation and the
+    demo course live in "flask schema bootstrap" (run.py calls it for you).
+    """
     app = Flask(__name__, instance_relative_config=False)
     app.config.from_object(Config)
+    if config_overrides:
+        app.config.update(config_overrides)
+
+    # Client address and scheme as seen by the trusted front proxies
+    if app.config.get("PROXY_TRUSTED_HOPS"):
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        hops = app.config["PROXY_TRUSTED_HOPS"]
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
 
     # Init extensions
+    from . import routing, serving, sqlite_tuning
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = sqlite_tuning.engine_options(app.config)
+    routing.configure(app.config)
     db.init_app(app)
+    routing.init_app(app, db)
+    sqlite_tuning.init_app(app, db)
     login_manager.init_app(app)
+    user_cache.init_app(app)
+    fragment_cache.init_app(app)
+    password_hasher.init_app(app)
+    auth_limiter.init_app(app)
+    profiler.init_app(app, db)
+    broker.init_app(app)
+    serving.init_app(app)
 
     # Register blueprints
     from .auth.routes import auth_bp
     from .main.routes import main_bp
     app.register_blueprint(auth_bp, url_prefix="/auth")
     app.register_blueprint(main_bp)
+    app.register_blueprint(profiling_bp, url_prefix="/admin")
 
-    # Create tables + seed a demo course on first run
-    with app.app_context():
-        db.create_all()
-
-        from .models import Course
+    # Background jobs (post-upload processing)
+    from . import jobs
+    jobs.init_app(app)
 
-        if Course.query.count() == 0:
-            demo = Course(code="CMPE 131-01", title="Demo Course")
-            db.session.add(demo)
-            db.session.commit()
+    # CLI commands (flask schema ...)
+    from .cli import register_commands
+    register_commands(app)
 
     return app
\ No newline at end of file
@@ -0,0 +1,166 @@
+"""
+Rubric score analytics for one assignment.
+
+The assignment's scores are loaded as a submissions x rubric-items matrix:
+one query returns (submission_id, rubric_item_id, points) tuples, which are
+scattered into a preallocated NumPy array (NaN = not scored) without
+building ORM objects. Everything else is computed with
+array operations:
+
+- item mean and difficulty (mean / max_points) over scored cells;
+- discrimination index: mean item score of the top 27% of submissions by
+  rubric total minus that of the bottom 27%, as a fraction of max_points;
+- corrected item-total correlation: Pearson r between the item and the
+  total of the *other* items (unscored cells count as 0 here);
+- outlier graders: graders whose mean total (as a percentage) sits more
+  than OUTLIER_Z standard errors from the assignment mean.
+"""
+from itertools import chain
+
+import numpy as np
+from sqlalchemy import select
+
+from .models import db, Submission, RubricItem, SubmissionRubricScore, User
+
+# Share of submissions in the upper/lower groups of the discrimination index
+GROUP_FRACTION = 0.27
+OUTLIER_Z = 2.5
+
+
+def _score_rows(assignment_id):
+    stmt = (
+        select(SubmissionRubricScore.submission_id, SubmissionRubricScore.rubric_item_id, SubmissionRubricScore.points)
+        .join(Submission, Submission.id == SubmissionRubricScore.submission_id)
+        .where(Submission.assignment_id == assignment_id, SubmissionRubricScore.points.isnot(None))
+    )
+    return db.session.execute(stmt).all()
+
+
+def _positions(sorted_ids, ids):
+    """Index of each of ``ids`` in ``sorted_ids``, and a mask of those actually there."""
+    pos = np.searchsorted(sorted_ids, ids)
+    found = pos < len(sorted_ids)
+    found[found] = sorted_ids[pos[found]] == ids[found]
+    return pos, found
+
+
+def load_matrix(assignment_id):
+    """(submission_ids, grader_ids, items, matrix) for an assignment."""
+    items = db.session.execute(
+        select(RubricItem.id, RubricItem.label, RubricItem.max_points)
+        .where(RubricItem.assignment_id == assignment_id)
+        .order_by(RubricItem.id)
+    ).all()
+    subs = db.session.execute(
+        select(Submission.id, Submission.graded_by_id)
+        .where(Submission.assignment_id == assignment_id)
+        .order_by(Submission.id)
+    ).all()
+    submission_ids = np.fromiter((s[0] for s in subs), dtype=np.int64, count=len(subs))
+    grader_ids = np.fromiter((s[1] or 0 for s in subs), dtype=np.int64, count=len(subs))
+    item_ids = np.fromiter((i[0] for i in items), dtype=np.int64, count=len(items))
+
+    matrix = np.full((len(subs), len(items)), np.nan)
+    rows = _score_rows(assignment_id)
+    if rows and len(items):
+        flat = np.fromiter(chain.from_iterable(rows), dtype=np.float64, count=3 * len(rows)).reshape(-1, 3)
+        r, known_sub = _positions(submission_ids, flat[:, 0].astype(np.int64))
+        c, known_item = _positions(item_ids, flat[:, 1].astype(np.int64))
+        # The queries may see different snapshots: drop scores of submissions
+        # or items committed after those lists were read
+        known = known_sub & known_item
+        matrix[r[known], c[known]] = flat[known, 2]
+    return submission_ids, grader_ids, items, matrix
+
+
+def _clean(value, digits=4):
+    # NaN and +/-inf (e.g. an item worth 0 points) are not valid JSON
+    return round(float(value), digits) if np.isfinite(value) else None
+
+
+def item_statistics(matrix, max_points):
+    """Per-item mean, difficulty, discrimination and corrected item-total correlation."""
+    n, k = matrix.shape
+    scored = ~np.isnan(matrix)
+    counts = scored.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(counts > 0, np.nansum(matrix, axis=0) / counts, np.nan)
+        difficulty = means / max_points
+
+        filled = np.where(scored, matrix, 0.0)
+        totals = filled.sum(axis=1)
+
+        group = max(int(round(n * GROUP_FRACTION)), 1) if n >= 2 else 0
+        if group:
+            order = np.argsort(totals, kind="stable")
+            low, high = filled[order[:group]], filled[order[-group:]]
+            discrimination = (high.mean(axis=0) - low.mean(axis=0)) / max_points
+        else:
+            discrimination = np.full(k, np.nan)
+
+        rest = totals[:, None] - filled
+        x = filled - filled.mean(axis=0)
+        y = rest - rest.mean(axis=0)
+        correlation = (x * y).sum(axis=0) / np.sqrt((x * x).sum(axis=0) * (y * y).sum(axis=0))
+    return {
+        "scored": counts,
+        "mean": means,
+        "difficulty": difficulty,
+        "discrimination": discrimination,
+        "item_total_correlation": correlation,
+    }
+
+
+def grader_statistics(grader_ids, percent):
+    """Per-grader count, mean percentage and z-score of that mean."""
+    graders, index = np.unique(grader_ids, return_inverse=True)
+    counts = np.bincount(index, minlength=len(graders))
+    means = np.bincount(index, weights=percent, minlength=len(graders)) / counts
+    with np.errstate(invalid="ignore", divide="ignore"):
+        spread = percent.std()
+        z = (means - percent.mean()) / (spread / np.sqrt(counts))
+    z = np.where(spread > 0, z, 0.0)
+    return graders, counts, means, z
+
+
+def rubric_analytics(assignment_id):
+    """JSON-ready analytics for an assignment's rubric scores."""
+    submission_ids, grader_ids, items, matrix = load_matrix(assignment_id)
+    # Only submissions with at least one rubric score take part
+    keep = ~np.isnan(matrix).all(axis=1) if matrix.shape[1] else np.zeros(len(submission_ids), bool)
+    matrix, grader_ids = matrix[keep], grader_ids[keep]
+    max_points = np.fromiter((i[2] for i in items), dtype=np.float64, count=len(items))
+
+    result = {"assignment_id": assignment_id, "submissions": int(keep.sum()), "items": [], "graders": []}
+    if not result["submissions"]:
+        return result
+
+    stats = item_statistics(matrix, max_points)
+    for j, (item_id, label, points) in enumerate(items):
+        result["items"].append({
+            "rubric_item_id": item_id,
+            "label": label,
+            "max_points": points,
+            "scored": int(stats["scored"][j]),
+            **{
+                name: _clean(stats[name][j])
+                for name in ("mean", "difficulty", "discrimination", "item_total_correlation")
+            },
+        })
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        percent = 100.0 * np.nansum(matrix, axis=1) / max_points.sum()
+    graders, counts, means, z = grader_statistics(grader_ids, percent)
+    emails = dict(db.session.execute(
+        select(User.id, User.email).where(User.id.in_([int(g) for g in graders if g]))
+    ).all())
+    for grader, count, mean, score in zip(graders, counts, means, z):
+        result["graders"].append({
+            "grader_id": int(grader) or None,
+            "email": emails.get(int(grader)),
+            "submissions": int(count),
+            "mean_percent": _clean(mean, 2),
+            "z": _clean(score, 2),
+            "outlier": bool(abs(score) > OUTLIER_Z),
+        })
+    return result
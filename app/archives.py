@@ -0,0 +1,140 @@
+"""
+ZIP export/import of an assignment's PDFs.
+
+``iter_submissions_zip()`` streams every submitted PDF (and optionally
+every graded PDF) as a ZIP. Entries are STORED, since PDFs do not compress
+further, and zipfile writes them to a write-only buffer that is drained
+after every chunk, so neither the archive nor any one file is held in
+memory or written to disk. Entries are named after the student's email:
+
+    submissions/<email>.pdf
+    graded/<email>.pdf
+
+``attach_graded_zip()`` takes a ZIP of graded PDFs named the same way
+(any folder, ``<email>.pdf``) and stores each one as the graded file of
+that student's submission.
+"""
+import os
+import posixpath
+import zipfile
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import select
+from werkzeug.datastructures import FileStorage
+
+from .jobs import enqueue
+from .models import db, Submission, User
+from .uploads import save_upload, upload_folder, CHUNK_SIZE
+
+MAX_ENTRIES = 5000
+
+
+class _Drain:
+    """Write-only file object; zipfile writes into it and we hand the bytes on."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _entries(assignment_id, include_graded):
+    """
+    The archive's (name, path, timestamp) entries. Loaded in one go and the
+    read transaction ended before any file is streamed: on SQLite an open
+    cursor keeps a read lock for the whole download, blocking every writer.
+    """
+    rows = db.session.execute(
+        select(Submission.student_file_path, Submission.graded_file_path, Submission.submitted_at,
+               Submission.graded_at, User.email)
+        .join(User, User.id == Submission.student_id)
+        .where(Submission.assignment_id == assignment_id)
+        .order_by(User.email)
+    ).all()
+    db.session.commit()
+    entries = []
+    for student_path, graded_path, submitted_at, graded_at, email in rows:
+        if student_path:
+            entries.append((f"submissions/{email}.pdf", student_path, submitted_at))
+        if include_graded and graded_path:
+            entries.append((f"graded/{email}.pdf", graded_path, graded_at))
+    return entries
+
+
+def iter_submissions_zip(assignment_id, include_graded=False):
+    """Yield the assignment's PDFs as ZIP bytes."""
+    folder = upload_folder()
+    chunk_size = current_app.config.get("UPLOAD_CHUNK_SIZE", CHUNK_SIZE)
+    drain = _Drain()
+    missing = []
+    with zipfile.ZipFile(drain, "w", compression=zipfile.ZIP_STORED) as archive:
+        for name, rel_path, when in _entries(assignment_id, include_graded):
+            path = os.path.join(folder, rel_path)
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                missing.append(name)
+                continue
+            info = zipfile.ZipInfo(name, date_time=(when or datetime(1980, 1, 1)).timetuple()[:6])
+            info.compress_type = zipfile.ZIP_STORED
+            info.file_size = size  # lets zipfile pick ZIP64 up front for huge files
+            with open(path, "rb") as src, archive.open(info, "w") as dest:
+                for chunk in iter(lambda: src.read(chunk_size), b""):
+                    dest.write(chunk)
+                    yield drain.take()
+            yield drain.take()
+        if missing:
+            archive.writestr("MISSING.txt", "Files not found on the server:\n" + "\n".join(missing) + "\n")
+    yield drain.take()
+
+
+@dataclass
+class AttachResult:
+    attached: list = field(default_factory=list)  # emails
+    unmatched: list = field(default_factory=list)  # entry names
+
+
+def attach_graded_zip(assignment, fileobj, grader_id=None):
+    """
+    Store each ``<email>.pdf`` in the ZIP as that student's graded file.
+    Adds everything to the session; the caller commits.
+    """
+    by_email = {
+        email.lower(): sub
+        for sub, email in db.session.execute(
+            select(Submission, User.email)
+            .join(User, User.id == Submission.student_id)
+            .where(Submission.assignment_id == assignment.id)
+        )
+    }
+    result = AttachResult()
+    with zipfile.ZipFile(fileobj) as archive:
+        entries = [i for i in archive.infolist() if not i.is_dir()]
+        if len(entries) > MAX_ENTRIES:
+            raise zipfile.BadZipFile(f"more than {MAX_ENTRIES} files in the archive")
+        for info in entries:
+            stem, ext = posixpath.splitext(posixpath.basename(info.filename))
+            submission = by_email.get(stem.lower()) if ext.lower() == ".pdf" else None
+            if submission is None:
+                result.unmatched.append(info.filename)
+                continue
+            with archive.open(info) as entry:
+                stored = save_upload(FileStorage(stream=entry, filename=f"{stem}.pdf"))
+            submission.graded_file_path = stored.filename
+            submission.graded_at = datetime.utcnow()
+            submission.graded_by_id = grader_id
+            enqueue("inspect_pdf", submission_id=submission.id, path=stored.filename)
+            result.attached.append(stem.lower())
+    return result
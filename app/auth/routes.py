@@ -1,13 +1,24 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
 from flask_login import login_user, logout_user, login_required, current_user
-from werkzeug.security import check_password_hash, generate_password_hash
 
 from ..forms import LoginForm, RegistrationForm
-from ..models import db, User, Course, Enrollment
+from ..models import db, User
+from ..passwords import password_hasher, HasherBusy
+from ..ratelimit import auth_limiter
 
 auth_bp = Blueprint("auth", __name__, template_folder="../templates")
 
 
+def _too_many(template, form, retry_after):
+    flash("Too many attempts. Please wait a minute and try again.", "warning")
+    return render_template(template, form=form), 429, {"Retry-After": str(retry_after)}
+
+
+def _busy(template, form):
+    flash("The server is busy. Please try again in a moment.", "warning")
+    return render_template(template, form=form), 503, {"Retry-After": "5"}
+
+
 @auth_bp.route("/login", methods=["GET", "POST"])
 def login():
     if current_user.is_authenticated:
@@ -15,8 +26,23 @@ def login():
 
     form = LoginForm()
     if form.validate_on_submit():
-        user = User.query.filter_by(email=form.email.data.lower()).first()
-        if user and check_password_hash(user.password_hash, form.password.data):
+        email = form.email.data.lower()
+        retry_after = auth_limiter.hit(
+            f"ip:{request.remote_addr}", current_app.config.get("LOGIN_IP_RATE_LIMIT")
+        ) or auth_limiter.hit(f"login:{email}")
+        if retry_after:
+            return _too_many("auth/login.html", form, retry_after)
+
+        user = User.query.filter_by(email=email).first()
+        try:
+            valid = user is not None and password_hasher.verify(user.password_hash, form.password.data)
+            if valid and password_hasher.needs_rehash(user.password_hash):
+                # Work factor changed since this hash was made; upgrade it now
+                user.password_hash = password_hasher.hash(form.password.data)
+                db.session.commit()
+        except HasherBusy:
+            return _busy("auth/login.html", form)
+        if valid:
             login_user(user, remember=form.remember.data)
             next_url = request.args.get("next") or url_for("main.dashboard")
             return redirect(next_url)
@@ -31,27 +57,31 @@ def register():
 
     form = RegistrationForm()
     if form.validate_on_submit():
+        retry_after = auth_limiter.hit(
+            f"ip:{request.remote_addr}", current_app.config.get("LOGIN_IP_RATE_LIMIT")
+        )
+        if retry_after:
+            return _too_many("auth/register.html", form, retry_after)
+
         existing = User.query.filter_by(email=form.email.data.lower()).first()
         if existing:
             flash("An account with that email already exists.", "warning")
         else:
+            try:
+                password_hash = password_hasher.hash(form.password.data)
+            except HasherBusy:
+                return _busy("auth/register.html", form)
             user = User(
                 email=form.email.data.lower(),
-                password_hash=generate_password_hash(form.password.data),
+                password_hash=password_hash,
                 role=form.role.data,
             )
             db.session.add(user)
             db.session.flush()  # get user.id before commit
 
             # Auto-enroll user into all existing courses (demo context)
-            courses = Course.query.all()
-            for course in courses:
-                enrollment = Enrollment(
-                    user_id=user.id,
-                    course_id=course.id,
-                    role=user.role,
-                )
-                db.session.add(enrollment)
+            from ..roster import enroll_in_all_courses
+            enroll_in_all_courses(user.id, user.role)
 
             db.session.commit()
             flash("Account created! You can now log in.", "success")
@@ -0,0 +1,212 @@
+"""
+Content-addressed storage for uploaded files.
+
+Each distinct file is stored once under UPLOAD_FOLDER as
+``blobs/<aa>/<sha256>.pdf`` and that relative path is what
+Assignment.prompt_file_path / Submission.student_file_path /
+Submission.graded_file_path hold. A Blob row per file keeps a reference
+count that is adjusted on every flush that changes one of those columns;
+``collect_garbage()`` (``flask blobs gc``) deletes blobs nobody references.
+"""
+import os
+import re
+import time
+from collections import Counter
+
+from flask import current_app
+from sqlalchemy import case, event, inspect, func, union_all
+from sqlalchemy.orm import Session
+
+from .models import db, Blob, Assignment, Submission
+
+BLOB_DIR = "blobs"
+BLOB_SUFFIX = ".pdf"
+
+# Model columns that hold upload paths
+FILE_COLUMNS = {
+    Assignment: ("prompt_file_path",),
+    Submission: ("student_file_path", "graded_file_path"),
+}
+
+_BLOB_PATH_RE = re.compile(rf"^{BLOB_DIR}/[0-9a-f]{{2}}/([0-9a-f]{{64}}){re.escape(BLOB_SUFFIX)}$")
+
+
+def blob_path(sha256):
+    """Path of a blob relative to UPLOAD_FOLDER."""
+    return f"{BLOB_DIR}/{sha256[:2]}/{sha256}{BLOB_SUFFIX}"
+
+
+def sha_from_path(path):
+    """Return the hash for a blob path, or None for legacy (non-blob) paths."""
+    match = _BLOB_PATH_RE.match(path or "")
+    return match.group(1) if match else None
+
+
+def store(tmp_path, sha256, folder):
+    """
+    Move a fully written temp file into the store under its hash.
+
+    If the content is already stored the temp file is discarded. Returns the
+    blob path relative to ``folder``.
+    """
+    rel_path = blob_path(sha256)
+    dest = os.path.join(folder, rel_path)
+    if os.path.exists(dest):
+        os.remove(tmp_path)
+        # Refresh mtime so garbage collection treats the blob as recently used
+        os.utime(dest)
+    else:
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        os.replace(tmp_path, dest)
+    return rel_path
+
+
+def _reference_deltas(session):
+    deltas = Counter()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        columns = FILE_COLUMNS.get(type(obj))
+        if not columns:
+            continue
+        state = inspect(obj)
+        for column in columns:
+            history = state.attrs[column].load_history()
+            if obj in session.deleted:
+                for value in (*history.unchanged, *history.deleted):
+                    deltas[value] -= 1
+                continue
+            for value in history.added:
+                deltas[value] += 1
+            for value in history.deleted:
+                deltas[value] -= 1
+    return {path: d for path, d in deltas.items() if d and sha_from_path(path)}
+
+
+@event.listens_for(Session, "before_flush")
+def _track_blob_references(session, flush_context, instances):
+    from .roster import dialect_insert
+
+    with session.no_autoflush:
+        deltas = _reference_deltas(session)
+        if not deltas:
+            return
+
+        pending = {b.sha256: b for b in session.new if isinstance(b, Blob)}
+        ref_count = Blob.__table__.c.ref_count
+        changed = set()
+        for path, delta in deltas.items():
+            sha = sha_from_path(path)
+            if sha in pending:
+                pending[sha].ref_count = max((pending[sha].ref_count or 0) + delta, 0)
+                continue
+            # One atomic upsert, so two sessions storing the same new file
+            # don't both insert a row and trip the unique sha256
+            stmt = dialect_insert(Blob).values(sha256=sha, size=_size_on_disk(path), ref_count=max(delta, 0))
+            session.execute(stmt.on_conflict_do_update(
+                index_elements=["sha256"],
+                set_={"ref_count": case((ref_count + delta > 0, ref_count + delta), else_=0)},
+            ))
+            changed.add(sha)
+
+        # Loaded rows now hold stale counts
+        for obj in list(session.identity_map.values()):
+            if isinstance(obj, Blob) and obj.sha256 in changed:
+                session.expire(obj, ["ref_count"])
+
+
+def _size_on_disk(path):
+    try:
+        return os.path.getsize(os.path.join(str(current_app.config["UPLOAD_FOLDER"]), path))
+    except (RuntimeError, OSError):
+        return None
+
+
+def count_references():
+    """Recount blob references straight from the file columns: {sha256: count}."""
+    selects = [
+        db.select(getattr(model, column).label("path"))
+        for model, columns in FILE_COLUMNS.items()
+        for column in columns
+    ]
+    refs = union_all(*selects).subquery()
+    rows = db.session.execute(
+        db.select(refs.c.path, func.count())
+        .where(refs.c.path.like(f"{BLOB_DIR}/%"))
+        .group_by(refs.c.path)
+    )
+    counts = Counter()
+    for path, count in rows:
+        sha = sha_from_path(path)
+        if sha:
+            counts[sha] += count
+    return counts
+
+
+def collect_garbage(grace_seconds=3600, dry_run=False):
+    """
+    Delete unreferenced blobs.
+
+    Reference counts are first reconciled against the file columns, then any
+    blob with no references is removed along with its file, as are files
+    under the blob directory that have no Blob row. Files touched within
+    ``grace_seconds`` are kept, since they may belong to an upload that has
+    not committed yet. Returns a dict of counters.
+    """
+    folder = str(current_app.config["UPLOAD_FOLDER"])
+    counts = count_references()
+    stats = Counter()
+
+    known = set()
+    for blob in Blob.query.all():
+        known.add(blob.sha256)
+        actual = counts.get(blob.sha256, 0)
+        if blob.ref_count != actual:
+            stats["recounted"] += 1
+            blob.ref_count = actual
+        path = os.path.join(folder, blob_path(blob.sha256))
+        if actual == 0 and not _is_recent(path, grace_seconds):
+            stats["deleted_blobs"] += 1
+            stats["freed_bytes"] += _delete_file(path, dry_run)
+            if not dry_run:
+                db.session.delete(blob)
+
+    # Referenced but untracked (e.g. rows written before the store existed)
+    for sha, count in counts.items():
+        if sha not in known:
+            stats["recounted"] += 1
+            if not dry_run:
+                db.session.add(Blob(sha256=sha, size=_size_on_disk(blob_path(sha)), ref_count=count))
+
+    blob_root = os.path.join(folder, BLOB_DIR)
+    for dirpath, _dirnames, filenames in os.walk(blob_root):
+        for name in filenames:
+            full = os.path.join(dirpath, name)
+            sha = sha_from_path(os.path.relpath(full, folder).replace(os.sep, "/"))
+            if sha and (sha in known or sha in counts):
+                continue
+            if _is_recent(full, grace_seconds):
+                continue
+            stats["deleted_orphan_files"] += 1
+            stats["freed_bytes"] += _delete_file(full, dry_run)
+
+    if dry_run:
+        db.session.rollback()
+    else:
+        db.session.commit()
+    return dict(stats)
+
+
+def _is_recent(path, grace_seconds):
+    try:
+        return time.time() - os.path.getmtime(path) < grace_seconds
+    except OSError:
+        return False
+
+
+def _delete_file(path, dry_run):
+    try:
+        size = os.path.getsize(path)
+        if not dry_run:
+            os.remove(path)
+        return size
+    except OSError:
+        return 0
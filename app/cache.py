@@ -0,0 +1,57 @@
+"""
+Cache backends shared by the identity cache and the fragment cache.
+
+A backend is any object with get(key), set(key, value, ttl) and
+delete(key); get returns None for a missing or expired key.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUBackend:
+    """In-process LRU with per-entry expiry."""
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SerializingBackend(LRUBackend):
+    """Fake shared backend: values round-trip through JSON like a network cache."""
+
+    def get(self, key):
+        value = super().get(key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl):
+        super().set(key, json.dumps(value), ttl)
@@ -0,0 +1,186 @@
+import click
+from flask.cli import AppGroup
+
+schema_cli = AppGroup("schema", help="Schema migration commands.")
+blobs_cli = AppGroup("blobs", help="Upload blob store commands.")
+roster_cli = AppGroup("roster", help="Roster import commands.")
+jobs_cli = AppGroup("jobs", help="Background job commands.")
+stats_cli = AppGroup("stats", help="Assignment statistics commands.")
+search_cli = AppGroup("search", help="Full-text search index commands.")
+uploads_cli = AppGroup("uploads", help="Resumable upload commands.")
+
+
+@schema_cli.command("upgrade")
+@click.option("--to", "target", type=int, default=None, help="Stop at this version.")
+def schema_upgrade(target):
+    """Apply pending schema migrations."""
+    from .migrations import upgrade, current_version
+
+    applied = upgrade(target=target)
+    if applied:
+        click.echo(f"Applied migrations: {', '.join(map(str, applied))}")
+    else:
+        click.echo("Schema already up to date.")
+    click.echo(f"Schema version: {current_version()}")
+
+
+@schema_cli.command("bootstrap")
+def schema_bootstrap():
+    """Bring the schema up to date and add the demo course if there are no courses."""
+    from .migrations import upgrade, current_version, seed_demo_course
+
+    applied = upgrade()
+    if applied:
+        click.echo(f"Applied migrations: {', '.join(map(str, applied))}")
+    if seed_demo_course():
+        click.echo("Created demo course.")
+    click.echo(f"Schema version: {current_version()}")
+
+
+@schema_cli.command("version")
+def schema_version():
+    """Show the current schema version."""
+    from .migrations import current_version
+
+    click.echo(current_version())
+
+
+@blobs_cli.command("gc")
+@click.option("--dry-run", is_flag=True, help="Report what would be deleted.")
+@click.option("--grace-seconds", type=int, default=3600, show_default=True,
+              help="Keep files modified more recently than this.")
+def blobs_gc(dry_run, grace_seconds):
+    """Delete uploaded files no assignment or submission references."""
+    from .blobstore import collect_garbage
+
+    stats = collect_garbage(grace_seconds=grace_seconds, dry_run=dry_run)
+    prefix = "[dry run] " if dry_run else ""
+    click.echo(
+        f"{prefix}deleted {stats.get('deleted_blobs', 0)} blobs and "
+        f"{stats.get('deleted_orphan_files', 0)} orphan files, "
+        f"freed {stats.get('freed_bytes', 0)} bytes, "
+        f"recounted {stats.get('recounted', 0)} blobs"
+    )
+
+
+@roster_cli.command("import")
+@click.argument("csv_file", type=click.File("r", encoding="utf-8-sig"))
+@click.option("--course", "course_code", default=None, help="Course code for rows without one.")
+@click.option("--default-password", default=None, help="Password for rows without one.")
+@click.option("--batch-size", type=int, default=1000, show_default=True)
+@click.option("--workers", type=int, default=None, help="Hashing processes (default: CPU count, 0: none).")
+def roster_import(csv_file, course_code, default_password, batch_size, workers):
+    """Bulk-create users and enrollments from CSV_FILE."""
+    from .models import Course
+    from .roster import import_roster, RosterError
+
+    course = None
+    if course_code:
+        course = Course.query.filter_by(code=course_code).first()
+        if course is None:
+            raise click.BadParameter(f"No course with code {course_code!r}", param_hint="--course")
+
+    try:
+        result = import_roster(
+            csv_file,
+            default_password=default_password,
+            default_course=course,
+            batch_size=batch_size,
+            workers=workers,
+        )
+    except RosterError as exc:
+        raise click.ClickException(str(exc))
+
+    for line_no, reason in result.skipped:
+        click.echo(f"line {line_no}: skipped ({reason})", err=True)
+    click.echo(
+        f"{result.rows} rows, {result.users_created} users and "
+        f"{result.enrollments_created} enrollments created in {result.seconds:.2f}s "
+        f"({result.rows_per_second:.0f} rows/s)"
+    )
+
+
+@jobs_cli.command("work")
+@click.option("--once", is_flag=True, help="Run queued jobs, then exit.")
+def jobs_work(once):
+    """Process background jobs in the foreground."""
+    import time
+    from flask import current_app
+    from .jobs import run_pending, requeue_stale
+
+    requeue_stale(current_app.config["JOB_STALE_AFTER"])
+    while True:
+        ran = run_pending()
+        if ran:
+            click.echo(f"Ran {ran} jobs")
+        if once:
+            break
+        time.sleep(current_app.config["JOB_POLL_INTERVAL"])
+
+
+@jobs_cli.command("status")
+def jobs_status():
+    """Show job counts by status."""
+    from .jobs import status_counts
+
+    counts = status_counts()
+    for status in ("queued", "running", "done", "failed"):
+        click.echo(f"{status:8s} {counts.get(status, 0)}")
+
+
+@stats_cli.command("rebuild")
+@click.option("--assignment", "assignment_ids", type=int, multiple=True, help="Only this assignment (repeatable).")
+def stats_rebuild(assignment_ids):
+    """Recompute assignment statistics from the submissions."""
+    from .models import db
+    from .stats import rebuild
+
+    count = rebuild(list(assignment_ids) or None)
+    db.session.commit()
+    click.echo(f"Rebuilt statistics for {count} assignments.")
+
+
+@stats_cli.command("check")
+def stats_check():
+    """Compare stored assignment statistics with the submissions."""
+    from .stats import check
+
+    problems = check()
+    for assignment_id, column, stored, expected in problems:
+        click.echo(f"assignment {assignment_id}: {column} is {stored!r}, expected {expected!r}")
+    if problems:
+        raise click.ClickException(f"{len(problems)} mismatches; run 'flask stats rebuild'.")
+    click.echo("Assignment statistics are consistent.")
+
+
+@search_cli.command("rebuild")
+@click.option("--pdfs", is_flag=True, help="Also re-extract the text of every uploaded PDF (slow).")
+def search_rebuild(pdfs):
+    """Recreate the search index from the database."""
+    from .models import db
+    from .search import rebuild
+
+    count = rebuild(pdfs=pdfs)
+    db.session.commit()
+    click.echo(f"Indexed {count} documents.")
+
+
+@uploads_cli.command("expire")
+def uploads_expire():
+    """Delete expired resumable upload sessions and their chunks."""
+    from .models import db
+    from .resumable import expire
+
+    count = expire()
+    db.session.commit()
+    click.echo(f"Expired {count} upload sessions.")
+
+
+def register_commands(app):
+    app.cli.add_command(schema_cli)
+    app.cli.add_command(blobs_cli)
+    app.cli.add_command(roster_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(uploads_cli)
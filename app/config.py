@@ -16,5 +16,116 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # SQLite tuning (see app/sqlite_tuning.py): "default" or "production" (WAL etc.)
+    SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "default")
+    SQLITE_PRAGMAS = {}  # extra/overriding pragmas, e.g. {"cache_size": -200000}
+    SQLITE_BEGIN_MODE = os.getenv("SQLITE_BEGIN_MODE", "deferred")  # or "immediate"
+
+    # Read/write routing (see app/routing.py): views marked @read_only read from a
+    # replica, or from the SQLite file opened a second time read-only.
+    SQLALCHEMY_READ_URI = os.getenv("DATABASE_READ_URL")
+    SQLITE_READ_ONLY_ENGINE = os.getenv("SQLITE_READ_ONLY_ENGINE", "0") == "1"
+    DB_READ_STICKY_SECONDS = 10  # reads stay on the primary this long after the user writes
+
     # Where uploaded PDFs will be stored (used by "Upload & Scan" use case)
-    UPLOAD_FOLDER = BASE_DIR / "uploads"
\ No newline at end of file
+    UPLOAD_FOLDER = BASE_DIR / "uploads"
+
+    # Largest accepted request body / uploaded file, in bytes (default 50 MB).
+    # Flask rejects bigger requests with 413; app.uploads enforces it while streaming.
+    MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", 50 * 1024 * 1024))
+
+    # Request body limit for a ZIP of graded PDFs (default 1 GB); each PDF
+    # inside it is still held to MAX_CONTENT_LENGTH.
+    GRADED_ZIP_MAX_LENGTH = int(os.getenv("GRADED_ZIP_MAX_LENGTH", 1024 * 1024 * 1024))
+
+    # Chunk size used when streaming uploads to disk
+    UPLOAD_CHUNK_SIZE = 64 * 1024
+
+    # Resumable uploads (see app/resumable.py): size of each PUT chunk, and how
+    # long an unfinished upload is kept. Totals are held to MAX_CONTENT_LENGTH.
+    UPLOAD_SESSION_CHUNK_SIZE = int(os.getenv("UPLOAD_SESSION_CHUNK_SIZE", 5 * 1024 * 1024))
+    UPLOAD_SESSION_TTL = int(os.getenv("UPLOAD_SESSION_TTL", 24 * 3600))  # seconds
+    UPLOAD_SESSION_CLAIM_TIMEOUT = 120  # seconds before a stuck finalize may be retried
+
+    # Who sends uploaded files once the view has checked access:
+    # "python" (Flask streams them), "x-sendfile" or "x-accel-redirect" (front proxy does)
+    UPLOAD_SERVE_BACKEND = os.getenv("UPLOAD_SERVE_BACKEND", "python")
+    # nginx internal location mapped to UPLOAD_FOLDER (x-accel-redirect only)
+    UPLOAD_ACCEL_PREFIX = os.getenv("UPLOAD_ACCEL_PREFIX", "/protected-uploads/")
+
+    # Page previews (see app/previews.py): "auto", "pymupdf", "pdftoppm" or "none"
+    PREVIEW_RENDERER = os.getenv("PREVIEW_RENDERER", "auto")
+    PREVIEW_THUMB_DPI = 20
+    PREVIEW_PAGE_DPI = 100
+    PREVIEW_MAX_THUMBS = 40  # thumbnails rendered up front per file
+    PREVIEW_CACHE_MAX_BYTES = int(os.getenv("PREVIEW_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+    PREVIEW_SWEEP_INTERVAL = 300  # seconds between budget sweeps from on-demand renders
+
+    # Identity cache used by load_user (see app/user_cache.py). Role changes are evicted
+    # only in the committing process, so without a shared backend records live just
+    # USER_CACHE_LOCAL_TTL seconds: that is how long a demoted user keeps old rights.
+    USER_CACHE_ENABLED = True
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 300))  # seconds, shared backend only
+    USER_CACHE_LOCAL_TTL = int(os.getenv("USER_CACHE_LOCAL_TTL", 5))  # seconds, in-process
+    USER_CACHE_SIZE = 10000
+    # Optional backend object/factory with get/set/delete (e.g. a shared cache)
+    USER_CACHE_BACKEND = None
+
+    # Rendered dashboard fragments (see app/fragment_cache.py). Unset = on only with a
+    # shared FRAGMENT_CACHE_BACKEND: the in-process default is invalidated only in the
+    # process that commits. Set to 1 for a single-process deployment.
+    FRAGMENT_CACHE_ENABLED = {"1": True, "0": False}.get(os.getenv("FRAGMENT_CACHE_ENABLED", ""))
+    FRAGMENT_CACHE_TTL = int(os.getenv("FRAGMENT_CACHE_TTL", 300))  # seconds
+    FRAGMENT_CACHE_SIZE = 2000
+    FRAGMENT_CACHE_BACKEND = None  # object/factory with get/set/delete (e.g. a shared cache)
+
+    # Password hashing (see app/passwords.py): any werkzeug method string.
+    # Hashes made with other parameters are upgraded on the user's next login.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))  # 0 = hash on the request thread
+    PASSWORD_HASH_MAX_PENDING = 64  # queued hashes before logins get a 503
+
+    # Web roster imports (see app/roster.py); larger rosters use "flask roster import"
+    ROSTER_WEB_MAX_ROWS = int(os.getenv("ROSTER_WEB_MAX_ROWS", 500))
+    ROSTER_HASH_WORKERS = int(os.getenv("ROSTER_HASH_WORKERS", 2))  # their own pool, apart from logins
+
+    # Login/registration attempts per LOGIN_RATE_WINDOW seconds (see app/ratelimit.py)
+    RATE_LIMIT_ENABLED = True
+    LOGIN_RATE_LIMIT = 10  # per account
+    LOGIN_IP_RATE_LIMIT = 300  # per client address
+    # Front proxies (nginx for x-accel-redirect, a load balancer, ...) whose
+    # X-Forwarded-For/-Proto headers to trust. Behind a proxy, leaving this at 0
+    # puts every login in the proxy's single LOGIN_IP_RATE_LIMIT bucket.
+    PROXY_TRUSTED_HOPS = int(os.getenv("PROXY_TRUSTED_HOPS", 0))
+    LOGIN_RATE_WINDOW = 60
+    RATE_LIMIT_BACKEND = None
+
+    # Per-endpoint timing/SQL profiling (see app/profiling.py)
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+    PROFILING_NPLUSONE_THRESHOLD = 5  # identical statements in one request
+    PROFILING_METRICS_TOKEN = os.getenv("PROFILING_METRICS_TOKEN")  # bearer token for scrapers
+
+    # Live submission status over server-sent events (see app/pubsub.py)
+    PUBSUB_ENABLED = True
+    PUBSUB_REDIS_URL = os.getenv("PUBSUB_REDIS_URL")  # share events between server processes
+    PUBSUB_BACKEND = None  # or an object/factory with publish/subscribe
+    PUBSUB_QUEUE_SIZE = 100  # messages buffered per open stream
+    # Each open stream holds a server thread, which would starve sync workers: only
+    # enable with threaded/async workers (gthread with spare threads, gevent, ...).
+    SSE_ENABLED = os.getenv("SSE_ENABLED", "0") == "1"
+    SSE_HEARTBEAT = 15  # seconds between keep-alive comments
+    SSE_MAX_AGE = 60  # seconds before a stream closes and the browser reconnects
+
+    # Full-text search (see app/search.py)
+    SEARCH_RESULTS_PER_PAGE = 20
+    SEARCH_MAX_PAGE = 500  # higher ?page= values are clamped to this
+
+    # Instructor submissions list paging
+    SUBMISSIONS_PER_PAGE = 50
+    SUBMISSIONS_MAX_PER_PAGE = 200
+
+    # Background jobs (see app/jobs.py). 0 threads = run only via "flask jobs work".
+    JOB_WORKER_THREADS = int(os.getenv("JOB_WORKER_THREADS", 1))
+    JOB_POLL_INTERVAL = 2.0  # seconds between polls when idle
+    JOB_MAX_ATTEMPTS = 3
+    JOB_STALE_AFTER = 600  # seconds before a "running" job is assumed dead
@@ -1,3 +1,5 @@
+import math
+
 from flask_wtf import FlaskForm
 from wtforms import (
     StringField,
@@ -9,11 +11,17 @@ from wtforms import (
     FloatField,
 )
 from wtforms.fields import DateField
-from wtforms.validators import DataRequired, Email, Length, EqualTo, Optional, NumberRange
+from wtforms.validators import DataRequired, Email, Length, EqualTo, Optional, NumberRange, StopValidation
 
 from flask_wtf.file import FileField, FileAllowed, FileRequired
 
 
+def finite(form, field):
+    """FloatField accepts "inf" and "nan" (and 1e400 overflows to inf); scores must be real numbers."""
+    if field.data is not None and not math.isfinite(field.data):
+        raise StopValidation("Enter a finite number.")
+
+
 class LoginForm(FlaskForm):
     email = StringField("Email", validators=[DataRequired(), Email()])
     password = PasswordField("Password", validators=[DataRequired(), Length(min=6, max=128)])
@@ -74,7 +82,7 @@ class SubmissionUploadForm(FlaskForm):
 class GradeForm(FlaskForm):
     total_score = FloatField(
         "Total Score",
-        validators=[Optional(), NumberRange(min=0)],
+        validators=[Optional(), finite, NumberRange(min=0)],
     )
     general_comment = TextAreaField("Feedback / Comments", validators=[Optional()])
 
@@ -85,4 +93,32 @@ class GradeForm(FlaskForm):
         ],
     )
 
-    submit = SubmitField("Save Grade")
\ No newline at end of file
+    submit = SubmitField("Save Grade")
+
+
+class RosterImportForm(FlaskForm):
+    """Instructor uploads a CSV roster (email, role, password, course)."""
+    roster_file = FileField(
+        "Roster (CSV)",
+        validators=[
+            FileRequired(),
+            FileAllowed(["csv"], "CSV files only."),
+        ],
+    )
+    default_password = PasswordField(
+        "Default password (for rows without one)",
+        validators=[Optional(), Length(min=6, max=128)],
+    )
+    submit = SubmitField("Import Roster")
+
+
+class GradedZipForm(FlaskForm):
+    """Instructor uploads a ZIP of graded PDFs named <student email>.pdf."""
+    graded_zip = FileField(
+        "Graded PDFs (ZIP)",
+        validators=[
+            FileRequired(),
+            FileAllowed(["zip"], "ZIP files only."),
+        ],
+    )
+    submit = SubmitField("Upload Graded PDFs")
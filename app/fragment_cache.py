@@ -0,0 +1,175 @@
+"""
+Rendered-fragment cache for the dashboards.
+
+The course list and assignment table are rendered once and the HTML is
+kept in a bounded TTL cache (same backends as the identity cache), so a
+dashboard hit that finds its fragments skips both the queries and the
+template work.
+
+Fragments are never deleted one by one. Each cache key embeds the current
+"generation" of the data it was built from, and committing a change to
+that data moves the generation on, so older entries are simply never asked
+for again and age out of the LRU:
+
+    courses                      any Course row (every course list)
+    user:<id>:courses            that user's enrollments (their course list)
+    course:<id>                  assignments in the course (everyone's table)
+    course:<id>:submissions      any submission in the course (instructor table)
+    course:<id>:user:<id>        one student's submissions (their table)
+
+Generations are recorded by session events when the transaction commits,
+so an uncommitted or rolled-back change never invalidates anything. Bulk
+Core statements (roster import) bypass the ORM and call invalidate()
+themselves.
+
+Generations live in the cache backend, so a bump is only seen by processes
+sharing that backend. The default in-process LRU would let other server
+processes serve stale fragments until the TTL runs out, so the cache stays
+off unless FRAGMENT_CACHE_BACKEND is a shared cache, or FRAGMENT_CACHE_ENABLED
+is set explicitly for a single-process deployment.
+
+Fragments rendered from a read replica (``@read_only`` views, see
+routing.py) are served but never stored: the replica may not have caught
+up with the change that moved the generation on.
+"""
+import uuid
+
+from markupsafe import Markup
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from .cache import LRUBackend
+from .models import db, Course, Enrollment, Assignment, Submission
+from .routing import uses_read_bind
+
+
+class FragmentCache:
+    def __init__(self, backend=None, ttl=300):
+        self.backend = backend or LRUBackend(maxsize=2000)
+        self.ttl = ttl
+        self.enabled = True
+        self.hits = {}
+        self.misses = {}
+
+    def init_app(self, app):
+        self.ttl = app.config.get("FRAGMENT_CACHE_TTL", self.ttl)
+        backend = app.config.get("FRAGMENT_CACHE_BACKEND")
+        self.enabled = app.config.get("FRAGMENT_CACHE_ENABLED")
+        if self.enabled is None:
+            # Invalidations only reach processes sharing the backend
+            self.enabled = backend is not None
+        if backend is not None:
+            self.backend = backend() if callable(backend) else backend
+        else:
+            self.backend = LRUBackend(maxsize=app.config.get("FRAGMENT_CACHE_SIZE", 2000))
+        self.reset_stats()
+
+    def generation(self, scope):
+        key = f"gen:{scope}"
+        value = self.backend.get(key)
+        if value is None:
+            # A lost generation must not fall back to one an old fragment used
+            value = uuid.uuid4().hex[:12]
+            self.backend.set(key, value, self.ttl * 10)
+        return value
+
+    def invalidate(self, *scopes):
+        for scope in scopes:
+            self.backend.set(f"gen:{scope}", uuid.uuid4().hex[:12], self.ttl * 10)
+
+    def render(self, name, scopes, parts, render_func):
+        """
+        Return the cached fragment ``name`` or build it with ``render_func()``.
+
+        ``scopes`` are the generations the fragment depends on and ``parts``
+        the remaining key components (selected course, user id, ...).
+        """
+        if not self.enabled:
+            return Markup(render_func())
+        key = ":".join(
+            ["frag", name, *map(str, parts), *(self.generation(s) for s in scopes)]
+        )
+        html = self.backend.get(key)
+        if html is not None:
+            self.hits[name] = self.hits.get(name, 0) + 1
+            return Markup(html)
+        self.misses[name] = self.misses.get(name, 0) + 1
+        html = str(render_func())
+        # A lagging replica can render data older than the generation in the key
+        if not uses_read_bind(db.session()):
+            self.backend.set(key, html, self.ttl)
+        return Markup(html)
+
+    def stats(self):
+        result = {}
+        for name in sorted(set(self.hits) | set(self.misses)):
+            hits, misses = self.hits.get(name, 0), self.misses.get(name, 0)
+            result[name] = {"hits": hits, "misses": misses, "hit_ratio": hits / (hits + misses)}
+        hits, misses = sum(self.hits.values()), sum(self.misses.values())
+        result["total"] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+        }
+        return result
+
+    def reset_stats(self):
+        self.hits = {}
+        self.misses = {}
+
+
+fragment_cache = FragmentCache()
+
+
+def _values(obj, attr):
+    # Current value plus the previous one if this flush changed it
+    history = inspect(obj).attrs[attr].history
+    values = {getattr(obj, attr)}
+    values.update(history.deleted or ())
+    values.discard(None)
+    return values
+
+
+def _scopes_for(session, connection, obj):
+    if isinstance(obj, Course):
+        return {"courses"}
+    if isinstance(obj, Enrollment):
+        return {f"user:{uid}:courses" for uid in _values(obj, "user_id")}
+    if isinstance(obj, Assignment):
+        return {f"course:{cid}" for cid in _values(obj, "course_id")}
+    if isinstance(obj, Submission):
+        assignment_ids = _values(obj, "assignment_id")
+        if not assignment_ids:
+            return set()
+        course_ids = connection.execute(
+            select(Assignment.course_id).where(Assignment.id.in_(assignment_ids))
+        ).scalars()
+        scopes = set()
+        for cid in course_ids:
+            scopes.add(f"course:{cid}:submissions")
+            scopes.update(f"course:{cid}:user:{sid}" for sid in _values(obj, "student_id"))
+        return scopes
+    return set()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_scopes(session, flush_context):
+    changed = [*session.new, *session.dirty, *session.deleted]
+    if not any(isinstance(o, (Course, Enrollment, Assignment, Submission)) for o in changed):
+        return
+    connection = session.connection()
+    scopes = session.info.setdefault("fragment_scopes", set())
+    for obj in changed:
+        scopes |= _scopes_for(session, connection, obj)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    scopes = session.info.pop("fragment_scopes", None)
+    if scopes:
+        fragment_cache.invalidate(*scopes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_scopes(session):
+    session.info.pop("fragment_scopes", None)
@@ -0,0 +1,125 @@
+"""
+Whole-course gradebook export.
+
+Every (student, submission, rubric score) row for the course is read in
+keyset-paged batches of BATCH_STUDENTS students, ordered by student; rows
+are pivoted one student at a time and written out as CSV lines, so memory
+stays flat however big the course is. Each batch is fetched completely and
+its read transaction ended before any of it is sent: on SQLite a cursor
+left open while the client downloads keeps a read lock that blocks every
+writer. Columns are the student's email, then one column per assignment
+(total score), optionally followed by one column per rubric item.
+"""
+import csv
+from itertools import groupby
+
+from sqlalchemy import and_, or_, select
+
+from .models import db, User, Assignment, Submission, Enrollment, RubricItem, SubmissionRubricScore
+
+BATCH_STUDENTS = 500
+
+
+class _LineBuffer:
+    """File-like object that hands back whatever csv.writer just wrote."""
+
+    def write(self, line):
+        return line
+
+
+def gradebook_columns(course_id, include_rubric=False):
+    """(assignments, rubric_items) in column order."""
+    assignments = (
+        Assignment.query.filter_by(course_id=course_id)
+        .order_by(Assignment.due_date, Assignment.id)
+        .all()
+    )
+    rubric_items = []
+    if include_rubric:
+        order = {a.id: i for i, a in enumerate(assignments)}
+        rubric_items = sorted(
+            RubricItem.query.filter(RubricItem.assignment_id.in_(order)).all(),
+            key=lambda r: (order[r.assignment_id], r.id),
+        )
+    return assignments, rubric_items
+
+
+def _student_pages(course_id, batch_size):
+    """The course's (user id, email) pairs in gradebook order, batch_size at a time."""
+    stmt = (
+        select(User.id, User.email)
+        .join(Enrollment, Enrollment.user_id == User.id)
+        .where(Enrollment.course_id == course_id, Enrollment.role == "student")
+        .order_by(User.email, User.id)
+        .limit(batch_size)
+    )
+    after = None
+    while True:
+        page_stmt = stmt
+        if after is not None:
+            last_id, last_email = after
+            page_stmt = stmt.where(or_(User.email > last_email, and_(User.email == last_email, User.id > last_id)))
+        page = db.session.execute(page_stmt).all()
+        if not page:
+            return
+        yield page
+        after = page[-1]
+
+
+def _grade_rows(course_id, include_rubric, batch_size):
+    course_assignments = select(Assignment.id).where(Assignment.course_id == course_id)
+    columns = [User.id, User.email, Submission.assignment_id, Submission.total_score]
+    stmt = (
+        select(*columns)
+        .select_from(Enrollment)
+        .join(User, User.id == Enrollment.user_id)
+        .outerjoin(
+            Submission,
+            and_(
+                Submission.student_id == Enrollment.user_id,
+                Submission.assignment_id.in_(course_assignments),
+            ),
+        )
+        .where(Enrollment.course_id == course_id, Enrollment.role == "student")
+        .order_by(User.email, User.id)
+    )
+    if include_rubric:
+        stmt = stmt.add_columns(SubmissionRubricScore.rubric_item_id, SubmissionRubricScore.points).outerjoin(
+            SubmissionRubricScore, SubmissionRubricScore.submission_id == Submission.id
+        )
+    for page in _student_pages(course_id, batch_size):
+        rows = db.session.execute(stmt.where(User.id.in_([user_id for user_id, _email in page]))).all()
+        db.session.commit()
+        yield from rows
+
+
+def iter_gradebook_csv(course_id, include_rubric=False):
+    """Yield the gradebook as CSV text, one line per student after the header."""
+    assignments, rubric_items = gradebook_columns(course_id, include_rubric)
+    assignment_col = {a.id: i for i, a in enumerate(assignments)}
+    rubric_col = {r.id: len(assignments) + i for i, r in enumerate(rubric_items)}
+    titles = {a.id: a.title for a in assignments}
+
+    writer = csv.writer(_LineBuffer())
+    yield writer.writerow(
+        ["email"]
+        + [a.title for a in assignments]
+        + [f"{titles[r.assignment_id]}: {r.label}" for r in rubric_items]
+    )
+
+    width = len(assignments) + len(rubric_items)
+    rows = _grade_rows(course_id, include_rubric, BATCH_STUDENTS)
+    for (_user_id, email), student_rows in groupby(rows, key=lambda r: (r[0], r[1])):
+        cells = [""] * width
+        for row in student_rows:
+            assignment_id, total = row[2], row[3]
+            if assignment_id is not None and total is not None:
+                cells[assignment_col[assignment_id]] = _fmt(total)
+            if include_rubric and row[4] is not None and row[5] is not None:
+                cells[rubric_col[row[4]]] = _fmt(row[5])
+        yield writer.writerow([email] + cells)
+
+
+def _fmt(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else str(value)
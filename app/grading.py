@@ -0,0 +1,180 @@
+"""
+Batch grading: scores, comments and rubric points for many submissions in
+one transaction.
+
+Each entry in a batch looks like::
+
+    {
+        "submission_id": 12,
+        "total_score": 9.5,               # optional
+        "general_comment": "Nice work",   # optional; omitted = unchanged
+        "rubric": [                       # optional
+            {"rubric_item_id": 3, "points": 2, "comment": "..."},
+        ],
+    }
+
+The whole batch is checked in memory against the assignment's submissions
+and rubric items (loaded with one query each) before anything is written;
+any error rejects the batch. Rubric points are upserted with a single
+INSERT ... ON CONFLICT DO UPDATE, and when an entry has rubric points but
+no explicit total_score the total is recomputed as the sum of all of that
+submission's rubric points. Entries that only change comments keep the
+submission's total and graded_at. The upsert bypasses the ORM, so the rubric
+comments' search documents are refreshed explicitly. Everything is
+committed once.
+"""
+import math
+from datetime import datetime
+
+from .models import db, Submission, RubricItem, SubmissionRubricScore
+from .roster import dialect_insert
+from . import search
+
+MAX_BATCH = 1000
+
+
+class GradingError(ValueError):
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid grade entries")
+        self.errors = errors  # [{"index", "submission_id", "error"}]
+
+
+def _number(value):
+    return (
+        isinstance(value, (int, float))
+        and not isinstance(value, bool)
+        and math.isfinite(value)
+    )
+
+
+def _id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _validate(assignment_id, grades, submissions, rubric_items):
+    errors = []
+
+    def error(i, sub_id, message):
+        errors.append({"index": i, "submission_id": sub_id, "error": message})
+
+    seen = set()
+    for i, entry in enumerate(grades):
+        if not isinstance(entry, dict):
+            error(i, None, "entry must be an object")
+            continue
+        sub_id = entry.get("submission_id")
+        if not _id(sub_id):
+            error(i, None, "submission_id must be an integer")
+            continue
+        if sub_id not in submissions:
+            error(i, sub_id, f"no submission {sub_id!r} for assignment {assignment_id}")
+            continue
+        if sub_id in seen:
+            error(i, sub_id, "submission appears more than once")
+        seen.add(sub_id)
+
+        total = entry.get("total_score")
+        if total is not None and not (_number(total) and total >= 0):
+            error(i, sub_id, "total_score must be a number >= 0")
+        comment = entry.get("general_comment")
+        if comment is not None and not isinstance(comment, str):
+            error(i, sub_id, "general_comment must be a string")
+
+        rubric = entry.get("rubric")
+        if rubric is not None and not isinstance(rubric, list):
+            error(i, sub_id, "rubric must be a list")
+            continue
+        items_seen = set()
+        for score in rubric or []:
+            item_id = score.get("rubric_item_id") if isinstance(score, dict) else None
+            item = rubric_items.get(item_id) if _id(item_id) else None
+            if item is None:
+                error(i, sub_id, "rubric entries need a rubric_item_id of this assignment")
+                continue
+            if item.id in items_seen:
+                error(i, sub_id, f"rubric item {item.id} appears more than once")
+            items_seen.add(item.id)
+            points = score.get("points")
+            if points is not None and not (_number(points) and 0 <= points <= item.max_points):
+                error(i, sub_id, f"points for {item.label!r} must be between 0 and {item.max_points:g}")
+            if score.get("comment") is not None and not isinstance(score["comment"], str):
+                error(i, sub_id, "rubric comment must be a string")
+    return errors
+
+
+def apply_grades(assignment, grades, grader_id=None):
+    """Validate and save a batch of grades for ``assignment``; returns the number saved."""
+    if not isinstance(grades, list) or not grades:
+        raise GradingError([{"index": None, "submission_id": None, "error": "grades must be a non-empty list"}])
+    if len(grades) > MAX_BATCH:
+        raise GradingError([{"index": None, "submission_id": None, "error": f"at most {MAX_BATCH} grades per batch"}])
+
+    ids = [g.get("submission_id") for g in grades if isinstance(g, dict)]
+    ids = [i for i in ids if isinstance(i, int) and not isinstance(i, bool)]
+    submissions = {
+        s.id: s
+        for s in Submission.query.filter(
+            Submission.assignment_id == assignment.id, Submission.id.in_(ids)
+        )
+    }
+    rubric_items = {r.id: r for r in RubricItem.query.filter_by(assignment_id=assignment.id)}
+
+    errors = _validate(assignment.id, grades, submissions, rubric_items)
+    if errors:
+        raise GradingError(errors)
+
+    # Current rubric rows: {submission_id: {rubric_item_id: (points, comment)}}
+    existing = {sub_id: {} for sub_id in submissions}
+    rows = db.session.execute(
+        db.select(
+            SubmissionRubricScore.submission_id,
+            SubmissionRubricScore.rubric_item_id,
+            SubmissionRubricScore.points,
+            SubmissionRubricScore.comment,
+        ).where(SubmissionRubricScore.submission_id.in_(submissions))
+    )
+    for sub_id, item_id, points, comment in rows:
+        existing[sub_id][item_id] = (points, comment)
+
+    upserts = []
+    now = datetime.utcnow()
+    for entry in grades:
+        submission = submissions[entry["submission_id"]]
+        scores = existing[submission.id]
+        rubric = entry.get("rubric") or []
+        for score in rubric:
+            item_id = score["rubric_item_id"]
+            old_points, old_comment = scores.get(item_id, (None, None))
+            scores[item_id] = (score.get("points", old_points), score.get("comment", old_comment))
+            upserts.append({
+                "submission_id": submission.id,
+                "rubric_item_id": item_id,
+                "points": scores[item_id][0],
+                "comment": scores[item_id][1],
+            })
+
+        # Comment-only edits leave the score, and when it was graded, alone
+        graded = True
+        if entry.get("total_score") is not None:
+            submission.total_score = float(entry["total_score"])
+        elif any("points" in score for score in rubric):
+            submission.total_score = float(sum(points or 0 for points, _c in scores.values()))
+        else:
+            graded = False
+        if "general_comment" in entry:
+            submission.general_comment = entry["general_comment"]
+        if graded:
+            submission.graded_at = now
+            submission.graded_by_id = grader_id
+
+    if upserts:
+        stmt = dialect_insert(SubmissionRubricScore)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["submission_id", "rubric_item_id"],
+            set_={"points": stmt.excluded.points, "comment": stmt.excluded.comment},
+        )
+        db.session.execute(stmt, upserts)
+        search.refresh_rubric_comments({row["submission_id"] for row in upserts})
+
+    db.session.commit()
+    return len(grades)
@@ -0,0 +1,193 @@
+"""
+In-process background jobs backed by the ``job`` table.
+
+Routes call ``enqueue()`` inside their own transaction, so a job exists
+exactly when the upload it refers to was committed. Worker threads (started
+lazily on the first request, or run standalone with ``flask jobs work``)
+claim queued jobs one at a time with a conditional UPDATE, so several
+workers or gunicorn processes can share the table safely. Jobs left
+``running`` by a crashed process are re-queued after JOB_STALE_AFTER
+seconds, and failures are retried with backoff up to JOB_MAX_ATTEMPTS.
+"""
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from .models import db, Job
+
+log = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+# Set whenever a transaction that enqueued jobs commits, to wake idle workers
+_wakeup = threading.Event()
+_workers = []
+_workers_lock = threading.Lock()
+
+
+def job_handler(kind):
+    """Register ``func(**payload) -> JSON-able result`` as the handler for ``kind``."""
+    def decorator(func):
+        HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def enqueue(kind, submission_id=None, **payload):
+    """Add a job to the current session; it becomes visible when the caller commits."""
+    if kind not in HANDLERS:
+        raise ValueError(f"No handler registered for job kind {kind!r}")
+    job = Job(kind=kind, payload=json.dumps(payload), submission_id=submission_id)
+    db.session.add(job)
+    db.session.info["enqueued_jobs"] = True
+    return job
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_workers(session):
+    if session.info.pop("enqueued_jobs", False):
+        _wakeup.set()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_enqueued(session):
+    session.info.pop("enqueued_jobs", None)
+
+
+def claim_next():
+    """Atomically move the oldest runnable job to 'running' and return it, or None."""
+    now = datetime.utcnow()
+    while True:
+        job_id = db.session.scalar(
+            select(Job.id)
+            .where(Job.status == "queued", Job.run_after <= now)
+            .order_by(Job.id)
+            .limit(1)
+        )
+        if job_id is None:
+            db.session.rollback()
+            return None
+        claimed = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == "queued")
+            .values(status="running", started_at=now, attempts=Job.attempts + 1)
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            return db.session.get(Job, job_id)
+        # Another worker got it first; try the next one
+
+
+def run_job(job):
+    """Run a claimed job and record its outcome."""
+    handler = HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job kind {job.kind!r}")
+        result = handler(**json.loads(job.payload or "{}"))
+    except Exception as exc:
+        db.session.rollback()
+        log.exception("Job %s (%s) failed", job.id, job.kind)
+        max_attempts = current_app.config.get("JOB_MAX_ATTEMPTS", 3)
+        job.error = f"{type(exc).__name__}: {exc}"
+        if job.attempts >= max_attempts or handler is None:
+            job.status = "failed"
+            job.finished_at = datetime.utcnow()
+        else:
+            job.status = "queued"
+            job.run_after = datetime.utcnow() + timedelta(seconds=2 ** job.attempts)
+    else:
+        job.status = "done"
+        job.result = json.dumps(result)
+        job.error = None
+        job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return job
+
+
+def run_pending(limit=None):
+    """Run queued jobs in this thread until none are left (or ``limit`` ran). Returns the count."""
+    count = 0
+    while limit is None or count < limit:
+        job = claim_next()
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
+
+
+def requeue_stale(stale_after):
+    """Put jobs stuck in 'running' (their worker died) back in the queue."""
+    cutoff = datetime.utcnow() - timedelta(seconds=stale_after)
+    count = db.session.execute(
+        update(Job)
+        .where(Job.status == "running", Job.started_at < cutoff)
+        .values(status="queued", run_after=datetime.utcnow())
+    ).rowcount
+    db.session.commit()
+    return count
+
+
+def status_counts():
+    rows = db.session.execute(select(Job.status, db.func.count()).group_by(Job.status))
+    return dict(rows.all())
+
+
+class JobWorker(threading.Thread):
+    def __init__(self, app, poll_interval=2.0):
+        super().__init__(name="job-worker", daemon=True)
+        self.app = app
+        self.poll_interval = poll_interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        with self.app.app_context():
+            requeue_stale(self.app.config.get("JOB_STALE_AFTER", 600))
+            while not self._stop_event.is_set():
+                _wakeup.clear()
+                try:
+                    ran = run_pending(limit=10)
+                except Exception:
+                    log.exception("Job worker loop error")
+                    db.session.rollback()
+                    ran = 0
+                finally:
+                    db.session.remove()
+                if not ran:
+                    _wakeup.wait(self.poll_interval)
+
+    def stop(self):
+        self._stop_event.set()
+        _wakeup.set()
+
+
+def start_workers(app):
+    """Start JOB_WORKER_THREADS worker threads for this process (once)."""
+    wanted = app.config.get("JOB_WORKER_THREADS", 1)
+    # Threads do not survive fork(), so a forked child sees them as dead
+    if sum(w.is_alive() for w in _workers) >= wanted:
+        return
+    with _workers_lock:
+        _workers[:] = [w for w in _workers if w.is_alive()]
+        while len(_workers) < wanted:
+            worker = JobWorker(app, app.config.get("JOB_POLL_INTERVAL", 2.0))
+            worker.start()
+            _workers.append(worker)
+
+
+def init_app(app):
+    # Register the built-in handlers
+    from . import tasks  # noqa: F401
+
+    @app.before_request
+    def _ensure_workers():
+        # Started on first request rather than in create_app so forked
+        # servers get threads in each child; tests run jobs explicitly.
+        if app.config.get("JOB_WORKER_THREADS", 1) > 0 and not app.testing:
+            start_workers(app)
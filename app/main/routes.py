@@ -1,4 +1,3 @@
-import os
 from datetime import datetime
 
 from flask import (
@@ -8,9 +7,11 @@ from flask import (
     url_for,
     request,
     flash,
-    current_app,
-    send_from_directory,
     abort,
+    current_app,
+    jsonify,
+    Response,
+    stream_with_context,
 )
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
@@ -21,13 +22,31 @@ from ..models import (
     Assignment,
     Submission,
     RubricItem,
-    Enrollment,
+    Job,
+)
+from ..uploads import save_upload, UploadTooLarge
+from ..jobs import enqueue
+from ..grading import apply_grades, GradingError
+from ..serving import send_upload
+from ..routing import read_only
+from .. import previews, pubsub, resumable, search
+from ..fragment_cache import fragment_cache
+from ..stats import stats_for_course
+from ..queries import (
+    enrolled_courses,
+    first_enrolled_course_id,
+    student_assignment_rows,
+    submissions_page,
+    InvalidCursor,
+    SUBMISSION_STATUSES,
 )
 from ..forms import (
     AssignmentForm,
     AssignmentFileForm,
     SubmissionUploadForm,
     GradeForm,
+    RosterImportForm,
+    GradedZipForm,
 )
 
 main_bp = Blueprint("main", __name__, template_folder="../templates")
@@ -42,6 +61,7 @@ def index():
 
 @main_bp.route("/dashboard")
 @login_required
+@read_only
 def dashboard():
     """
     Shared entry point.
@@ -49,58 +69,85 @@ def dashboard():
     - Students: see enrolled courses + assignments and their submission status.
     """
 
+    # The course list and assignment table come from the fragment cache;
+    # only the selected course itself is loaded on a cache hit.
+    selected_course_id = request.args.get("course_id", type=int)
+
     # INSTRUCTOR VIEW
     if current_user.role == "instructor":
-        courses = Course.query.order_by(Course.code).all()
-        selected_course_id = request.args.get("course_id", type=int)
-
-        if courses and not selected_course_id:
-            selected_course_id = courses[0].id
-
-        selected_course = (
-            Course.query.get(selected_course_id) if selected_course_id else None
-        )
-
-        assignments = (
-            Assignment.query.filter_by(course_id=selected_course.id)
-            .order_by(Assignment.due_date)
-            .all()
-            if selected_course
-            else []
+        if not selected_course_id:
+            selected_course_id = (
+                db.session.query(Course.id).order_by(Course.code).limit(1).scalar()
+            )
+        selected_course = db.session.get(Course, selected_course_id) if selected_course_id else None
+
+        course_list_html = fragment_cache.render(
+            "course_list", ["courses"], ["instructor", selected_course_id],
+            lambda: render_template(
+                "main/_course_list.html",
+                courses=Course.query.order_by(Course.code).all(),
+                selected_course=selected_course,
+                empty_message="No courses yet.",
+            ),
         )
+        assignments_html = None
+        if selected_course:
+            course_id = selected_course.id
+            assignments_html = fragment_cache.render(
+                "instructor_assignments",
+                [f"course:{course_id}", f"course:{course_id}:submissions"],
+                [course_id],
+                lambda: render_template(
+                    "main/_instructor_assignments.html",
+                    assignments=Assignment.query.filter_by(course_id=course_id)
+                    .order_by(Assignment.due_date)
+                    .all(),
+                    stats=stats_for_course(course_id),
+                ),
+            )
 
         return render_template(
             "main/dashboard_instructor.html",
-            courses=courses,
             selected_course=selected_course,
-            assignments=assignments,
+            course_list_html=course_list_html,
+            assignments_html=assignments_html,
         )
 
     # STUDENT VIEW
-    enrollments = Enrollment.query.filter_by(user_id=current_user.id).all()
-    courses = [enroll.course for enroll in enrollments]
-
-    selected_course_id = request.args.get("course_id", type=int)
-    if courses and not selected_course_id:
-        selected_course_id = courses[0].id
-
-    selected_course = (
-        Course.query.get(selected_course_id) if selected_course_id else None
+    user_id = current_user.id
+    if not selected_course_id:
+        selected_course_id = first_enrolled_course_id(user_id)
+    selected_course = db.session.get(Course, selected_course_id) if selected_course_id else None
+
+    course_list_html = fragment_cache.render(
+        "course_list", ["courses", f"user:{user_id}:courses"], ["student", user_id, selected_course_id],
+        lambda: render_template(
+            "main/_course_list.html",
+            courses=enrolled_courses(user_id),
+            selected_course=selected_course,
+            empty_message="You are not enrolled in any courses yet.",
+        ),
     )
-
-    assignments = []
+    assignments_html = None
     if selected_course:
-        assignments = (
-            Assignment.query.filter_by(course_id=selected_course.id)
-            .order_by(Assignment.due_date)
-            .all()
+        course_id = selected_course.id
+        # (assignment, my_submission) pairs, fetched in one joined query
+        assignments_html = fragment_cache.render(
+            "student_assignments",
+            ["courses", f"course:{course_id}", f"course:{course_id}:user:{user_id}"],
+            [course_id, user_id],
+            lambda: render_template(
+                "main/_student_assignments.html",
+                selected_course=selected_course,
+                assignment_rows=student_assignment_rows(course_id, user_id),
+            ),
         )
 
     return render_template(
         "main/dashboard_student.html",
-        courses=courses,
         selected_course=selected_course,
-        assignments=assignments,
+        course_list_html=course_list_html,
+        assignments_html=assignments_html,
     )
 
 
@@ -126,6 +173,72 @@ def create_assignment(course_id):
     return render_template("main/assignment_form.html", form=form, course=course)
 
 
+@main_bp.route("/courses/<int:course_id>/roster", methods=["GET", "POST"])
+@login_required
+def import_roster(course_id):
+    """
+    Instructor bulk-imports users from a CSV and enrolls them in this course
+    (or the course named in each row).
+    """
+    if current_user.role != "instructor":
+        abort(403)
+
+    # Imported here so the CSV/process-pool machinery stays off the startup path
+    from ..roster import import_roster_bytes, web_pool, RosterError
+
+    course = Course.query.get_or_404(course_id)
+    form = RosterImportForm()
+    if form.validate_on_submit():
+        try:
+            result = import_roster_bytes(
+                form.roster_file.data.read(),
+                max_rows=current_app.config["ROSTER_WEB_MAX_ROWS"],
+                default_password=form.default_password.data or None,
+                default_course=course,
+                workers=0,
+                pool=web_pool(),
+            )
+        except (RosterError, UnicodeDecodeError) as exc:
+            flash(f"Could not import roster: {exc}", "warning")
+        else:
+            flash(
+                f"Imported {result.rows} rows: {result.users_created} new users, "
+                f"{result.enrollments_created} new enrollments in {result.seconds:.1f}s.",
+                "success",
+            )
+            if result.skipped:
+                flash(
+                    f"Skipped {len(result.skipped)} rows (first: line "
+                    f"{result.skipped[0][0]}, {result.skipped[0][1]}).",
+                    "warning",
+                )
+            return redirect(url_for("main.dashboard", course_id=course.id))
+    return render_template("main/roster_import.html", form=form, course=course)
+
+
+@main_bp.route("/courses/<int:course_id>/gradebook.csv")
+@login_required
+@read_only
+def export_gradebook(course_id):
+    """
+    Instructor downloads every enrolled student's scores for a course as CSV.
+    Add ?rubric=1 for per-rubric-item columns. Streamed row by row.
+    """
+    if current_user.role != "instructor":
+        abort(403)
+
+    from ..gradebook import iter_gradebook_csv
+
+    course = Course.query.get_or_404(course_id)
+    include_rubric = request.args.get("rubric", type=int) == 1
+    filename = secure_filename(f"gradebook_{course.code}.csv") or "gradebook.csv"
+    return Response(
+        stream_with_context(iter_gradebook_csv(course.id, include_rubric)),
+        mimetype="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @main_bp.route("/assignments/<int:assignment_id>/edit", methods=["GET", "POST"])
 @login_required
 def edit_assignment(assignment_id):
@@ -161,15 +274,8 @@ def assign_file(assignment_id):
     form = AssignmentFileForm()
 
     if form.validate_on_submit():
-        file = form.assignment_file.data
-        filename = secure_filename(f"assignment_{assignment.id}_{file.filename}")
-
-        upload_folder = str(current_app.config["UPLOAD_FOLDER"])
-        os.makedirs(upload_folder, exist_ok=True)
-        filepath = os.path.join(upload_folder, filename)
-        file.save(filepath)
-
-        assignment.prompt_file_path = filename
+        assignment.prompt_file_path = save_upload(form.assignment_file.data).filename
+        enqueue("inspect_pdf", path=assignment.prompt_file_path)
         db.session.commit()
 
         flash("Assignment file uploaded and assigned.", "success")
@@ -199,26 +305,8 @@ def submit_assignment(assignment_id):
 
     form = SubmissionUploadForm()
     if form.validate_on_submit():
-        file = form.student_file.data
-        filename = secure_filename(f"submission_{assignment.id}_{current_user.id}_{file.filename}")
-
-        upload_folder = str(current_app.config["UPLOAD_FOLDER"])
-        os.makedirs(upload_folder, exist_ok=True)
-        filepath = os.path.join(upload_folder, filename)
-        file.save(filepath)
-
-        if submission is None:
-            submission = Submission(
-                assignment=assignment,
-                student=current_user,
-                student_file_path=filename,
-                submitted_at=datetime.utcnow(),
-            )
-            db.session.add(submission)
-        else:
-            submission.student_file_path = filename
-            submission.submitted_at = datetime.utcnow()
-
+        filename = save_upload(form.student_file.data).filename
+        _record_submission(assignment, submission, filename)
         db.session.commit()
 
         flash("Submission uploaded successfully.", "success")
@@ -227,28 +315,290 @@ def submit_assignment(assignment_id):
     return render_template("main/submission_upload.html", assignment=assignment, form=form, submission=submission)
 
 
-@main_bp.route("/assignments/<int:assignment_id>/submissions")
+def _record_submission(assignment, submission, filename):
+    """
+    Point the current student's submission (created if ``submission`` is
+    None) at an uploaded file and queue its checks. The caller commits.
+    """
+    if submission is None:
+        submission = Submission(
+            assignment=assignment,
+            student_id=current_user.id,
+            student_file_path=filename,
+            submitted_at=datetime.utcnow(),
+        )
+        db.session.add(submission)
+    else:
+        submission.student_file_path = filename
+        submission.submitted_at = datetime.utcnow()
+
+    db.session.flush()  # get submission.id for the job
+    enqueue("inspect_pdf", submission_id=submission.id, path=filename)
+    return submission
+
+
+def _upload_session_json(session):
+    chunks = resumable.received(session)
+    return {
+        "upload_id": session.id,
+        "assignment_id": session.assignment_id,
+        "size": session.size,
+        "chunk_size": session.chunk_size,
+        "chunk_count": session.chunk_count,
+        "received": chunks,
+        "received_bytes": sum(session.chunk_length(i) for i in chunks),
+        "status": session.status,
+        "expires_at": session.expires_at.isoformat() + "Z",
+    }
+
+
+def _upload_session_or_404(upload_id):
+    session = resumable.get(upload_id, current_user.id)
+    if session is None:
+        abort(404)
+    return session
+
+
+def _upload_session_error(exc):
+    return jsonify(error=str(exc), **exc.details), exc.status
+
+
+@main_bp.route("/assignments/<int:assignment_id>/upload-sessions", methods=["POST"])
 @login_required
-def list_submissions(assignment_id):
+def create_upload_session(assignment_id):
+    """
+    Start a resumable upload of a submission PDF (see app/resumable.py).
+    JSON body: {"size": bytes, "sha256": optional hex digest, "filename": optional}.
+    """
+    if current_user.role != "student":
+        abort(403)
+
+    assignment = Assignment.query.get_or_404(assignment_id)
+    data = request.get_json(silent=True)
+    data = data if isinstance(data, dict) else {}
+    try:
+        session = resumable.create(
+            current_user.id, assignment.id, data.get("size"), filename=data.get("filename"), sha256=data.get("sha256")
+        )
+    except resumable.UploadSessionError as exc:
+        db.session.rollback()
+        return _upload_session_error(exc)
+    db.session.commit()
+    return jsonify(_upload_session_json(session)), 201
+
+
+@main_bp.route("/upload-sessions/<upload_id>", methods=["GET"])
+@login_required
+def upload_session_status(upload_id):
+    """Which chunks have arrived, so a client can resume after a dropped connection."""
+    return jsonify(_upload_session_json(_upload_session_or_404(upload_id)))
+
+
+@main_bp.route("/upload-sessions/<upload_id>/chunks/<int:index>", methods=["PUT"])
+@login_required
+def upload_chunk(upload_id, index):
+    """Store one chunk (raw request body). Chunks may be sent in any order, in parallel, or again."""
+    session = _upload_session_or_404(upload_id)
+    try:
+        length = resumable.write_chunk(session, index, request.stream)
+    except resumable.UploadSessionError as exc:
+        return _upload_session_error(exc)
+    return jsonify(index=index, size=length)
+
+
+@main_bp.route("/upload-sessions/<upload_id>/complete", methods=["POST"])
+@login_required
+def complete_upload_session(upload_id):
     """
-    Instructor view: list all student submissions for an assignment.
+    Assemble the chunks, verify the checksum (JSON {"sha256": ...} unless
+    given at the start) and attach the file as the student's submission.
     """
+    session = _upload_session_or_404(upload_id)
+    assignment = db.session.get(Assignment, session.assignment_id)
+    if assignment is None:
+        resumable.discard(session)
+        db.session.commit()
+        return jsonify(error="the assignment no longer exists"), 410
+    data = request.get_json(silent=True)
+    try:
+        stored = resumable.finalize(session, (data or {}).get("sha256") if isinstance(data, dict) else None)
+    except resumable.UploadSessionError as exc:
+        return _upload_session_error(exc)
+
+    try:
+        submission = Submission.query.filter_by(assignment_id=assignment.id, student_id=current_user.id).first()
+        submission = _record_submission(assignment, submission, stored.filename)
+        resumable.discard(session)
+        db.session.commit()
+    except Exception:
+        # Reopen the session (its chunks are still there) so the client can retry
+        db.session.rollback()
+        resumable.release(upload_id)
+        raise
+    return jsonify(submission_id=submission.id, size=stored.size, sha256=stored.sha256)
+
+
+@main_bp.route("/upload-sessions/<upload_id>", methods=["DELETE"])
+@login_required
+def cancel_upload_session(upload_id):
+    resumable.discard(_upload_session_or_404(upload_id))
+    db.session.commit()
+    return "", 204
+
+
+def _submissions_page_args(assignment_id):
+    """Shared paging/filter handling for the HTML and JSON submission lists."""
     if current_user.role != "instructor":
         abort(403)
 
     assignment = Assignment.query.get_or_404(assignment_id)
-    submissions = (
-        Submission.query.filter_by(assignment_id=assignment.id)
-        .order_by(Submission.submitted_at.desc().nullslast())
-        .all()
+    status = request.args.get("status") or None
+    if status and status not in SUBMISSION_STATUSES:
+        abort(400)
+    per_page = min(
+        request.args.get("per_page", current_app.config["SUBMISSIONS_PER_PAGE"], type=int),
+        current_app.config["SUBMISSIONS_MAX_PER_PAGE"],
     )
+    try:
+        submissions, next_cursor = submissions_page(
+            assignment.id,
+            status=status,
+            cursor=request.args.get("after"),
+            per_page=max(per_page, 1),
+        )
+    except InvalidCursor:
+        abort(400)
+    return assignment, status, submissions, next_cursor
+
+
+@main_bp.route("/assignments/<int:assignment_id>/submissions")
+@login_required
+@read_only
+def list_submissions(assignment_id):
+    """
+    Instructor view: list student submissions for an assignment, one page at a time.
+    Optional ?status=not_submitted|submitted|graded and ?after=<cursor>.
+    """
+    assignment, status, submissions, next_cursor = _submissions_page_args(assignment_id)
     return render_template(
         "main/submissions_list.html",
         assignment=assignment,
         submissions=submissions,
+        status=status,
+        statuses=SUBMISSION_STATUSES,
+        next_cursor=next_cursor,
+        paged=bool(request.args.get("after")),
+        zip_form=GradedZipForm(),
+    )
+
+
+@main_bp.route("/assignments/<int:assignment_id>/submissions.json")
+@login_required
+@read_only
+def list_submissions_json(assignment_id):
+    """JSON variant of list_submissions (same filters and cursor)."""
+    assignment, status, submissions, next_cursor = _submissions_page_args(assignment_id)
+    return jsonify(
+        assignment_id=assignment.id,
+        status=status,
+        next_cursor=next_cursor,
+        submissions=[
+            {
+                "id": sub.id,
+                "student_id": sub.student_id,
+                "student_email": sub.student.email,
+                "submitted_at": sub.submitted_at.isoformat() if sub.submitted_at else None,
+                "graded_at": sub.graded_at.isoformat() if sub.graded_at else None,
+                "total_score": sub.total_score,
+                "student_file_path": sub.student_file_path,
+                "graded_file_path": sub.graded_file_path,
+            }
+            for sub in submissions
+        ],
+    )
+
+
+@main_bp.route("/assignments/<int:assignment_id>/submissions.zip")
+@login_required
+def download_submissions_zip(assignment_id):
+    """
+    Instructor downloads every submitted PDF for an assignment as one ZIP.
+    Add ?graded=1 to include the graded PDFs. Streamed file by file.
+    """
+    if current_user.role != "instructor":
+        abort(403)
+
+    from ..archives import iter_submissions_zip
+
+    assignment = Assignment.query.get_or_404(assignment_id)
+    include_graded = request.args.get("graded", type=int) == 1
+    filename = secure_filename(f"{assignment.course.code}_{assignment.title}.zip") or "submissions.zip"
+    return Response(
+        stream_with_context(iter_submissions_zip(assignment.id, include_graded)),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
 
+@main_bp.route("/assignments/<int:assignment_id>/graded-zip", methods=["POST"])
+@login_required
+def upload_graded_zip(assignment_id):
+    """
+    Instructor uploads a ZIP of graded PDFs named <student email>.pdf; each one
+    becomes the graded file of that student's submission.
+    """
+    if current_user.role != "instructor":
+        abort(403)
+
+    from zipfile import BadZipFile
+    from ..archives import attach_graded_zip
+
+    assignment = Assignment.query.get_or_404(assignment_id)
+    # The archive may hold many PDFs; each is still checked against MAX_CONTENT_LENGTH
+    request.max_content_length = current_app.config["GRADED_ZIP_MAX_LENGTH"]
+    form = GradedZipForm()
+    if not form.validate_on_submit():
+        for errors in form.errors.values():
+            flash(errors[0], "warning")
+        return redirect(url_for("main.list_submissions", assignment_id=assignment.id))
+
+    try:
+        result = attach_graded_zip(assignment, form.graded_zip.data.stream, grader_id=current_user.id)
+    except BadZipFile as exc:
+        db.session.rollback()
+        flash(f"Could not read ZIP: {exc}", "warning")
+    except UploadTooLarge:
+        # PDFs already stored from earlier entries are unreferenced after the
+        # rollback; "flask blobs gc" collects them (they may be shared, so not here)
+        db.session.rollback()
+        flash("Nothing was attached: a PDF in the ZIP is larger than the upload limit.", "warning")
+    else:
+        db.session.commit()
+        flash(f"Attached {len(result.attached)} graded PDFs.", "success")
+        if result.unmatched:
+            flash(
+                f"Skipped {len(result.unmatched)} files that match no submission "
+                f"(first: {result.unmatched[0]}).",
+                "warning",
+            )
+    return redirect(url_for("main.list_submissions", assignment_id=assignment.id))
+
+
+@main_bp.route("/assignments/<int:assignment_id>/rubric-analytics.json")
+@login_required
+@read_only
+def rubric_analytics_json(assignment_id):
+    """Per-rubric-item statistics and grader consistency for an assignment."""
+    if current_user.role != "instructor":
+        abort(403)
+
+    # NumPy is only needed here, so keep it off the import path of every request
+    from ..analytics import rubric_analytics
+
+    assignment = Assignment.query.get_or_404(assignment_id)
+    return jsonify(rubric_analytics(assignment.id))
+
+
 @main_bp.route(
     "/assignments/<int:assignment_id>/grade/<int:submission_id>",
     methods=["GET", "POST"],
@@ -276,17 +626,12 @@ def grade_submission(assignment_id, submission_id):
         submission.total_score = form.total_score.data
         submission.general_comment = form.general_comment.data
         submission.graded_at = datetime.utcnow()
+        submission.graded_by_id = current_user.id
 
         graded_file = form.graded_file.data
         if graded_file:
-            filename = secure_filename(
-                f"graded_{assignment.id}_{submission.student_id}_{graded_file.filename}"
-            )
-            upload_folder = str(current_app.config["UPLOAD_FOLDER"])
-            os.makedirs(upload_folder, exist_ok=True)
-            filepath = os.path.join(upload_folder, filename)
-            graded_file.save(filepath)
-            submission.graded_file_path = filename
+            submission.graded_file_path = save_upload(graded_file).filename
+            enqueue("inspect_pdf", submission_id=submission.id, path=submission.graded_file_path)
 
         db.session.commit()
         flash("Grade and feedback saved.", "success")
@@ -300,11 +645,106 @@ def grade_submission(assignment_id, submission_id):
         submission=submission,
         rubric_items=rubric_items,
         form=form,
+        preview=previews.preview_info(submission.student_file_path),
+    )
+
+
+@main_bp.route("/assignments/<int:assignment_id>/grades", methods=["POST"])
+@login_required
+def batch_grade(assignment_id):
+    """
+    Grade many submissions in one request (JSON body {"grades": [...]},
+    format in app/grading.py). All-or-nothing: any invalid entry rejects
+    the batch with a 400 listing every error.
+    """
+    if current_user.role != "instructor":
+        abort(403)
+
+    assignment = Assignment.query.get_or_404(assignment_id)
+    data = request.get_json(silent=True)
+    grades = data.get("grades") if isinstance(data, dict) else None
+    try:
+        graded = apply_grades(assignment, grades, grader_id=current_user.id)
+    except GradingError as exc:
+        db.session.rollback()
+        return jsonify(errors=exc.errors), 400
+    return jsonify(assignment_id=assignment.id, graded=graded)
+
+
+def _search_args():
+    """Shared query handling for the HTML and JSON search."""
+    query = request.args.get("q", "").strip()
+    course_id = request.args.get("course_id", type=int)
+    if course_id is not None and course_id < 1:
+        abort(400)
+    kind = request.args.get("kind") or None
+    if kind and kind not in search.KINDS:
+        abort(400)
+    # Past the last page is just empty; clamping keeps OFFSET within SQLite's range
+    page = min(max(request.args.get("page", 1, type=int), 1), current_app.config["SEARCH_MAX_PAGE"])
+    per_page = current_app.config["SEARCH_RESULTS_PER_PAGE"]
+    hits = search.search(
+        query,
+        current_user,
+        course_id=course_id,
+        kinds=[kind] if kind else None,
+        limit=per_page + 1,
+        offset=(page - 1) * per_page,
+    )
+    return query, course_id, kind, page, hits[:per_page], len(hits) > per_page
+
+
+@main_bp.route("/search")
+@login_required
+@read_only
+def search_page():
+    """
+    Full-text search over assignments, feedback and PDF text.
+    Students only see their courses and their own submissions.
+    """
+    query, course_id, kind, page, hits, has_more = _search_args()
+    return render_template(
+        "main/search.html",
+        query=query,
+        course_id=course_id,
+        kind=kind,
+        kinds=list(search.KINDS),
+        page=page,
+        hits=hits,
+        has_more=has_more,
+    )
+
+
+@main_bp.route("/search.json")
+@login_required
+@read_only
+def search_json():
+    query, course_id, kind, page, hits, has_more = _search_args()
+    return jsonify(
+        query=query,
+        page=page,
+        has_more=has_more,
+        results=[
+            {
+                "kind": hit.kind,
+                "course_id": hit.course_id,
+                "course_code": hit.course_code,
+                "assignment_id": hit.assignment_id,
+                "assignment_title": hit.assignment_title,
+                "submission_id": hit.submission_id,
+                "student_email": hit.student_email,
+                "title": hit.title,
+                "snippet": str(hit.snippet),
+                "rank": hit.rank,
+            }
+            for hit in hits
+        ],
     )
 
 
 @main_bp.route("/submissions/<int:submission_id>")
 @login_required
+@read_only
 def view_submission(submission_id):
     """
     Student view of their submission and feedback.
@@ -313,20 +753,70 @@ def view_submission(submission_id):
     submission = Submission.query.get_or_404(submission_id)
     assignment = submission.assignment
     rubric_items = RubricItem.query.filter_by(assignment_id=assignment.id).all()
+    jobs = Job.query.filter_by(submission_id=submission.id).order_by(Job.id.desc()).all()
     return render_template(
         "main/submission_detail.html",
         submission=submission,
         assignment=assignment,
         rubric_items=rubric_items,
+        jobs=jobs,
+    )
+
+
+@main_bp.route("/events")
+@login_required
+def status_events():
+    """
+    Server-sent events for submission status changes (see app/pubsub.py).
+    Students get their own submissions, instructors every submission in
+    ?course_id (or in all courses).
+    """
+    if not current_app.config["SSE_ENABLED"]:
+        return "", 204  # tells EventSource not to reconnect
+    course_id = request.args.get("course_id", type=int)
+    if current_user.role == "instructor":
+        course_ids = [course_id] if course_id else db.session.scalars(db.select(Course.id)).all()
+        channels = [f"course:{cid}" for cid in course_ids]
+    else:
+        channels = [f"user:{current_user.id}"]
+    subscription = pubsub.broker.subscribe(channels)
+    events = pubsub.stream(
+        subscription,
+        heartbeat=current_app.config["SSE_HEARTBEAT"],
+        max_age=current_app.config["SSE_MAX_AGE"],
+        course_id=course_id,
+    )
+    return Response(
+        events,
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
+@main_bp.route("/previews/<sha>/<int:page>-<size>.png")
+@login_required
+def preview_image(sha, page, size):
+    """Thumbnail or full-page image of an uploaded PDF, rendered on first request."""
+    if current_user.role != "instructor":
+        abort(403)
+    if not previews.is_valid_sha(sha) or size not in previews.SIZES:
+        abort(404)
+    meta = previews.read_meta(sha)
+    if meta is None or not 1 <= page <= meta["pages"] or not previews.has_source(sha):
+        abort(404)
+    rel_path = previews.render_page(sha, page, size)
+    if rel_path is None:
+        abort(404)
+    return send_upload(rel_path)
+
+
 @main_bp.route("/uploads/<path:filename>")
 @login_required
+@read_only
 def uploaded_file(filename):
     """
     Serve uploaded PDFs (assignment prompts, student submissions, graded PDFs).
     For a real app, you'd add more security checks.
+    The bytes are sent by the backend chosen in UPLOAD_SERVE_BACKEND.
     """
-    upload_folder = str(current_app.config["UPLOAD_FOLDER"])
-    return send_from_directory(upload_folder, filename)
\ No newline at end of file
+    return send_upload(filename)
\ No newline at end of file
@@ -0,0 +1,253 @@
+"""
+Minimal versioned schema migrations.
+
+Each migration is a (version, description, function) entry in MIGRATIONS.
+The current version is kept in a one-row ``schema_version`` table, and
+``upgrade()`` applies every migration newer than it, in order, each in
+its own transaction. An empty database is bootstrapped straight to the
+latest schema with ``create_all`` instead of replaying every step.
+
+The app itself never touches the schema at startup; run
+``flask --app app schema upgrade`` (or ``schema bootstrap``) when deploying.
+"""
+import json
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, Table, inspect, text
+
+from . import search  # noqa: F401  (adds the FTS table to create_all)
+from .models import db
+
+# Migration bodies are frozen: they spell out the schema and SQL as of their
+# version instead of reading the models or calling app code, which keep
+# changing after the migration has shipped.
+
+_v1 = MetaData()
+_v1_enrollment = Table("enrollment", _v1, Column("user_id", Integer), Column("course_id", Integer))
+_v1_assignment = Table("assignment", _v1, Column("course_id", Integer))
+_v1_submission = Table(
+    "submission", _v1,
+    Column("assignment_id", Integer), Column("student_id", Integer), Column("submitted_at", DateTime),
+)
+_v1_rubric_item = Table("rubric_item", _v1, Column("assignment_id", Integer))
+_v1_rubric_score = Table(
+    "submission_rubric_score", _v1, Column("submission_id", Integer), Column("rubric_item_id", Integer),
+)
+_V1_INDEXES = [
+    Index("ux_enrollment_user_course", _v1_enrollment.c.user_id, _v1_enrollment.c.course_id, unique=True),
+    Index("ix_enrollment_course_id", _v1_enrollment.c.course_id),
+    Index("ix_assignment_course_id", _v1_assignment.c.course_id),
+    Index("ux_submission_assignment_student", _v1_submission.c.assignment_id, _v1_submission.c.student_id,
+          unique=True),
+    Index("ix_submission_assignment_submitted_at", _v1_submission.c.assignment_id, _v1_submission.c.submitted_at),
+    Index("ix_submission_student_id", _v1_submission.c.student_id),
+    Index("ix_rubric_item_assignment_id", _v1_rubric_item.c.assignment_id),
+    Index("ux_submission_rubric_score_submission_item", _v1_rubric_score.c.submission_id,
+          _v1_rubric_score.c.rubric_item_id, unique=True),
+    Index("ix_submission_rubric_score_rubric_item_id", _v1_rubric_score.c.rubric_item_id),
+]
+
+
+def _hot_foreign_key_indexes(conn):
+    # The unique (assignment_id, student_id) index would fail on duplicates,
+    # so report them clearly instead of surfacing a bare IntegrityError.
+    dupes = conn.execute(text(
+        "SELECT assignment_id, student_id, COUNT(*) FROM submission "
+        "GROUP BY assignment_id, student_id HAVING COUNT(*) > 1"
+    )).fetchall()
+    if dupes:
+        raise RuntimeError(
+            f"{len(dupes)} student/assignment pairs have more than one submission; "
+            "resolve them before adding the unique index."
+        )
+    for index in _V1_INDEXES:
+        index.create(bind=conn, checkfirst=True)
+
+
+def _blob_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS blob ("
+        "id INTEGER NOT NULL, sha256 VARCHAR(64) NOT NULL, size INTEGER, ref_count INTEGER NOT NULL, "
+        "created_at DATETIME, PRIMARY KEY (id), UNIQUE (sha256))"
+    ))
+
+
+def _job_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS job ("
+        "id INTEGER NOT NULL, kind VARCHAR(64) NOT NULL, payload TEXT NOT NULL, status VARCHAR(16) NOT NULL, "
+        "attempts INTEGER NOT NULL, result TEXT, error TEXT, submission_id INTEGER, created_at DATETIME, "
+        "run_after DATETIME, started_at DATETIME, finished_at DATETIME, PRIMARY KEY (id), "
+        "FOREIGN KEY(submission_id) REFERENCES submission (id))"
+    ))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_job_status_run_after ON job (status, run_after)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_job_submission_id ON job (submission_id)"))
+
+
+def _assignment_stats_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS assignment_stats ("
+        "assignment_id INTEGER NOT NULL, submitted_count INTEGER NOT NULL, graded_count INTEGER NOT NULL, "
+        "score_sum FLOAT NOT NULL, score_sumsq FLOAT NOT NULL, score_min FLOAT, score_max FLOAT, "
+        "histogram TEXT NOT NULL, PRIMARY KEY (assignment_id), "
+        "FOREIGN KEY(assignment_id) REFERENCES assignment (id) ON DELETE CASCADE)"
+    ))
+    # Backfill: ten 10-point bins, the last one open-ended, negatives in the first
+    histograms = {}
+    for aid, index, count in conn.execute(text(
+        "SELECT assignment_id, CASE WHEN total_score < 0 THEN 0 WHEN total_score >= 90 THEN 9 "
+        "ELSE CAST(total_score / 10.0 AS INTEGER) END AS bin, COUNT(*) "
+        "FROM submission WHERE total_score IS NOT NULL GROUP BY assignment_id, bin"
+    )):
+        histograms.setdefault(aid, [0] * 10)[index] = count
+    conn.execute(text("DELETE FROM assignment_stats"))
+    rows = conn.execute(text(
+        "SELECT a.id, COUNT(s.student_file_path), COUNT(s.total_score), COALESCE(SUM(s.total_score), 0.0), "
+        "COALESCE(SUM(s.total_score * s.total_score), 0.0), MIN(s.total_score), MAX(s.total_score) "
+        "FROM assignment a LEFT JOIN submission s ON s.assignment_id = a.id GROUP BY a.id"
+    )).fetchall()
+    if rows:
+        conn.execute(
+            text(
+                "INSERT INTO assignment_stats (assignment_id, submitted_count, graded_count, score_sum, "
+                "score_sumsq, score_min, score_max, histogram) "
+                "VALUES (:aid, :submitted, :graded, :total, :sumsq, :lo, :hi, :histogram)"
+            ),
+            [
+                {"aid": aid, "submitted": submitted, "graded": graded, "total": float(total),
+                 "sumsq": float(sumsq), "lo": lo, "hi": hi,
+                 "histogram": json.dumps(histograms.get(aid, [0] * 10))}
+                for aid, submitted, graded, total, sumsq, lo, hi in rows
+            ],
+        )
+
+
+def _submission_grader_column(conn):
+    columns = {c["name"] for c in inspect(conn).get_columns("submission")}
+    if "graded_by_id" not in columns:
+        conn.execute(text('ALTER TABLE submission ADD COLUMN graded_by_id INTEGER REFERENCES "user" (id)'))
+
+
+def _search_index(conn):
+    conn.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+        "title, body, scope, kind UNINDEXED, course_id UNINDEXED, assignment_id UNINDEXED, "
+        "student_id UNINDEXED, ref_id UNINDEXED, tokenize='porter unicode61 remove_diacritics 2')"
+    ))
+    # Text documents only; PDF text is filled in by "flask search rebuild --pdfs"
+    # (slow) or new uploads. rowid = id * 8 + kind number, scope as in app/search.py.
+    conn.execute(text("DELETE FROM search_index WHERE rowid % 8 NOT IN (2, 4, 5)"))
+    insert = (
+        "INSERT INTO search_index (rowid, title, body, scope, kind, course_id, assignment_id, student_id, ref_id) "
+    )
+    conn.execute(text(
+        insert + "SELECT a.id * 8 + 1, a.title, coalesce(a.description, ''), "
+        "'c' || a.course_id || ' k1' || ' public', 'assignment', a.course_id, a.id, NULL, a.id "
+        "FROM assignment a"
+    ))
+    conn.execute(text(
+        insert + "SELECT s.id * 8 + 3, '', s.general_comment, "
+        "'c' || a.course_id || ' k3' || ' u' || s.student_id, 'comment', a.course_id, a.id, s.student_id, s.id "
+        "FROM submission s JOIN assignment a ON a.id = s.assignment_id "
+        "WHERE coalesce(s.general_comment, '') != ''"
+    ))
+    conn.execute(text(
+        insert + "SELECT r.id * 8 + 6, ri.label, r.comment, "
+        "'c' || a.course_id || ' k6' || ' u' || s.student_id, 'rubric_comment', a.course_id, a.id, "
+        "s.student_id, s.id "
+        "FROM submission_rubric_score r "
+        "JOIN rubric_item ri ON ri.id = r.rubric_item_id "
+        "JOIN submission s ON s.id = r.submission_id "
+        "JOIN assignment a ON a.id = s.assignment_id "
+        "WHERE coalesce(r.comment, '') != ''"
+    ))
+
+
+def _upload_session_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS upload_session ("
+        "id VARCHAR(32) NOT NULL, user_id INTEGER NOT NULL, assignment_id INTEGER NOT NULL, "
+        "filename VARCHAR(255), size INTEGER NOT NULL, chunk_size INTEGER NOT NULL, sha256 VARCHAR(64), "
+        "status VARCHAR(16) NOT NULL, created_at DATETIME, expires_at DATETIME NOT NULL, PRIMARY KEY (id), "
+        "FOREIGN KEY(user_id) REFERENCES user (id), FOREIGN KEY(assignment_id) REFERENCES assignment (id))"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_upload_session_expires_at ON upload_session (expires_at)"
+    ))
+
+
+def _upload_session_claimed_at(conn):
+    columns = {c["name"] for c in inspect(conn).get_columns("upload_session")}
+    if "claimed_at" not in columns:
+        conn.execute(text("ALTER TABLE upload_session ADD COLUMN claimed_at DATETIME"))
+
+
+MIGRATIONS = [
+    (1, "indexes on hot foreign keys", _hot_foreign_key_indexes),
+    (2, "content-addressed blob table", _blob_table),
+    (3, "background job table", _job_table),
+    (4, "assignment statistics table", _assignment_stats_table),
+    (5, "submission grader column", _submission_grader_column),
+    (6, "full-text search index", _search_index),
+    (7, "resumable upload session table", _upload_session_table),
+    (8, "upload session claim time", _upload_session_claimed_at),
+]
+
+
+def _ensure_version_table(conn):
+    conn.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+    if conn.execute(text("SELECT COUNT(*) FROM schema_version")).scalar() == 0:
+        conn.execute(text("INSERT INTO schema_version (version) VALUES (0)"))
+
+
+def current_version(engine=None):
+    engine = engine or db.engine
+    with engine.begin() as conn:
+        _ensure_version_table(conn)
+        return conn.execute(text("SELECT version FROM schema_version")).scalar()
+
+
+def latest_version():
+    return MIGRATIONS[-1][0]
+
+
+def _bootstrap_if_empty(engine, target):
+    """Create the full current schema on an empty database. Returns True if it did."""
+    if target is not None and target < latest_version():
+        return False
+    with engine.begin() as conn:
+        if inspect(conn).has_table("course"):
+            return False
+        db.metadata.create_all(conn)
+        _ensure_version_table(conn)
+        conn.execute(text("UPDATE schema_version SET version = :v"), {"v": latest_version()})
+    return True
+
+
+def upgrade(engine=None, target=None):
+    """Apply pending migrations up to ``target`` (default: latest). Returns applied versions."""
+    engine = engine or db.engine
+    if _bootstrap_if_empty(engine, target):
+        return [version for version, _, _ in MIGRATIONS]
+    applied = []
+    for version, _description, func in MIGRATIONS:
+        if target is not None and version > target:
+            break
+        with engine.begin() as conn:
+            _ensure_version_table(conn)
+            if conn.execute(text("SELECT version FROM schema_version")).scalar() >= version:
+                continue
+            func(conn)
+            conn.execute(text("UPDATE schema_version SET version = :v"), {"v": version})
+        applied.append(version)
+    return applied
+
+
+def seed_demo_course():
+    """Create the demo course on a database with no courses. Returns True if it did."""
+    from .models import Course
+
+    if db.session.query(Course.id).first() is not None:
+        return False
+    db.session.add(Course(code="CMPE 131-01", title="Demo Course"))
+    db.session.commit()
+    return True
@@ -1,8 +1,11 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+import json
 from datetime import datetime
 
-db = SQLAlchemy()
+from .routing import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 
 class User(db.Model, UserMixin):
@@ -14,7 +17,10 @@ class User(db.Model, UserMixin):
 
     # Relationships
     enrollments = db.relationship("Enrollment", back_populates="user", cascade="all, delete-orphan")
-    submissions = db.relationship("Submission", back_populates="student", cascade="all, delete-orphan")
+    submissions = db.relationship(
+        "Submission", back_populates="student", cascade="all, delete-orphan",
+        foreign_keys="Submission.student_id",
+    )
 
     def __repr__(self):
         return f"<User {self.email}>"
@@ -35,6 +41,11 @@ class Course(db.Model):
 
 class Enrollment(db.Model):
     """Bridge: which users belong to which courses (and as what role)."""
+    __table_args__ = (
+        db.Index("ux_enrollment_user_course", "user_id", "course_id", unique=True),
+        db.Index("ix_enrollment_course_id", "course_id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     course_id = db.Column(db.Integer, db.ForeignKey("course.id"), nullable=False)
@@ -47,7 +58,7 @@ class Enrollment(db.Model):
 class Assignment(db.Model):
     """Assignment within a course, optionally with an assigned (prompt) file."""
     id = db.Column(db.Integer, primary_key=True)
-    course_id = db.Column(db.Integer, db.ForeignKey("course.id"), nullable=False)
+    course_id = db.Column(db.Integer, db.ForeignKey("course.id"), nullable=False, index=True)
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text, nullable=True)
     due_date = db.Column(db.DateTime, nullable=True)
@@ -59,6 +70,7 @@ class Assignment(db.Model):
     course = db.relationship("Course", back_populates="assignments")
     submissions = db.relationship("Submission", back_populates="assignment", cascade="all, delete-orphan")
     rubric_items = db.relationship("RubricItem", back_populates="assignment", cascade="all, delete-orphan")
+    stats = db.relationship("AssignmentStats", uselist=False, cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<Assignment {self.title} ({self.course.code})>"
@@ -66,6 +78,13 @@ class Assignment(db.Model):
 
 class Submission(db.Model):
     """Student submission for an assignment."""
+    __table_args__ = (
+        # One submission per student per assignment; also serves lookups by assignment_id
+        db.Index("ux_submission_assignment_student", "assignment_id", "student_id", unique=True),
+        db.Index("ix_submission_assignment_submitted_at", "assignment_id", "submitted_at"),
+        db.Index("ix_submission_student_id", "student_id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     assignment_id = db.Column(db.Integer, db.ForeignKey("assignment.id"), nullable=False)
     student_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
@@ -73,6 +92,8 @@ class Submission(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     submitted_at = db.Column(db.DateTime, nullable=True)
     graded_at = db.Column(db.DateTime, nullable=True)
+    # Instructor/TA who last graded it (for grader consistency analytics)
+    graded_by_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
 
     total_score = db.Column(db.Float, nullable=True)
     general_comment = db.Column(db.Text, nullable=True)
@@ -88,14 +109,15 @@ class Submission(db.Model):
     graded_file_path = db.Column(db.String(512), nullable=True)
 
     assignment = db.relationship("Assignment", back_populates="submissions")
-    student = db.relationship("User", back_populates="submissions")
+    student = db.relationship("User", back_populates="submissions", foreign_keys=[student_id])
     rubric_scores = db.relationship("SubmissionRubricScore", back_populates="submission", cascade="all, delete-orphan")
+    jobs = db.relationship("Job", back_populates="submission", cascade="all, delete-orphan")
 
 
 class RubricItem(db.Model):
     """Single rubric line item for an assignment."""
     id = db.Column(db.Integer, primary_key=True)
-    assignment_id = db.Column(db.Integer, db.ForeignKey("assignment.id"), nullable=False)
+    assignment_id = db.Column(db.Integer, db.ForeignKey("assignment.id"), nullable=False, index=True)
     label = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text, nullable=True)
     max_points = db.Column(db.Float, nullable=False, default=1.0)
@@ -106,6 +128,11 @@ class RubricItem(db.Model):
 
 class SubmissionRubricScore(db.Model):
     """Score for a rubric item on a specific submission."""
+    __table_args__ = (
+        db.Index("ux_submission_rubric_score_submission_item", "submission_id", "rubric_item_id", unique=True),
+        db.Index("ix_submission_rubric_score_rubric_item_id", "rubric_item_id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     submission_id = db.Column(db.Integer, db.ForeignKey("submission.id"), nullable=False)
     rubric_item_id = db.Column(db.Integer, db.ForeignKey("rubric_item.id"), nullable=False)
@@ -113,4 +140,100 @@ class SubmissionRubricScore(db.Model):
     comment = db.Column(db.Text, nullable=True)
 
     submission = db.relationship("Submission", back_populates="rubric_scores")
-    rubric_item = db.relationship("RubricItem", back_populates="scores")
\ No newline at end of file
+    rubric_item = db.relationship("RubricItem", back_populates="scores")
+
+class AssignmentStats(db.Model):
+    """Running submission/score aggregates for one assignment (maintained by app/stats.py)."""
+    assignment_id = db.Column(
+        db.Integer, db.ForeignKey("assignment.id", ondelete="CASCADE"), primary_key=True
+    )
+    submitted_count = db.Column(db.Integer, nullable=False, default=0)
+    graded_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0.0)
+    score_sumsq = db.Column(db.Float, nullable=False, default=0.0)
+    score_min = db.Column(db.Float, nullable=True)
+    score_max = db.Column(db.Float, nullable=True)
+    histogram = db.Column(db.Text, nullable=False, default="[]")  # JSON list of bin counts
+
+    @property
+    def mean(self):
+        return self.score_sum / self.graded_count if self.graded_count else None
+
+    @property
+    def stddev(self):
+        if not self.graded_count:
+            return None
+        variance = self.score_sumsq / self.graded_count - self.mean ** 2
+        return max(variance, 0.0) ** 0.5
+
+    @property
+    def histogram_counts(self):
+        return json.loads(self.histogram or "[]")
+
+
+class Blob(db.Model):
+    """Content-addressed uploaded file, shared by every row that points at it."""
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), unique=True, nullable=False)
+    size = db.Column(db.Integer, nullable=True)
+    # Number of Assignment/Submission file columns referencing this blob
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class Job(db.Model):
+    """Background job (e.g. post-upload PDF processing), persisted so it survives restarts."""
+    __table_args__ = (
+        db.Index("ix_job_status_run_after", "status", "run_after"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(64), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default="{}")  # JSON kwargs for the handler
+    status = db.Column(db.String(16), nullable=False, default="queued")  # queued/running/done/failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    result = db.Column(db.Text, nullable=True)  # JSON returned by the handler
+    error = db.Column(db.Text, nullable=True)
+
+    # Optional link so the submission page can show processing status
+    submission_id = db.Column(db.Integer, db.ForeignKey("submission.id"), nullable=True, index=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    run_after = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    submission = db.relationship("Submission", back_populates="jobs")
+
+    @property
+    def result_data(self):
+        return json.loads(self.result) if self.result else None
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.kind} {self.status}>"
+
+
+class UploadSession(db.Model):
+    """Resumable upload in progress (see app/resumable.py); the chunks themselves live on disk."""
+    id = db.Column(db.String(32), primary_key=True)  # random token, also the chunk directory name
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    assignment_id = db.Column(db.Integer, db.ForeignKey("assignment.id"), nullable=False)
+    filename = db.Column(db.String(255), nullable=True)  # client's name, informational only
+    size = db.Column(db.Integer, nullable=False)
+    chunk_size = db.Column(db.Integer, nullable=False)
+    sha256 = db.Column(db.String(64), nullable=True)  # expected checksum, if given up front
+    status = db.Column(db.String(16), nullable=False, default="open")  # open/assembling
+    claimed_at = db.Column(db.DateTime, nullable=True)  # when finalize set "assembling"
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    @property
+    def chunk_count(self):
+        return max(1, -(-self.size // self.chunk_size))
+
+    def chunk_length(self, index):
+        """Expected byte length of chunk ``index`` (only the last one may be short)."""
+        return min(self.chunk_size, self.size - index * self.chunk_size)
+
+    def __repr__(self):
+        return f"<UploadSession {self.id} {self.status}>"
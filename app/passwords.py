@@ -0,0 +1,89 @@
+"""
+Password hashing off the request thread.
+
+Hashing and checking passwords is deliberately slow, so a burst of logins
+would otherwise keep request threads busy. ``password_hasher`` runs the
+work in a small process pool (PASSWORD_HASH_WORKERS processes, created
+lazily and re-created after fork) and caps how many hashes may be queued at
+once (PASSWORD_HASH_MAX_PENDING); beyond that ``HasherBusy`` is raised and
+the login view answers 503 instead of piling up.
+
+PASSWORD_HASH_METHOD is any werkzeug method string ("scrypt",
+"scrypt:65536:8:1", "pbkdf2:sha256:1000000", ...). Hashes made with other
+parameters still verify, and ``needs_rehash()`` tells the login view to
+upgrade them once the user has typed the right password.
+"""
+import atexit
+import os
+import threading
+from functools import lru_cache
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HasherBusy(RuntimeError):
+    pass
+
+
+@lru_cache(maxsize=None)
+def method_prefix(method):
+    """The parameter prefix werkzeug writes for ``method`` ("scrypt" -> "scrypt:32768:8:1")."""
+    return generate_password_hash("", method=method).split("$", 1)[0]
+
+
+class PasswordHasher:
+    def __init__(self, method="scrypt", workers=0, max_pending=64):
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.shutdown()
+        self.method = app.config.get("PASSWORD_HASH_METHOD", self.method)
+        # Tests hash inline, like they run jobs inline
+        self.workers = 0 if app.testing else app.config.get("PASSWORD_HASH_WORKERS", self.workers)
+        self.max_pending = app.config.get("PASSWORD_HASH_MAX_PENDING", self.max_pending)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    def _executor(self):
+        # A pool inherited through fork() has no live workers in the child
+        if self._pool is None or self._pool_pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pool_pid != os.getpid():
+                    from concurrent.futures import ProcessPoolExecutor
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                    self._pool_pid = os.getpid()
+        return self._pool
+
+    def _run(self, func, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy(f"{self.max_pending} password hashes already queued")
+        try:
+            if not self.workers:
+                return func(*args, **kwargs)
+            return self._executor().submit(func, *args, **kwargs).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, method=self.method)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        return pwhash.split("$", 1)[0] != method_prefix(self.method)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._pool_pid = None
+
+
+password_hasher = PasswordHasher()
+atexit.register(password_hasher.shutdown)
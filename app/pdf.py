@@ -0,0 +1,148 @@
+"""
+Lightweight PDF inspection used by background jobs.
+
+The validity check does not parse the full object graph; it scans the raw
+bytes in chunks, without loading the file into memory. The page count
+comes from PyMuPDF or pypdf (in requirements.txt): PDF 1.5+ files can keep
+their page objects in compressed object streams, where the byte scan finds
+none, so the scanned count is used only when neither can read the file.
+
+``extract_text()`` pulls the text layer out for search indexing, using
+PyMuPDF or pypdf, or else a small built-in reader that loads the whole
+file into memory.
+"""
+import re
+import zlib
+
+CHUNK_SIZE = 1024 * 1024
+# "/Type /Page" but not "/Type /Pages"
+_PAGE_RE = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+# Longest match we must not split across chunks
+_OVERLAP = 32
+
+
+def inspect_pdf(path, chunk_size=CHUNK_SIZE):
+    """
+    Return {"valid": bool, "pages": int, "size": int, "error": str | None}.
+
+    A file is valid if it starts with the %PDF- header and has an %%EOF
+    marker near its end.
+    """
+    pages = 0
+    size = 0
+    with open(path, "rb") as f:
+        header = f.read(8)
+        f.seek(0)
+        chunk = f.read(chunk_size)
+        window = b""
+        while chunk:
+            size += len(chunk)
+            window += chunk
+            chunk = f.read(chunk_size)
+            # Count matches by start position; the last _OVERLAP bytes are
+            # carried into the next window unless this was the final chunk
+            limit = len(window) - _OVERLAP if chunk else len(window)
+            pages += sum(1 for m in _PAGE_RE.finditer(window) if m.start() < limit)
+            window = window[max(limit, 0):]
+
+    if not header.startswith(b"%PDF-"):
+        return {"valid": False, "pages": 0, "size": size, "error": "missing %PDF- header"}
+    if b"%%EOF" not in _last_bytes(path, 1024):
+        return {"valid": False, "pages": pages, "size": size, "error": "missing %%EOF (truncated upload?)"}
+    return {"valid": True, "pages": page_count(path, pages), "size": size, "error": None}
+
+
+def _pymupdf_pages(path):
+    import fitz
+
+    with fitz.open(path) as doc:
+        return len(doc)
+
+
+def _pypdf_pages(path):
+    from pypdf import PdfReader
+
+    return len(PdfReader(path).pages)
+
+
+def page_count(path, scanned=0):
+    """
+    Pages according to PyMuPDF or pypdf, else ``scanned`` (the byte-scan
+    count, which can also include pages orphaned by incremental updates).
+    """
+    for reader in (_pymupdf_pages, _pypdf_pages):
+        try:
+            return reader(path)
+        except ImportError:
+            continue
+        except Exception:
+            break
+    return scanned
+
+
+def _last_bytes(path, count):
+    with open(path, "rb") as f:
+        f.seek(0, 2)
+        f.seek(max(f.tell() - count, 0))
+        return f.read()
+
+
+# Built-in text reader: content streams, inflated if Flate-compressed, and
+# the string operands of Tj / TJ / ' / " show-text operators.
+_STREAM_RE = re.compile(rb"stream\r?\n(.*?)\r?\nendstream", re.S)
+_SHOW_RE = re.compile(rb"\[((?:\\.|[^\]])*)\]\s*TJ|\(((?:\\.|[^\\)])*)\)\s*(?:Tj|'|\")", re.S)
+_STRING_RE = re.compile(rb"\(((?:\\.|[^\\)])*)\)")
+_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+
+
+def _unescape(raw):
+    def replace(match):
+        char = match.group(1)
+        if char[:1].isdigit():
+            return bytes([int(char, 8) & 0xFF])
+        return _ESCAPES.get(char, char)
+    return re.sub(rb"\\([0-7]{1,3}|.)", replace, raw, flags=re.S)
+
+
+def _basic_text(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    parts = []
+    for match in _STREAM_RE.finditer(data):
+        stream = match.group(1)
+        try:
+            stream = zlib.decompress(stream)
+        except zlib.error:
+            pass
+        for array, single in _SHOW_RE.findall(stream):
+            strings = _STRING_RE.findall(array) if array else [single]
+            parts.append(b"".join(_unescape(s) for s in strings).decode("latin-1"))
+    return " ".join(parts)
+
+
+def _pymupdf_text(path):
+    import fitz
+
+    with fitz.open(path) as doc:
+        return "\n".join(page.get_text() for page in doc)
+
+
+def _pypdf_text(path):
+    from pypdf import PdfReader
+
+    return "\n".join(page.extract_text() or "" for page in PdfReader(path).pages)
+
+
+def extract_text(path, max_chars=None):
+    """Text of a PDF (best effort; "" for scans without a text layer)."""
+    for reader in (_pymupdf_text, _pypdf_text):
+        try:
+            text = reader(path)
+            break
+        except Exception:
+            # Not installed, or it rejects a file the built-in reader may still manage
+            continue
+    else:
+        text = _basic_text(path)
+    text = " ".join(text.split())
+    return text[:max_chars] if max_chars else text
@@ -0,0 +1,227 @@
+"""
+Page previews for uploaded PDFs.
+
+Derivatives of blob-store files live under UPLOAD_FOLDER in
+``previews/<aa>/<sha256>/``, keyed by the file's content hash, so a file is
+processed once however many rows point at it:
+
+    meta.json        {"pages": N}
+    thumb-<n>.png    low-resolution thumbnail (PREVIEW_THUMB_DPI)
+    page-<n>.png     readable page image (PREVIEW_PAGE_DPI), rendered on demand
+
+The upload job (tasks.inspect_uploaded_pdf) records the page count and
+renders the first PREVIEW_MAX_THUMBS thumbnails; full pages are only
+rendered when someone opens them. The whole cache is capped at
+PREVIEW_CACHE_MAX_BYTES by deleting the least recently used files' previews.
+Measuring the cache means walking all of it, so the upload job sweeps after
+each file and on-demand renders at most every PREVIEW_SWEEP_INTERVAL seconds
+per process. Images are rendered into ``previews/.tmp/`` and renamed into
+place, and previews used in the last EVICT_GRACE seconds are never evicted,
+so a sweep cannot pull a directory out from under a render.
+
+Rendering needs PyMuPDF or poppler's ``pdftoppm``; PREVIEW_RENDERER picks
+one ("auto" uses whichever is installed). Without a renderer only the page
+count is recorded and the grading page falls back to the PDF link.
+"""
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+
+from flask import current_app
+
+from .blobstore import blob_path, sha_from_path
+from .uploads import upload_folder
+
+PREVIEW_DIR = "previews"
+TMP_DIR = ".tmp"
+SIZES = ("thumb", "page")
+EVICT_GRACE = 60  # seconds
+
+_last_sweep = 0.0
+
+_SHA_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def _render_pymupdf(pdf_path, page, dpi, out_path):
+    import fitz
+
+    with fitz.open(pdf_path) as doc:
+        doc[page - 1].get_pixmap(dpi=dpi).save(out_path)
+
+
+def _render_pdftoppm(pdf_path, page, dpi, out_path):
+    prefix = out_path[: -len(".png")]
+    subprocess.run(
+        ["pdftoppm", "-png", "-r", str(dpi), "-f", str(page), "-l", str(page), "-singlefile", pdf_path, prefix],
+        check=True,
+        capture_output=True,
+        timeout=60,
+    )
+
+
+# name -> render(pdf_path, page (1-based), dpi, out_path)
+RENDERERS = {
+    "pymupdf": _render_pymupdf,
+    "pdftoppm": _render_pdftoppm,
+}
+
+
+def renderer():
+    """The configured render function, or None if previews cannot be rendered."""
+    name = current_app.config.get("PREVIEW_RENDERER", "auto")
+    if name == "none":
+        return None
+    if name != "auto":
+        return RENDERERS[name]
+    try:
+        import fitz  # noqa: F401
+        return RENDERERS["pymupdf"]
+    except ImportError:
+        pass
+    return RENDERERS["pdftoppm"] if shutil.which("pdftoppm") else None
+
+
+def is_valid_sha(sha):
+    return bool(_SHA_RE.match(sha or ""))
+
+
+def preview_dir(sha):
+    """Directory of a file's previews, relative to UPLOAD_FOLDER."""
+    return f"{PREVIEW_DIR}/{sha[:2]}/{sha}"
+
+
+def image_path(sha, page, size):
+    return f"{preview_dir(sha)}/{size}-{page}.png"
+
+
+def _abs(rel_path):
+    return os.path.join(upload_folder(), rel_path)
+
+
+def has_source(sha):
+    return os.path.isfile(_abs(blob_path(sha)))
+
+
+def read_meta(sha):
+    try:
+        with open(_abs(f"{preview_dir(sha)}/meta.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(dest, write):
+    tmp_dir = _abs(f"{PREVIEW_DIR}/{TMP_DIR}")
+    os.makedirs(tmp_dir, exist_ok=True)
+    # Same suffix as dest: pdftoppm names its output after the path it is given
+    fd, tmp = tempfile.mkstemp(dir=tmp_dir, suffix=os.path.splitext(dest)[1])
+    os.close(fd)
+    try:
+        write(tmp)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        try:
+            os.replace(tmp, dest)
+        except FileNotFoundError:
+            # A sweep evicted the directory after makedirs; recreate it once
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            os.replace(tmp, dest)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _sweep_due():
+    global _last_sweep
+    now = time.monotonic()
+    if now - _last_sweep < current_app.config.get("PREVIEW_SWEEP_INTERVAL", 300):
+        return False
+    _last_sweep = now
+    return True
+
+
+def render_page(sha, page, size, enforce=True):
+    """
+    Relative path of the ``size`` image of ``page``, rendering it on a miss.
+    Returns None when no renderer is available.
+    """
+    rel = image_path(sha, page, size)
+    dest = _abs(rel)
+    if os.path.exists(dest):
+        os.utime(os.path.dirname(dest))  # mark the file's previews as recently used
+        return rel
+    render = renderer()
+    if render is None:
+        return None
+    dpi = current_app.config["PREVIEW_THUMB_DPI" if size == "thumb" else "PREVIEW_PAGE_DPI"]
+    _write_atomic(dest, lambda tmp: render(_abs(blob_path(sha)), page, dpi, tmp))
+    if enforce and _sweep_due():
+        enforce_budget()
+    return rel
+
+
+def build(pdf_rel_path, pages):
+    """Record the page count and render thumbnails for a freshly uploaded file."""
+    sha = sha_from_path(pdf_rel_path)
+    if sha is None:
+        return 0  # legacy upload outside the blob store
+    if read_meta(sha) is None:
+        def write_meta(tmp):
+            with open(tmp, "w") as f:
+                json.dump({"pages": pages}, f)
+        _write_atomic(_abs(f"{preview_dir(sha)}/meta.json"), write_meta)
+    rendered = 0
+    for page in range(1, min(pages, current_app.config["PREVIEW_MAX_THUMBS"]) + 1):
+        if render_page(sha, page, "thumb", enforce=False) is None:
+            break
+        rendered += 1
+    enforce_budget()
+    return rendered
+
+
+def preview_info(pdf_rel_path):
+    """{"sha", "pages", "thumbs"} for the grading page, or None if not processed yet."""
+    sha = sha_from_path(pdf_rel_path)
+    meta = read_meta(sha) if sha else None
+    if not meta:
+        return None
+    thumbs = min(meta["pages"], current_app.config["PREVIEW_MAX_THUMBS"])
+    if not os.path.exists(_abs(image_path(sha, 1, "thumb"))):
+        thumbs = 0
+    return {"sha": sha, "pages": meta["pages"], "thumbs": thumbs}
+
+
+def enforce_budget(max_bytes=None):
+    """Delete least recently used previews until the cache fits. Returns bytes freed."""
+    if max_bytes is None:
+        max_bytes = current_app.config["PREVIEW_CACHE_MAX_BYTES"]
+    root = _abs(PREVIEW_DIR)
+    entries = []
+    total = 0
+    for prefix in os.scandir(root) if os.path.isdir(root) else ():
+        if prefix.name.startswith("."):
+            continue
+        # Another worker's sweep may evict directories while this one scans
+        try:
+            children = list(os.scandir(prefix.path))
+        except FileNotFoundError:
+            continue
+        for entry in children:
+            try:
+                size = sum(f.stat().st_size for f in os.scandir(entry.path))
+                mtime = entry.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            entries.append((mtime, size, entry.path))
+            total += size
+    freed = 0
+    recent = time.time() - EVICT_GRACE
+    for mtime, size, path in sorted(entries):
+        if total - freed <= max_bytes or mtime > recent:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        freed += size
+    return freed
@@ -0,0 +1,296 @@
+"""
+Per-endpoint request profiling (off unless PROFILING_ENABLED).
+
+For every request it records wall time, the number and total time of SQL
+statements (engine cursor events), ORM rows loaded and template render
+time, and folds them into per-endpoint aggregates and histograms. A request
+that runs the same SQL statement PROFILING_NPLUSONE_THRESHOLD or more times
+is counted as a likely N+1 query and logged, with the statement, as a warning.
+
+The aggregates are served to instructors (or to anyone sending
+``Authorization: Bearer <PROFILING_METRICS_TOKEN>``) at:
+
+    /admin/profile   JSON, including fragment cache hit ratios
+    /admin/metrics   Prometheus text exposition format
+
+Measured overhead: see ``python -m benchmarks.bench_profiling``.
+"""
+import bisect
+import contextvars
+import hmac
+import logging
+import threading
+from collections import Counter
+from time import perf_counter
+
+from flask import (
+    Blueprint,
+    Response,
+    abort,
+    before_render_template,
+    current_app,
+    jsonify,
+    request,
+    template_rendered,
+)
+from flask_login import current_user
+from sqlalchemy import event
+
+log = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+MAX_SUSPECTS = 10  # N+1 statements kept per endpoint
+
+
+class _RequestProfile:
+    __slots__ = ("start", "sql_count", "sql_time", "rows", "template_time",
+                 "statements", "template_depth", "template_start")
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.rows = 0
+        self.template_time = 0.0
+        self.statements = Counter()
+        self.template_depth = 0
+        self.template_start = 0.0
+
+
+class _Histogram:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            total += count
+            yield bound, total
+
+
+class _EndpointStats:
+    def __init__(self):
+        self.requests = 0
+        self.duration = _Histogram(DURATION_BUCKETS)
+        self.queries = _Histogram(QUERY_BUCKETS)
+        self.sql_time = 0.0
+        self.rows = 0
+        self.template_time = 0.0
+        self.nplusone = 0
+        self.suspects = {}  # statement -> most executions seen in one request
+
+    def as_dict(self):
+        n = self.requests or 1
+        return {
+            "requests": self.requests,
+            "mean_ms": self.duration.sum / n * 1000,
+            "mean_queries": self.queries.sum / n,
+            "mean_sql_ms": self.sql_time / n * 1000,
+            "mean_template_ms": self.template_time / n * 1000,
+            "mean_rows": self.rows / n,
+            "nplusone_requests": self.nplusone,
+            "nplusone_statements": [
+                {"statement": stmt, "max_executions": count}
+                for stmt, count in sorted(self.suspects.items(), key=lambda item: -item[1])
+            ],
+            "duration_histogram": {_le(b): c for b, c in self.duration.cumulative()},
+            "query_histogram": {_le(b): c for b, c in self.queries.cumulative()},
+        }
+
+
+def _le(bound):
+    return "+Inf" if bound == float("inf") else f"{bound:g}"
+
+
+# The profile of the request being handled on this thread/context, if any
+_active = contextvars.ContextVar("request_profile", default=None)
+
+
+class RequestProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.nplusone_threshold = 5
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app, db):
+        self.enabled = app.config.get("PROFILING_ENABLED", False)
+        self.nplusone_threshold = app.config.get("PROFILING_NPLUSONE_THRESHOLD", self.nplusone_threshold)
+        if not self.enabled:
+            return
+
+        with app.app_context():
+            engines = list(db.engines.values())
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        if not event.contains(db.Model, "load", _instance_loaded):
+            event.listen(db.Model, "load", _instance_loaded, propagate=True)
+        before_render_template.connect(_before_render, app)
+        template_rendered.connect(_after_render, app)
+        app.before_request(_start_request)
+        app.teardown_request(self._finish_request)
+
+    def _finish_request(self, exc):
+        profile = _active.get()
+        if profile is None:
+            return
+        _active.set(None)
+        elapsed = perf_counter() - profile.start
+        endpoint = request.endpoint or "<unmatched>"
+        repeated = [(stmt, n) for stmt, n in profile.statements.items() if n >= self.nplusone_threshold]
+        for stmt, n in repeated:
+            log.warning("Possible N+1 in %s: statement ran %d times: %s", endpoint, n, " ".join(stmt.split())[:200])
+
+        with self._lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = _EndpointStats()
+            stats.requests += 1
+            stats.duration.observe(elapsed)
+            stats.queries.observe(profile.sql_count)
+            stats.sql_time += profile.sql_time
+            stats.rows += profile.rows
+            stats.template_time += profile.template_time
+            if repeated:
+                stats.nplusone += 1
+                for stmt, n in repeated:
+                    if stmt in stats.suspects or len(stats.suspects) < MAX_SUSPECTS:
+                        stats.suspects[stmt] = max(n, stats.suspects.get(stmt, 0))
+
+    def snapshot(self):
+        with self._lock:
+            return {endpoint: stats.as_dict() for endpoint, stats in sorted(self.endpoints.items())}
+
+    def prometheus(self):
+        """Aggregates in the Prometheus text exposition format."""
+        from .fragment_cache import fragment_cache
+
+        lines = []
+
+        def header(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            endpoints = sorted(self.endpoints.items())
+            for name, attr, help_text in (
+                ("scanva_request_duration_seconds", "duration", "Request wall time."),
+                ("scanva_request_sql_queries", "queries", "SQL statements per request."),
+            ):
+                header(name, "histogram", help_text)
+                for endpoint, stats in endpoints:
+                    hist = getattr(stats, attr)
+                    for bound, count in hist.cumulative():
+                        lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="{_le(bound)}"}} {count}')
+                    lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {hist.sum:g}')
+                    lines.append(f'{name}_count{{endpoint="{endpoint}"}} {stats.requests}')
+            for name, attr, help_text in (
+                ("scanva_request_sql_seconds_total", "sql_time", "Time spent in SQL."),
+                ("scanva_request_template_seconds_total", "template_time", "Time spent rendering templates."),
+                ("scanva_request_rows_loaded_total", "rows", "ORM rows loaded."),
+                ("scanva_request_nplusone_total", "nplusone", "Requests that repeated a SQL statement."),
+            ):
+                header(name, "counter", help_text)
+                for endpoint, stats in endpoints:
+                    lines.append(f'{name}{{endpoint="{endpoint}"}} {getattr(stats, attr):g}')
+
+        fragments = {k: v for k, v in fragment_cache.stats().items() if k != "total"}
+        for name, key in (("scanva_fragment_cache_hits_total", "hits"),
+                          ("scanva_fragment_cache_misses_total", "misses")):
+            header(name, "counter", f"Dashboard fragment cache {key}.")
+            for fragment, values in fragments.items():
+                lines.append(f'{name}{{fragment="{fragment}"}} {values[key]}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self.endpoints = {}
+
+
+profiler = RequestProfiler()
+
+
+def _start_request():
+    _active.set(_RequestProfile())
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active.get()
+    if profile is not None:
+        conn.info["profile_start"] = (profile, perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("profile_start", None)
+    if started is None:
+        return
+    profile, start = started
+    profile.sql_time += perf_counter() - start
+    profile.sql_count += 1
+    profile.statements[statement] += 1
+
+
+def _instance_loaded(target, context):
+    profile = _active.get()
+    if profile is not None:
+        profile.rows += 1
+
+
+def _before_render(sender, template, context, **extra):
+    profile = _active.get()
+    if profile is not None:
+        if profile.template_depth == 0:
+            profile.template_start = perf_counter()
+        profile.template_depth += 1
+
+
+def _after_render(sender, template, context, **extra):
+    profile = _active.get()
+    if profile is not None and profile.template_depth:
+        profile.template_depth -= 1
+        if profile.template_depth == 0:
+            profile.template_time += perf_counter() - profile.template_start
+
+
+profiling_bp = Blueprint("profiling", __name__)
+
+
+def _authorized():
+    token = current_app.config.get("PROFILING_METRICS_TOKEN")
+    if token:
+        sent = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if hmac.compare_digest(sent.encode(), token.encode()):
+            return True
+    return current_user.is_authenticated and current_user.role == "instructor"
+
+
+@profiling_bp.route("/profile")
+def profile_json():
+    """Per-endpoint timings, query counts and N+1 suspects."""
+    if not profiler.enabled:
+        abort(404)
+    if not _authorized():
+        abort(403)
+
+    from .fragment_cache import fragment_cache
+
+    return jsonify(endpoints=profiler.snapshot(), fragment_cache=fragment_cache.stats())
+
+
+@profiling_bp.route("/metrics")
+def metrics():
+    if not profiler.enabled:
+        abort(404)
+    if not _authorized():
+        abort(403)
+    return Response(profiler.prometheus(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,242 @@
+"""
+Live submission status pushed to browsers over server-sent events.
+
+Committing a change to a submission publishes a small JSON message on the
+broker, and ``/events`` streams the messages for the current user's
+channels, so an open dashboard or feedback page reloads once when
+something it shows changed instead of being refreshed over and over:
+
+    user:<id>       that student's submissions (submitted / graded / processed)
+    course:<id>     every submission in the course (instructors)
+
+Messages are collected by session events and published after the commit,
+so a rolled-back change never reaches a browser. The default backend is an
+in-process fan-out, enough for one server process (and the tests); set
+PUBSUB_REDIS_URL, or PUBSUB_BACKEND to any object with ``publish(channel,
+message)`` and ``subscribe(channels)``, to share events between processes.
+
+Each open stream keeps a server thread waiting, so pages only open one
+when SSE_ENABLED is set (for servers running threaded or async workers;
+with a few sync workers a handful of open tabs would take them all), and
+streams close after SSE_MAX_AGE seconds and the browser reconnects on its
+own. Messages sent while a browser was reconnecting are not replayed.
+Publishing is independent of SSE_ENABLED.
+"""
+import json
+import queue
+import threading
+import time
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from .models import Assignment, Job, Submission
+
+SUBMITTED_FIELDS = ("submitted_at", "student_file_path")
+GRADED_FIELDS = ("graded_at", "total_score", "general_comment", "graded_file_path")
+
+# Sent instead of the messages a slow subscriber missed
+RESYNC = json.dumps({"status": "resync"})
+
+
+class LocalSubscription:
+    def __init__(self, backend, channels, maxsize):
+        self.backend = backend
+        self.channels = channels
+        self.queue = queue.Queue(maxsize)
+
+    def put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            # Too far behind to catch up message by message; tell it to reload
+            with self.queue.mutex:
+                self.queue.queue.clear()
+            self.queue.put_nowait(RESYNC)
+
+    def get(self, timeout=None):
+        """Next message, or None if nothing arrived within ``timeout`` seconds."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.backend.unsubscribe(self)
+
+
+class LocalBackend:
+    """Fan-out between threads of this process."""
+
+    def __init__(self, maxsize=100):
+        self.maxsize = maxsize
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(message)
+
+    def subscribe(self, channels):
+        subscription = LocalSubscription(self, tuple(channels), self.maxsize)
+        with self._lock:
+            for channel in subscription.channels:
+                self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._channels.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._channels[channel]
+
+    def subscriber_count(self):
+        with self._lock:
+            return len({s for subscribers in self._channels.values() for s in subscribers})
+
+
+class RedisSubscription:
+    def __init__(self, client, channels):
+        self.pubsub = client.pubsub(ignore_subscribe_messages=True)
+        self.pubsub.subscribe(*channels)
+
+    def get(self, timeout=None):
+        message = self.pubsub.get_message(timeout=timeout or 0)
+        if message is None:
+            return None
+        data = message["data"]
+        return data.decode() if isinstance(data, bytes) else data
+
+    def close(self):
+        self.pubsub.close()
+
+
+class RedisBackend:
+    """Redis PUBLISH/SUBSCRIBE, for several server processes (needs the redis package)."""
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    def publish(self, channel, message):
+        self.client.publish(channel, message)
+
+    def subscribe(self, channels):
+        return RedisSubscription(self.client, channels)
+
+
+class Broker:
+    def __init__(self, backend=None):
+        self.backend = backend or LocalBackend()
+        self.enabled = True
+
+    def init_app(self, app):
+        self.enabled = app.config.get("PUBSUB_ENABLED", True)
+        backend = app.config.get("PUBSUB_BACKEND")
+        if backend is not None:
+            self.backend = backend() if callable(backend) else backend
+        elif app.config.get("PUBSUB_REDIS_URL"):
+            self.backend = RedisBackend(app.config["PUBSUB_REDIS_URL"])
+        else:
+            self.backend = LocalBackend(maxsize=app.config.get("PUBSUB_QUEUE_SIZE", 100))
+
+    def publish(self, channel, payload):
+        if self.enabled:
+            self.backend.publish(channel, json.dumps(payload))
+
+    def subscribe(self, channels):
+        return self.backend.subscribe(channels)
+
+
+broker = Broker()
+
+
+def stream(subscription, heartbeat=15, max_age=300, course_id=None):
+    """
+    Yield server-sent events from ``subscription`` until ``max_age``
+    seconds have passed, with a comment line every ``heartbeat`` seconds
+    so proxies keep the connection open. Closes the subscription.
+    """
+    deadline = time.monotonic() + max_age
+    try:
+        yield f"retry: {int(heartbeat * 1000)}\n\n"
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            message = subscription.get(timeout=min(heartbeat, remaining))
+            if message is None:
+                yield ": keepalive\n\n"
+                continue
+            payload = json.loads(message)
+            if course_id is not None and payload.get("course_id") not in (None, course_id):
+                continue
+            name = "resync" if payload["status"] == "resync" else "submission"
+            yield f"event: {name}\ndata: {message}\n\n"
+    finally:
+        subscription.close()
+
+
+def _changed(obj, fields):
+    attrs = inspect(obj).attrs
+    return any(attrs[f].history.has_changes() for f in fields)
+
+
+def _submission_status(session, obj):
+    if obj in session.deleted:
+        return None
+    if obj in session.new:
+        return "submitted" if obj.submitted_at else None
+    if _changed(obj, GRADED_FIELDS):
+        return "graded"
+    if _changed(obj, SUBMITTED_FIELDS):
+        return "submitted"
+    return None
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_messages(session, flush_context):
+    changes = {}  # submission id -> status
+    for obj in [*session.new, *session.dirty]:
+        if isinstance(obj, Submission):
+            status = _submission_status(session, obj)
+            if status:
+                changes[obj.id] = status
+        elif isinstance(obj, Job) and obj.submission_id and obj.status in ("done", "failed") \
+                and _changed(obj, ("status",)):
+            changes.setdefault(obj.submission_id, "processed")
+    if not changes:
+        return
+    rows = session.connection().execute(
+        select(Submission.id, Submission.assignment_id, Submission.student_id, Assignment.course_id)
+        .join(Assignment, Assignment.id == Submission.assignment_id)
+        .where(Submission.id.in_(changes))
+    )
+    pending = session.info.setdefault("pubsub_messages", {})
+    for sub_id, assignment_id, student_id, course_id in rows:
+        pending[sub_id] = {
+            "status": changes[sub_id],
+            "submission_id": sub_id,
+            "assignment_id": assignment_id,
+            "course_id": course_id,
+            "student_id": student_id,
+        }
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session):
+    pending = session.info.pop("pubsub_messages", None)
+    for payload in (pending or {}).values():
+        broker.publish(f"user:{payload['student_id']}", payload)
+        broker.publish(f"course:{payload['course_id']}", payload)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_messages(session):
+    session.info.pop("pubsub_messages", None)
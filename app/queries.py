@@ -0,0 +1,169 @@
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import joinedload, load_only
+
+from .models import db, User, Course, Assignment, Submission, Enrollment
+
+SUBMISSION_STATUSES = ("not_submitted", "submitted", "graded")
+
+
+def enrolled_courses(user_id):
+    """Courses a user is enrolled in, loaded in a single query."""
+    return (
+        Course.query.join(Enrollment, Enrollment.course_id == Course.id)
+        .filter(Enrollment.user_id == user_id)
+        .order_by(Enrollment.id)
+        .all()
+    )
+
+
+def first_enrolled_course_id(user_id):
+    return (
+        db.session.query(Enrollment.course_id)
+        .filter(Enrollment.user_id == user_id)
+        .order_by(Enrollment.id)
+        .limit(1)
+        .scalar()
+    )
+
+
+def student_assignment_rows(course_id, student_id):
+    """
+    Assignments for a course paired with the given student's submission.
+
+    Returns a list of (assignment, submission) tuples; submission is None
+    when the student has not submitted. Only that student's submission is
+    joined in, so the page costs one query regardless of class size.
+    """
+    return (
+        db.session.query(Assignment, Submission)
+        .outerjoin(
+            Submission,
+            and_(
+                Submission.assignment_id == Assignment.id,
+                Submission.student_id == student_id,
+            ),
+        )
+        .filter(Assignment.course_id == course_id)
+        .order_by(Assignment.due_date)
+        .all()
+    )
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class MissingSubmission:
+    """Stand-in row for an enrolled student who has no Submission for the assignment."""
+    student: User
+    assignment_id: int
+    id: int = None
+    submitted_at: datetime = None
+    graded_at: datetime = None
+    total_score: float = None
+    student_file_path: str = None
+    graded_file_path: str = None
+
+    @property
+    def student_id(self):
+        return self.student.id
+
+
+def encode_cursor(submission):
+    return _encode_cursor(submission.submitted_at, submission.id)
+
+
+def _encode_cursor(submitted_at, row_id):
+    payload = [submitted_at.isoformat() if submitted_at else None, row_id]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        submitted_at, sub_id = json.loads(base64.urlsafe_b64decode(padded))
+        return (datetime.fromisoformat(submitted_at) if submitted_at else None), int(sub_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+
+
+def _status_filter(status):
+    if status == "submitted":
+        return and_(Submission.student_file_path.isnot(None), Submission.total_score.is_(None))
+    if status == "graded":
+        return Submission.total_score.isnot(None)
+    raise ValueError(f"Unknown status {status!r}")
+
+
+def _after_cursor(submitted_at, sub_id):
+    # Rows come newest first with unsubmitted (NULL) ones last, ties broken by id
+    if submitted_at is None:
+        return and_(Submission.submitted_at.is_(None), Submission.id < sub_id)
+    return or_(
+        Submission.submitted_at < submitted_at,
+        and_(Submission.submitted_at == submitted_at, Submission.id < sub_id),
+        Submission.submitted_at.is_(None),
+    )
+
+
+def submissions_page(assignment_id, status=None, cursor=None, per_page=50):
+    """
+    One page of an assignment's submissions, keyset-ordered on (submitted_at, id).
+
+    Each submission comes with its student's email already loaded. Returns
+    (submissions, next_cursor); next_cursor is None on the last page.
+    Raises InvalidCursor for a malformed cursor.
+
+    status="not_submitted" lists the course's enrolled students without a
+    submitted file instead (see not_submitted_page).
+    """
+    if status == "not_submitted":
+        return not_submitted_page(assignment_id, cursor, per_page)
+    query = (
+        Submission.query.filter(Submission.assignment_id == assignment_id)
+        .options(joinedload(Submission.student).options(load_only(User.email)))
+    )
+    if status:
+        query = query.filter(_status_filter(status))
+    if cursor:
+        query = query.filter(_after_cursor(*decode_cursor(cursor)))
+
+    rows = (
+        query.order_by(Submission.submitted_at.desc().nullslast(), Submission.id.desc())
+        .limit(per_page + 1)
+        .all()
+    )
+    next_cursor = encode_cursor(rows[per_page - 1]) if len(rows) > per_page else None
+    return rows[:per_page], next_cursor
+
+
+def not_submitted_page(assignment_id, cursor=None, per_page=50):
+    """
+    Enrolled students of the assignment's course who have not submitted a
+    file, keyset-ordered on student id (newest accounts first). Students
+    with no Submission row at all come back as MissingSubmission.
+    """
+    course_id = select(Assignment.course_id).where(Assignment.id == assignment_id).scalar_subquery()
+    query = (
+        db.session.query(User, Submission)
+        .select_from(User)
+        .join(Enrollment, and_(
+            Enrollment.user_id == User.id, Enrollment.course_id == course_id, Enrollment.role == "student",
+        ))
+        .outerjoin(Submission, and_(Submission.assignment_id == assignment_id, Submission.student_id == User.id))
+        .filter(Submission.student_file_path.is_(None))  # also true when there is no row
+        .options(load_only(User.email))
+    )
+    if cursor:
+        query = query.filter(User.id < decode_cursor(cursor)[1])
+
+    rows = query.order_by(User.id.desc()).limit(per_page + 1).all()
+    next_cursor = _encode_cursor(None, rows[per_page - 1][0].id) if len(rows) > per_page else None
+    page = [sub or MissingSubmission(student=user, assignment_id=assignment_id) for user, sub in rows[:per_page]]
+    return page, next_cursor
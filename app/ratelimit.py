@@ -0,0 +1,51 @@
+"""
+Fixed-window rate limiting for the auth endpoints.
+
+Each key gets a number of attempts per LOGIN_RATE_WINDOW seconds: an
+account (email) gets LOGIN_RATE_LIMIT, a client address the much larger
+LOGIN_IP_RATE_LIMIT since a whole classroom may share one NAT address.
+Counters live in the same kind of backend as the other caches (in-process
+LRU by default, any get/set/delete object via RATE_LIMIT_BACKEND).
+"""
+import threading
+import time
+
+from .cache import LRUBackend
+
+
+class RateLimiter:
+    def __init__(self, backend=None, limit=10, window=60):
+        self.backend = backend or LRUBackend(maxsize=100000)
+        self.limit = limit
+        self.window = window
+        self.enabled = True
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get("RATE_LIMIT_ENABLED", True)
+        self.limit = app.config.get("LOGIN_RATE_LIMIT", self.limit)
+        self.window = app.config.get("LOGIN_RATE_WINDOW", self.window)
+        backend = app.config.get("RATE_LIMIT_BACKEND")
+        if backend is not None:
+            self.backend = backend() if callable(backend) else backend
+        else:
+            self.backend = LRUBackend(maxsize=100000)
+
+    def hit(self, key, limit=None):
+        """
+        Count one attempt against ``key``. Returns 0 if allowed, otherwise
+        the number of seconds until the current window ends.
+        """
+        if not self.enabled:
+            return 0
+        now = time.time()
+        cache_key = f"rate:{key}:{int(now // self.window)}"
+        with self._lock:
+            count = (self.backend.get(cache_key) or 0) + 1
+            self.backend.set(cache_key, count, self.window)
+        if count <= (limit or self.limit):
+            return 0
+        return int(self.window - now % self.window) + 1
+
+
+auth_limiter = RateLimiter()
@@ -0,0 +1,251 @@
+"""
+Resumable, chunked uploads for large submission PDFs.
+
+A client creates a session (declared size, optionally the SHA-256 it
+expects), PUTs the numbered chunks in any order or several at once, asks
+which chunks arrived, and finalizes. Every chunk is written to its own
+file under ``UPLOAD_FOLDER/.chunks/<session id>/`` (temp file + rename),
+so retries and parallel PUTs never touch the database or each other.
+Finalizing streams the chunks in order through SHA-256 into one temp file,
+checks the hash and moves the result into the blob store just like
+uploads.save_upload; the route then attaches it to the submission.
+
+Finalizing claims the session ("assembling") so two requests never
+assemble it at once. A failed finalize reopens it with ``release()``, and
+a claim left behind by a process that died can be taken again after
+UPLOAD_SESSION_CLAIM_TIMEOUT seconds.
+
+Sessions expire UPLOAD_SESSION_TTL seconds after they were created.
+``expire()`` (run whenever a session is created, and by ``flask uploads
+expire``) deletes their rows and chunks; chunks are removed only once the
+deletion commits.
+"""
+import hashlib
+import os
+import re
+import secrets
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, event, or_, select, update
+from sqlalchemy.orm import Session
+
+from . import blobstore
+from .models import db, UploadSession
+from .uploads import StoredUpload, upload_folder
+
+CHUNK_DIR = ".chunks"
+
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class UploadSessionError(Exception):
+    """Request that does not fit the upload session; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400, **details):
+        super().__init__(message)
+        self.status = status
+        self.details = details
+
+
+def chunk_dir(session_id):
+    return os.path.join(upload_folder(), CHUNK_DIR, session_id)
+
+
+def _chunk_path(session_id, index):
+    return os.path.join(chunk_dir(session_id), f"{index}.part")
+
+
+def _checksum(value):
+    if value is None:
+        return None
+    value = str(value).lower()
+    if not _SHA256_RE.match(value):
+        raise UploadSessionError("sha256 must be 64 hex digits")
+    return value
+
+
+def create(user_id, assignment_id, size, filename=None, sha256=None):
+    """Add a new session to the db session (the caller commits) and make its chunk directory."""
+    max_size = current_app.config.get("MAX_CONTENT_LENGTH")
+    if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+        raise UploadSessionError("size must be a positive number of bytes")
+    if max_size is not None and size > max_size:
+        raise UploadSessionError(f"files are limited to {max_size} bytes", status=413)
+    sha256 = _checksum(sha256)
+
+    expire()
+    now = datetime.utcnow()
+    session = UploadSession(
+        id=secrets.token_hex(16),
+        user_id=user_id,
+        assignment_id=assignment_id,
+        filename=str(filename)[:255] if filename else None,
+        size=size,
+        chunk_size=current_app.config["UPLOAD_SESSION_CHUNK_SIZE"],
+        sha256=sha256,
+        created_at=now,
+        expires_at=now + timedelta(seconds=current_app.config["UPLOAD_SESSION_TTL"]),
+    )
+    db.session.add(session)
+    os.makedirs(chunk_dir(session.id), exist_ok=True)
+    return session
+
+
+def get(session_id, user_id):
+    """The user's unexpired session ``session_id``, or None."""
+    session = db.session.get(UploadSession, session_id)
+    if session is None or session.user_id != user_id or session.expires_at <= datetime.utcnow():
+        return None
+    return session
+
+
+def write_chunk(session, index, stream):
+    """Store chunk ``index`` from ``stream``, replacing any earlier copy. Returns its length."""
+    if session.status != "open":
+        raise UploadSessionError("upload is being finalized", status=409)
+    if not 0 <= index < session.chunk_count:
+        raise UploadSessionError(f"chunk index must be between 0 and {session.chunk_count - 1}")
+    expected = session.chunk_length(index)
+    read_size = current_app.config.get("UPLOAD_CHUNK_SIZE", 64 * 1024)
+
+    fd, tmp_path = tempfile.mkstemp(dir=chunk_dir(session.id), prefix=f".{index}-", suffix=".tmp")
+    try:
+        length = 0
+        with os.fdopen(fd, "wb") as out:
+            while length <= expected:
+                data = stream.read(min(read_size, expected + 1 - length))
+                if not data:
+                    break
+                length += len(data)
+                out.write(data)
+        if length != expected:
+            raise UploadSessionError(f"chunk {index} must be exactly {expected} bytes")
+        os.replace(tmp_path, _chunk_path(session.id, index))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return length
+
+
+def received(session):
+    """Sorted indexes of the chunks stored so far."""
+    try:
+        names = os.listdir(chunk_dir(session.id))
+    except FileNotFoundError:
+        return []
+    indexes = []
+    for name in names:
+        stem, ext = os.path.splitext(name)
+        if ext == ".part" and stem.isdigit() and int(stem) < session.chunk_count:
+            indexes.append(int(stem))
+    return sorted(indexes)
+
+
+def finalize(session, sha256=None):
+    """
+    Assemble the chunks, verify the checksum and store the file in the blob
+    store; returns a StoredUpload. The session stays claimed ("assembling")
+    until the caller deletes it, or calls release() if attaching the file
+    fails; on a checksum mismatch it is reopened so the client can resend
+    chunks.
+    """
+    expected_sha = _checksum(sha256) or session.sha256
+    if expected_sha is None:
+        raise UploadSessionError("sha256 is required to finalize")
+    if session.sha256 and expected_sha != session.sha256:
+        raise UploadSessionError("sha256 does not match the one given when the upload started")
+    missing = sorted(set(range(session.chunk_count)) - set(received(session)))
+    if missing:
+        raise UploadSessionError("chunks are missing", status=409, missing=missing)
+
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=current_app.config["UPLOAD_SESSION_CLAIM_TIMEOUT"])
+    claimed = db.session.execute(
+        update(UploadSession)
+        .where(
+            UploadSession.id == session.id,
+            or_(
+                UploadSession.status == "open",
+                and_(UploadSession.status == "assembling", UploadSession.claimed_at < stale),
+            ),
+        )
+        .values(status="assembling", claimed_at=now)
+    ).rowcount
+    db.session.commit()
+    if not claimed:
+        raise UploadSessionError("upload is already being finalized", status=409)
+
+    folder = upload_folder()
+    digest = hashlib.sha256()
+    read_size = current_app.config.get("UPLOAD_CHUNK_SIZE", 64 * 1024)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for index in range(session.chunk_count):
+                with open(_chunk_path(session.id, index), "rb") as chunk:
+                    while data := chunk.read(read_size):
+                        digest.update(data)
+                        out.write(data)
+            out.flush()
+            os.fsync(out.fileno())
+        if digest.hexdigest() != expected_sha:
+            raise UploadSessionError("checksum mismatch; resend the chunks and finalize again", status=422)
+        filename = blobstore.store(tmp_path, expected_sha, folder)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        release(session.id)
+        raise
+    return StoredUpload(filename=filename, size=session.size, sha256=expected_sha)
+
+
+def release(session_id):
+    """Reopen a session claimed by finalize() so the client can retry; commits."""
+    db.session.execute(
+        update(UploadSession).where(UploadSession.id == session_id).values(status="open", claimed_at=None)
+    )
+    db.session.commit()
+
+
+def discard(session):
+    """Delete the session row (the caller commits); its chunks go once that commits."""
+    db.session.delete(session)
+    db.session.info.setdefault("discarded_uploads", set()).add(session.id)
+
+
+def expire(now=None):
+    """
+    Delete expired sessions (the caller commits) and chunk directories that
+    have no session and are older than UPLOAD_SESSION_TTL. Returns the
+    number of sessions deleted.
+    """
+    now = now or datetime.utcnow()
+    ttl = current_app.config["UPLOAD_SESSION_TTL"]
+    stale = db.session.scalars(select(UploadSession).where(UploadSession.expires_at <= now)).all()
+    for session in stale:
+        discard(session)
+
+    root = os.path.join(upload_folder(), CHUNK_DIR)
+    if os.path.isdir(root):
+        known = set(db.session.scalars(select(UploadSession.id)))
+        cutoff = now.timestamp() - ttl
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if name not in known and os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+    return len(stale)
+
+
+@event.listens_for(Session, "after_commit")
+def _remove_discarded_chunks(session):
+    for session_id in session.info.pop("discarded_uploads", ()):
+        shutil.rmtree(chunk_dir(session_id), ignore_errors=True)
+
+
+@event.listens_for(Session, "after_rollback")
+def _keep_discarded_chunks(session):
+    session.info.pop("discarded_uploads", None)
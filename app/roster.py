@@ -0,0 +1,229 @@
+"""
+Bulk roster import: create users and enrollments from a CSV.
+
+CSV columns (header row required):
+
+    email      required
+    role       "student" (default) or "instructor"
+    password   optional; falls back to the default password given to the import
+    course     optional course code; falls back to the import's default course
+
+Rows are processed in batches. Emails that already exist are skipped before
+hashing, new passwords are hashed in a process pool, and users/enrollments
+are written with set-based INSERT ... ON CONFLICT DO NOTHING statements, so
+re-running an import is safe.
+
+Web imports are capped at ROSTER_WEB_MAX_ROWS rows (bigger rosters go
+through ``flask roster import``) and hash on their own long-lived pool of
+ROSTER_HASH_WORKERS processes, so they never queue ahead of logins on the
+password hasher's pool.
+"""
+import csv
+import io
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import partial
+
+from flask import current_app
+from sqlalchemy import select
+from werkzeug.security import generate_password_hash
+
+from .fragment_cache import fragment_cache
+from .passwords import password_hasher
+from .models import db, User, Course, Enrollment
+
+BATCH_SIZE = 1000
+ROLES = ("student", "instructor")
+
+# Below this many passwords a process pool costs more than it saves
+POOL_THRESHOLD = 32
+HASH_CHUNKSIZE = 16
+
+
+_web_pool = None
+_web_pool_key = None  # (pid, workers) the pool was started for
+_web_pool_lock = threading.Lock()
+
+
+class RosterError(ValueError):
+    pass
+
+
+def web_pool():
+    """The hashing pool shared by web imports, or None to hash inline."""
+    global _web_pool, _web_pool_key
+    # Tests hash inline, like the password hasher
+    workers = 0 if current_app.testing else current_app.config.get("ROSTER_HASH_WORKERS", 2)
+    if not workers:
+        return None
+    # A pool inherited through fork() has no live workers in the child
+    key = (os.getpid(), workers)
+    with _web_pool_lock:
+        if _web_pool_key != key:
+            from concurrent.futures import ProcessPoolExecutor
+            _web_pool = ProcessPoolExecutor(max_workers=workers)
+            _web_pool_key = key
+        return _web_pool
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    users_created: int = 0
+    enrollments_created: int = 0
+    skipped: list = field(default_factory=list)  # (line number, reason)
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def dialect_insert(model):
+    """INSERT for the model's table that supports ON CONFLICT (SQLite/PostgreSQL)."""
+    dialect = db.engine.dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise RosterError(f"Bulk import is not supported on {dialect}")
+    return insert(model.__table__)
+
+
+def insert_ignore(model):
+    """INSERT ... ON CONFLICT DO NOTHING for the current database dialect."""
+    return dialect_insert(model).on_conflict_do_nothing()
+
+
+def enroll_in_all_courses(user_id, role):
+    """Enroll one user in every course with a single INSERT ... SELECT."""
+    stmt = insert_ignore(Enrollment).from_select(
+        ["user_id", "course_id", "role"],
+        # SQLite needs a WHERE before ON CONFLICT in INSERT ... SELECT
+        select(db.literal(user_id), Course.id, db.literal(role)).where(db.true()),
+    )
+    db.session.execute(stmt)
+
+
+def parse_roster(stream, default_password=None):
+    """Yield (line_no, email, role, password, course_code) for each valid row, or (line_no, error)."""
+    reader = csv.DictReader(stream)
+    if not reader.fieldnames or "email" not in [f.strip().lower() for f in reader.fieldnames]:
+        raise RosterError("Roster CSV needs a header row with at least an 'email' column.")
+
+    for line_no, raw in enumerate(reader, start=2):
+        row = {(k or "").strip().lower(): (v or "").strip() for k, v in raw.items()}
+        email = row.get("email", "").lower()
+        role = row.get("role") or "student"
+        password = row.get("password") or default_password
+        course_code = row.get("course") or None
+        if "@" not in email:
+            yield line_no, "invalid email"
+        elif role not in ROLES:
+            yield line_no, f"unknown role {role!r}"
+        elif not password:
+            yield line_no, "no password and no default password"
+        else:
+            yield line_no, email, role, password, course_code
+
+
+def _hash_passwords(passwords, pool):
+    # Same work factor as interactive registration
+    hash_one = partial(generate_password_hash, method=password_hasher.method)
+    if pool is None or len(passwords) < POOL_THRESHOLD:
+        return [hash_one(p) for p in passwords]
+    return list(pool.map(hash_one, passwords, chunksize=HASH_CHUNKSIZE))
+
+
+def import_roster(stream, default_password=None, default_course=None,
+                  batch_size=BATCH_SIZE, workers=None, pool=None):
+    """
+    Import users + enrollments from a text stream of CSV.
+
+    ``default_course`` is a Course used for rows without a course column.
+    ``pool`` is an existing executor to hash with (left running); without
+    one, ``workers`` is the size of a pool started for this import
+    (None = one per CPU, 0 = no pool).
+    Commits once per batch and returns an ImportResult.
+    """
+    result = ImportResult()
+    start = time.perf_counter()
+    # Course codes are not unique; the oldest course with a code wins
+    course_ids = {}
+    for cid, code in db.session.execute(select(Course.id, Course.code).order_by(Course.id)):
+        course_ids.setdefault(code, cid)
+    default_course_id = default_course.id if default_course else None
+
+    own_pool = pool is None and workers != 0
+    if own_pool:
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        batch = []
+        for parsed in parse_roster(stream, default_password):
+            result.rows += 1
+            if len(parsed) == 2:
+                result.skipped.append(parsed)
+                continue
+            line_no, email, role, password, code = parsed
+            if code and code not in course_ids:
+                result.skipped.append((line_no, f"unknown course {code!r}"))
+                continue
+            batch.append((email, role, password, course_ids[code] if code else default_course_id))
+            if len(batch) >= batch_size:
+                _write_batch(batch, pool, result)
+                batch = []
+        if batch:
+            _write_batch(batch, pool, result)
+    finally:
+        if own_pool:
+            pool.shutdown()
+
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def _write_batch(batch, pool, result):
+    # Last row wins if an email repeats inside the file
+    by_email = {email: (role, password, course_id) for email, role, password, course_id in batch}
+    existing = set(db.session.scalars(select(User.email).where(User.email.in_(by_email))))
+
+    new_emails = [e for e in by_email if e not in existing]
+    hashes = _hash_passwords([by_email[e][1] for e in new_emails], pool)
+    if new_emails:
+        rows = [
+            {"email": e, "password_hash": h, "role": by_email[e][0]}
+            for e, h in zip(new_emails, hashes)
+        ]
+        result.users_created += db.session.execute(insert_ignore(User), rows).rowcount or 0
+
+    user_ids = dict(db.session.execute(select(User.email, User.id).where(User.email.in_(by_email))).all())
+    enrollments = [
+        {"user_id": user_ids[e], "course_id": course_id, "role": role}
+        for e, (role, _password, course_id) in by_email.items()
+        if course_id is not None and e in user_ids
+    ]
+    if enrollments:
+        result.enrollments_created += db.session.execute(insert_ignore(Enrollment), enrollments).rowcount or 0
+    db.session.commit()
+    # Core inserts skip the ORM events that normally invalidate course lists
+    fragment_cache.invalidate(*(f"user:{uid}:courses" for uid in user_ids.values()))
+
+
+def import_roster_bytes(data, max_rows=None, **kwargs):
+    """
+    Convenience wrapper for uploaded files (UTF-8, optional BOM). With
+    ``max_rows``, a longer roster is refused before anything is written.
+    """
+    text = data.decode("utf-8-sig")
+    if max_rows is not None:
+        rows = sum(1 for _row in csv.reader(io.StringIO(text))) - 1
+        if rows > max_rows:
+            raise RosterError(
+                f"{rows} rows is more than the {max_rows} a web import takes; "
+                "use the \"flask roster import\" command for large rosters."
+            )
+    return import_roster(io.StringIO(text), **kwargs)
@@ -0,0 +1,145 @@
+"""
+Read/write routing between the primary database and a read engine.
+
+Views marked ``@read_only`` run their queries on the "read" bind: a
+replica (SQLALCHEMY_READ_URI), or with SQLITE_READ_ONLY_ENGINE the primary
+SQLite file opened a second time read-only, so page loads never queue
+behind the writer's lock (use SQLITE_PROFILE = "production", i.e. WAL).
+Everything else stays on the primary, and so does any write: flushes and
+INSERT/UPDATE/DELETE statements always go to the primary, and once a
+session has flushed, its later reads follow (a view that reads back what
+it just wrote sees it). Raw SQL writes through ``session.connection()``
+do not count as writes here; keep them out of read-only views.
+
+Read-your-writes across requests: a commit that wrote something marks the
+user's session cookie, and their read-only views use the primary for the
+next DB_READ_STICKY_SECONDS, so a student who just submitted sees the
+submission even if the replica is a little behind.
+
+Streamed responses keep the routing until they are closed, so queries a
+generator runs while the body is sent use the read bind too.
+
+Anything cached from a replica read can be older than the invalidation
+that preceded it, so the fragment cache serves hits in ``@read_only``
+views but only stores fragments rendered from the primary.
+
+Without a read bind configured, ``@read_only`` changes nothing.
+"""
+import functools
+import time
+
+from flask import Response, current_app, has_request_context, request, session as cookie_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, make_url
+from sqlalchemy.sql.dml import UpdateBase
+
+READ_BIND = "read"
+STICKY_KEY = "_db_primary_until"
+READ_ONLY_KEY = "app.db_read_only"  # request.environ flag set by @read_only
+
+
+def read_uri(config):
+    """URI of the read engine for ``config``, or None."""
+    if config.get("SQLALCHEMY_READ_URI"):
+        return config["SQLALCHEMY_READ_URI"]
+    if config.get("SQLITE_READ_ONLY_ENGINE"):
+        url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+        if url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:"):
+            return f"sqlite:///file:{url.database}?mode=ro&uri=true"
+    return None
+
+
+def configure(config):
+    """Add the read bind to SQLALCHEMY_BINDS (call before db.init_app)."""
+    from . import sqlite_tuning
+
+    uri = read_uri(config)
+    if uri is None:
+        return
+    binds = dict(config.get("SQLALCHEMY_BINDS") or {})
+    options = sqlite_tuning.engine_options({**config, "SQLALCHEMY_DATABASE_URI": uri})
+    binds[READ_BIND] = {"url": uri, **options}
+    config["SQLALCHEMY_BINDS"] = binds
+
+
+def init_app(app, db):
+    # The read bind has no tables of its own; keep create_all/drop_all off it
+    # (the metadata registry is shared by every app using this db object)
+    db.metadatas.pop(READ_BIND, None)
+
+
+class RoutingSession(Session):
+    """db.session class: sends reads in ``@read_only`` views to the read bind."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not isinstance(clause, UpdateBase) and uses_read_bind(self):
+            return self._db.engines[READ_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _read_only_request():
+    # Kept on the request, not the session: a streamed body runs after the
+    # view's app context (and its session) is gone, in a fresh one
+    return has_request_context() and request.environ.get(READ_ONLY_KEY, False)
+
+
+def uses_read_bind(session):
+    """True if ``session``'s reads go to the read bind right now."""
+    return (
+        _read_only_request()
+        and not session.info.get("flushed")
+        and READ_BIND in session._db.engines
+    )
+
+
+def _sticky():
+    return cookie_session.get(STICKY_KEY, 0) > time.time()
+
+
+def read_only(view):
+    """
+    Mark a view as read-mostly: its queries may be served by the read bind,
+    including those a streamed response runs while its body is sent.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        from .models import db
+
+        if READ_BIND not in current_app.config.get("SQLALCHEMY_BINDS", {}) or _sticky():
+            return view(*args, **kwargs)
+        environ = request.environ
+        info = db.session.info
+        info.pop("flushed", None)
+        environ[READ_ONLY_KEY] = True
+        try:
+            rv = view(*args, **kwargs)
+        except BaseException:
+            environ.pop(READ_ONLY_KEY, None)
+            raise
+        finally:
+            info.pop("flushed", None)
+        if isinstance(rv, Response) and rv.is_streamed:
+            rv.call_on_close(lambda: environ.pop(READ_ONLY_KEY, None))
+        else:
+            environ.pop(READ_ONLY_KEY, None)
+        return rv
+    return wrapper
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _note_write(session, flush_context):
+    # "flushed" keeps this session's reads on the primary, "wrote" marks the transaction
+    session.info["flushed"] = session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _stick_to_primary(session):
+    if session.info.pop("wrote", False) and has_request_context():
+        seconds = current_app.config.get("DB_READ_STICKY_SECONDS", 0)
+        if seconds and READ_BIND in current_app.config.get("SQLALCHEMY_BINDS", {}):
+            cookie_session[STICKY_KEY] = time.time() + seconds
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _forget_write(session):
+    session.info.pop("wrote", None)
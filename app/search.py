@@ -0,0 +1,447 @@
+"""
+Full-text search over assignments, feedback and PDF text (SQLite FTS5).
+
+``search_index`` is an FTS5 table with one row per searchable document:
+
+    assignment      Assignment.title / description
+    prompt_pdf      text of the assignment's prompt PDF
+    comment         Submission.general_comment
+    submission_pdf  text of the student's PDF
+    graded_pdf      text of the graded PDF
+    rubric_comment  SubmissionRubricScore.comment (title: the rubric item label)
+
+Each row's rowid is ``source id * 8 + kind code``, so a document is
+replaced or removed by rowid without scanning the index. Its ``scope``
+column holds tokens for the course (``c12``), kind (``k3``) and owning
+student (``u7``, or ``public`` for assignment documents), so course, kind
+and role filters are part of the MATCH and are answered from the index
+instead of by checking every matching row.
+
+Mapper events note which documents a flush touched and the after_flush
+hook re-reads them from their tables in the same transaction, so the index
+commits or rolls back with the data. PDF text is added by the upload job
+(tasks.inspect_uploaded_pdf); changing a file drops the old text at once.
+Writes that bypass the ORM (grading.apply_grades' rubric upsert) call
+``refresh()`` themselves.
+
+``search()`` ranks with bm25 (titles weigh more than bodies) and scopes
+students to their courses and their own submissions. ``rebuild()`` /
+``flask search rebuild [--pdfs]`` recreates the index from the tables.
+Text in scanned PDFs is only found if the scanner added a text layer.
+"""
+import os
+import re
+from dataclasses import dataclass
+
+from markupsafe import Markup, escape
+from sqlalchemy import DDL, bindparam, event, inspect, select, text
+from sqlalchemy.orm import Session, object_session
+
+from .models import db, Assignment, Enrollment, Submission, RubricItem, SubmissionRubricScore
+
+TABLE = "search_index"
+
+KINDS = {
+    "assignment": 1,
+    "prompt_pdf": 2,
+    "comment": 3,
+    "submission_pdf": 4,
+    "graded_pdf": 5,
+    "rubric_comment": 6,
+}
+PDF_KINDS = {"prompt_pdf": "prompt_file_path", "submission_pdf": "student_file_path",
+             "graded_pdf": "graded_file_path"}
+STUDENT_KINDS = ("comment", "submission_pdf", "graded_pdf", "rubric_comment")
+
+TITLE_WEIGHT = 5.0
+MAX_PDF_CHARS = 200_000
+
+_CREATE = DDL(
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+    "title, body, scope, kind UNINDEXED, course_id UNINDEXED, assignment_id UNINDEXED, "
+    "student_id UNINDEXED, ref_id UNINDEXED, tokenize='porter unicode61 remove_diacritics 2')"
+)
+event.listen(db.metadata, "after_create", _CREATE.execute_if(dialect="sqlite"))
+event.listen(db.metadata, "before_drop", DDL(f"DROP TABLE IF EXISTS {TABLE}").execute_if(dialect="sqlite"))
+
+_COLUMNS = (
+    f"INSERT INTO {TABLE} (rowid, title, body, scope, kind, course_id, assignment_id, student_id, ref_id) "
+)
+
+
+def _scope_sql(kind, student_column=None):
+    owner = f"' u' || {student_column}" if student_column else "' public'"
+    return f"'c' || a.course_id || ' k{KINDS[kind]}' || {owner}"
+
+
+# Text documents re-read from their tables; {where} filters on :ids
+_SOURCES = {
+    "assignment": (
+        "a.id",
+        f"SELECT a.id * 8 + 1, a.title, coalesce(a.description, ''), {_scope_sql('assignment')}, "
+        "'assignment', a.course_id, a.id, NULL, a.id "
+        "FROM assignment a WHERE {where}",
+    ),
+    "comment": (
+        "s.id",
+        f"SELECT s.id * 8 + 3, '', s.general_comment, {_scope_sql('comment', 's.student_id')}, "
+        "'comment', a.course_id, a.id, s.student_id, s.id "
+        "FROM submission s JOIN assignment a ON a.id = s.assignment_id "
+        "WHERE coalesce(s.general_comment, '') != '' AND {where}",
+    ),
+    "rubric_comment": (
+        "r.id",
+        f"SELECT r.id * 8 + 6, ri.label, r.comment, {_scope_sql('rubric_comment', 's.student_id')}, "
+        "'rubric_comment', a.course_id, a.id, s.student_id, s.id "
+        "FROM submission_rubric_score r "
+        "JOIN rubric_item ri ON ri.id = r.rubric_item_id "
+        "JOIN submission s ON s.id = r.submission_id "
+        "JOIN assignment a ON a.id = s.assignment_id "
+        "WHERE coalesce(r.comment, '') != '' AND {where}",
+    ),
+}
+
+
+def _rowids(kind, ids):
+    return [i * 8 + KINDS[kind] for i in ids]
+
+
+def available(connection):
+    """Whether this database has the search index (SQLite with FTS5, migrated)."""
+    if connection.dialect.name != "sqlite":
+        return False
+    return connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": TABLE}
+    ).first() is not None
+
+
+def _delete(connection, rowids):
+    if rowids:
+        connection.execute(
+            text(f"DELETE FROM {TABLE} WHERE rowid IN :rowids").bindparams(bindparam("rowids", expanding=True)),
+            {"rowids": list(rowids)},
+        )
+
+
+def refresh(kind, ids, connection=None):
+    """Re-read the ``kind`` documents for these source ids into the index."""
+    connection = connection or db.session.connection()
+    ids = sorted(set(ids))
+    if not ids or not available(connection):
+        return
+    _delete(connection, _rowids(kind, ids))
+    key, sql = _SOURCES[kind]
+    connection.execute(
+        text(_COLUMNS + sql.format(where=f"{key} IN :ids")).bindparams(bindparam("ids", expanding=True)),
+        {"ids": ids},
+    )
+
+
+def refresh_rubric_comments(submission_ids, connection=None):
+    """Reindex every rubric comment of these submissions."""
+    connection = connection or db.session.connection()
+    score_ids = connection.execute(
+        select(SubmissionRubricScore.id).where(SubmissionRubricScore.submission_id.in_(list(submission_ids)))
+    ).scalars().all()
+    refresh("rubric_comment", score_ids, connection)
+
+
+# --- keeping the index in step with ORM writes ---------------------------
+
+def _note(target, op, kind, ident=None):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("search_ops", set()).add((op, kind, ident if ident is not None else target.id))
+
+
+def _changed(target, *columns):
+    state = inspect(target)
+    return any(state.attrs[col].history.has_changes() for col in columns)
+
+
+@event.listens_for(Assignment, "after_insert")
+@event.listens_for(Assignment, "after_update")
+def _assignment_written(mapper, connection, target):
+    if _changed(target, "title", "description", "course_id"):
+        _note(target, "refresh", "assignment")
+    if _changed(target, "prompt_file_path"):
+        _note(target, "drop", "prompt_pdf")
+
+
+@event.listens_for(Assignment, "after_update")
+def _assignment_moved(mapper, connection, target):
+    if _changed(target, "course_id"):
+        _note(target, "move", "assignment")
+
+
+@event.listens_for(Assignment, "after_delete")
+def _assignment_deleted(mapper, connection, target):
+    _note(target, "drop", "assignment")
+    _note(target, "drop", "prompt_pdf")
+
+
+@event.listens_for(Submission, "after_insert")
+@event.listens_for(Submission, "after_update")
+def _submission_written(mapper, connection, target):
+    if _changed(target, "general_comment", "assignment_id", "student_id"):
+        _note(target, "refresh", "comment")
+    if _changed(target, "student_file_path"):
+        _note(target, "drop", "submission_pdf")
+    if _changed(target, "graded_file_path"):
+        _note(target, "drop", "graded_pdf")
+
+
+@event.listens_for(Submission, "after_delete")
+def _submission_deleted(mapper, connection, target):
+    for kind in ("comment", "submission_pdf", "graded_pdf"):
+        _note(target, "drop", kind)
+
+
+@event.listens_for(SubmissionRubricScore, "after_insert")
+@event.listens_for(SubmissionRubricScore, "after_update")
+def _score_written(mapper, connection, target):
+    if _changed(target, "comment", "submission_id", "rubric_item_id"):
+        _note(target, "refresh", "rubric_comment")
+
+
+@event.listens_for(SubmissionRubricScore, "after_delete")
+def _score_deleted(mapper, connection, target):
+    _note(target, "drop", "rubric_comment")
+
+
+@event.listens_for(RubricItem, "after_update")
+def _rubric_item_renamed(mapper, connection, target):
+    if _changed(target, "label"):
+        _note(target, "relabel", "rubric_comment")
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_ops(session, flush_context):
+    ops = session.info.pop("search_ops", None)
+    if not ops:
+        return
+    connection = session.connection()
+    if not available(connection):
+        return
+    grouped = {}
+    for op, kind, ident in ops:
+        grouped.setdefault((op, kind), set()).add(ident)
+    for (op, kind), ids in grouped.items():
+        if op == "drop":
+            _delete(connection, _rowids(kind, ids))
+    for (op, kind), ids in grouped.items():
+        if op == "refresh":
+            refresh(kind, ids, connection)
+        elif op == "relabel":
+            refresh(kind, connection.execute(
+                select(SubmissionRubricScore.id).where(SubmissionRubricScore.rubric_item_id.in_(ids))
+            ).scalars().all(), connection)
+        elif op == "move":
+            # Rare: an assignment changed course; fix every document under it
+            new_course = "(SELECT course_id FROM assignment WHERE id = assignment_id)"
+            connection.execute(
+                text(
+                    f"UPDATE {TABLE} SET course_id = {new_course}, "
+                    f"scope = replace(scope, 'c' || course_id || ' ', 'c' || {new_course} || ' ') "
+                    "WHERE assignment_id IN :ids"
+                ).bindparams(bindparam("ids", expanding=True)),
+                {"ids": sorted(ids)},
+            )
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_ops(session):
+    session.info.pop("search_ops", None)
+
+
+# --- PDF text -------------------------------------------------------------
+
+def index_pdf_text(kind, ident, body, connection=None):
+    """Store extracted text for one PDF document (kind in PDF_KINDS)."""
+    connection = connection or db.session.connection()
+    if not available(connection):
+        return
+    rowid = _rowids(kind, [ident])[0]
+    _delete(connection, [rowid])
+    if not body.strip():
+        return
+    if kind == "prompt_pdf":
+        source = (
+            f"SELECT :rowid, '', :body, {_scope_sql(kind)}, :kind, a.course_id, a.id, NULL, a.id "
+            "FROM assignment a WHERE a.id = :id"
+        )
+    else:
+        source = (
+            f"SELECT :rowid, '', :body, {_scope_sql(kind, 's.student_id')}, :kind, a.course_id, a.id, s.student_id, s.id "
+            "FROM submission s JOIN assignment a ON a.id = s.assignment_id WHERE s.id = :id"
+        )
+    connection.execute(text(_COLUMNS + source), {"rowid": rowid, "body": body, "kind": kind, "id": ident})
+
+
+def _documents_for_path(path):
+    """(kind, id) of every document whose file is ``path``."""
+    docs = [("prompt_pdf", aid) for aid in db.session.scalars(
+        select(Assignment.id).where(Assignment.prompt_file_path == path))]
+    for sid, student_path, graded_path in db.session.execute(
+        select(Submission.id, Submission.student_file_path, Submission.graded_file_path)
+        .where((Submission.student_file_path == path) | (Submission.graded_file_path == path))
+    ):
+        if student_path == path:
+            docs.append(("submission_pdf", sid))
+        if graded_path == path:
+            docs.append(("graded_pdf", sid))
+    return docs
+
+
+def index_uploaded_pdf(path, absolute_path):
+    """
+    Index the text of an uploaded PDF for every row that references it
+    (in the current transaction). Returns the number of characters indexed.
+    """
+    from .pdf import extract_text
+
+    docs = _documents_for_path(path)
+    if not docs or not available(db.session.connection()):
+        return 0
+    body = extract_text(absolute_path, MAX_PDF_CHARS)
+    for kind, ident in docs:
+        index_pdf_text(kind, ident, body)
+    return len(body)
+
+
+# --- rebuild ----------------------------------------------------------------
+
+def rebuild(pdfs=False, connection=None):
+    """
+    Recreate the index from the tables. PDF text is re-extracted only with
+    ``pdfs=True`` (slow); otherwise existing PDF rows are kept. Returns the
+    number of documents indexed.
+    """
+    connection = connection or db.session.connection()
+    connection.execute(_CREATE)
+    keep = [] if pdfs else [KINDS[k] for k in PDF_KINDS]
+    if keep:
+        connection.execute(
+            text(f"DELETE FROM {TABLE} WHERE rowid % 8 NOT IN :keep").bindparams(bindparam("keep", expanding=True)),
+            {"keep": keep},
+        )
+    else:
+        connection.execute(text(f"DELETE FROM {TABLE}"))
+    for _key, sql in _SOURCES.values():
+        connection.execute(text(_COLUMNS + sql.format(where="1 = 1")))
+
+    if pdfs:
+        from flask import current_app
+        from .pdf import extract_text
+
+        folder = str(current_app.config["UPLOAD_FOLDER"])
+        extracted = {}
+        files = [("prompt_pdf", aid, path) for aid, path in connection.execute(
+            select(Assignment.id, Assignment.prompt_file_path).where(Assignment.prompt_file_path.isnot(None)))]
+        for sid, student_path, graded_path in connection.execute(
+            select(Submission.id, Submission.student_file_path, Submission.graded_file_path)
+        ):
+            files += [("submission_pdf", sid, student_path), ("graded_pdf", sid, graded_path)]
+        for kind, ident, path in files:
+            if not path:
+                continue
+            if path not in extracted:
+                try:
+                    extracted[path] = extract_text(os.path.join(folder, path), MAX_PDF_CHARS)
+                except OSError:
+                    extracted[path] = ""
+            index_pdf_text(kind, ident, extracted[path], connection)
+
+    connection.execute(text(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')"))
+    return connection.execute(text(f"SELECT count(*) FROM {TABLE}")).scalar()
+
+
+# --- querying ---------------------------------------------------------------
+
+_TERM_RE = re.compile(r'"([^"]*)"|(\S+)')
+_WORD_RE = re.compile(r"\w+")
+
+
+def match_expression(query):
+    """
+    Turn user input into a safe FTS5 query: every word must match, "quoted
+    text" is a phrase and a trailing * makes a prefix search.
+    """
+    terms = []
+    for phrase, word in _TERM_RE.findall(query or ""):
+        words = _WORD_RE.findall(phrase or word)
+        if not words:
+            continue
+        term = '"' + " ".join(words) + '"'
+        if word and word.endswith("*"):
+            term += "*"
+        terms.append(term)
+    return " ".join(terms)
+
+
+@dataclass
+class SearchHit:
+    kind: str
+    course_id: int
+    course_code: str
+    assignment_id: int
+    assignment_title: str
+    submission_id: int | None
+    student_email: str | None
+    title: str
+    snippet: Markup
+    rank: float
+
+
+def _snippet_html(raw):
+    return Markup(str(escape(raw)).replace("\x02", "<mark>").replace("\x03", "</mark>"))
+
+
+def search(query, user, course_id=None, kinds=None, limit=20, offset=0):
+    """Best-matching documents for ``user``, as SearchHits (empty if nothing to search)."""
+    match = match_expression(query)
+    if not match or not available(db.session.connection()):
+        return []
+    filters = []
+    if course_id is not None:
+        filters.append(f"scope : c{int(course_id)}")
+    if kinds:
+        codes = [f"k{KINDS[k]}" for k in kinds if k in KINDS]
+        filters.append(f"scope : ({' OR '.join(codes) or 'k0'})")
+    if user.role != "instructor":
+        courses = db.session.scalars(select(Enrollment.course_id).where(Enrollment.user_id == user.id)).all()
+        public = f"(scope : public AND scope : ({' OR '.join(f'c{c}' for c in courses)}))" if courses else ""
+        filters.append(f"(scope : u{int(user.id)}" + (f" OR {public})" if public else ")"))
+    match = " AND ".join([f"{{title body}} : ({match})"] + filters)
+
+    # Rank and cut inside FTS5 first; joins and snippets only for the page shown
+    stmt = text(
+        f"SELECT {TABLE}.kind, {TABLE}.course_id, c.code, {TABLE}.assignment_id, a.title, {TABLE}.student_id, "
+        f"{TABLE}.ref_id, u.email, {TABLE}.title, snippet({TABLE}, 1, char(2), char(3), '…', 16), top.rank "
+        f"FROM (SELECT rowid AS id, bm25({TABLE}, {TITLE_WEIGHT}, 1.0, 0.0) AS rank FROM {TABLE} "
+        f"      WHERE {TABLE} MATCH :match ORDER BY rank LIMIT :limit OFFSET :offset) AS top "
+        f"JOIN {TABLE} ON {TABLE}.rowid = top.id "
+        f"JOIN assignment a ON a.id = {TABLE}.assignment_id "
+        f"JOIN course c ON c.id = {TABLE}.course_id "
+        f'LEFT JOIN "user" u ON u.id = {TABLE}.student_id '
+        f"WHERE {TABLE} MATCH :match "
+        "ORDER BY top.rank"
+    )
+    params = {"match": match, "limit": limit, "offset": offset}
+    hits = []
+    for kind, cid, code, aid, atitle, student_id, ref_id, email, title, snippet, rank in db.session.execute(
+        stmt, params
+    ):
+        hits.append(SearchHit(
+            kind=kind,
+            course_id=cid,
+            course_code=code,
+            assignment_id=aid,
+            assignment_title=atitle,
+            submission_id=ref_id if kind in STUDENT_KINDS else None,
+            student_email=email,
+            title=title,
+            snippet=_snippet_html(snippet),
+            rank=rank,
+        ))
+    return hits
@@ -0,0 +1,91 @@
+"""
+Serving uploaded files once the view has done its auth checks.
+
+UPLOAD_SERVE_BACKEND picks who moves the bytes:
+
+- "python" (default): Flask streams the file itself, honouring Range and
+  If-None-Match.
+- "x-sendfile": Apache/lighttpd style; the response carries X-Sendfile with
+  the absolute path and the front server sends the file.
+- "x-accel-redirect": nginx style; the response carries X-Accel-Redirect
+  pointing at an internal location (UPLOAD_ACCEL_PREFIX) that maps to
+  UPLOAD_FOLDER.
+
+Blob-store files are immutable and named by their SHA-256, so that hash is
+used as a strong ETag and browsers may cache them for a long time.
+"""
+import mimetypes
+import os
+
+from flask import current_app, request, send_from_directory, abort
+from werkzeug.security import safe_join
+
+from .blobstore import sha_from_path
+from .uploads import upload_folder
+
+BACKENDS = ("python", "x-sendfile", "x-accel-redirect")
+
+# Content-addressed files never change, so let the browser keep them
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def init_app(app):
+    """Reject a misspelled backend at startup rather than on every download."""
+    backend = app.config["UPLOAD_SERVE_BACKEND"]
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown UPLOAD_SERVE_BACKEND {backend!r}; expected one of {BACKENDS}")
+
+
+def send_upload(filename):
+    folder = upload_folder()
+    path = safe_join(folder, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    backend = current_app.config["UPLOAD_SERVE_BACKEND"]
+    sha = sha_from_path(filename)
+    max_age = IMMUTABLE_MAX_AGE if sha else None
+
+    if backend == "python":
+        response = send_from_directory(
+            folder,
+            filename,
+            etag=sha if sha else True,
+            conditional=True,
+            max_age=max_age,
+        )
+    else:
+        response = _offload(backend, filename, path, sha)
+
+    # Uploads sit behind login; shared caches must not keep them
+    response.cache_control.private = True
+    if sha:
+        response.cache_control.immutable = True
+    return response
+
+
+def _offload(backend, filename, path, sha):
+    """Empty response telling the front server which file to send."""
+    etag = sha or _fallback_etag(path)
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    response = current_app.response_class(mimetype=mimetype)
+    if backend == "x-sendfile":
+        response.headers["X-Sendfile"] = path
+    else:
+        prefix = current_app.config.get("UPLOAD_ACCEL_PREFIX", "/protected-uploads/")
+        response.headers["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + filename.lstrip("/")
+    response.set_etag(etag)
+    if sha:
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+    return response
+
+
+def _fallback_etag(path):
+    # Legacy (non-blob) uploads: mtime/size based, like Werkzeug's default
+    stat = os.stat(path)
+    return f"{stat.st_mtime}-{stat.st_size}"
@@ -0,0 +1,117 @@
+"""
+SQLite engine profiles.
+
+SQLITE_PROFILE = "default" leaves SQLite's stock settings alone. "production"
+switches to WAL (readers no longer block the writer and vice versa), relaxes
+fsync to synchronous=NORMAL (safe with WAL), and gives each connection a
+bigger page cache and memory-mapped reads. Every profile sets a busy timeout
+so concurrent writers wait for the lock instead of failing straight away
+with "database is locked".
+
+SQLITE_PRAGMAS overrides or extends the profile's pragmas, and
+SQLITE_BEGIN_MODE = "immediate" makes every transaction take the write lock
+up front. That avoids the SQLITE_BUSY a deferred transaction gets when it
+tries to upgrade from reading to writing after another writer committed
+(which the busy timeout cannot retry), at the cost of serializing
+transactions that only read.
+"""
+from sqlalchemy import event
+
+PROFILES = {
+    "default": {
+        "busy_timeout": 5000,
+    },
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 15000,
+        "cache_size": -64000,  # KiB, i.e. 64 MB per connection
+        "mmap_size": 268435456,  # 256 MB
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 1000,
+    },
+}
+
+# Pool settings merged into SQLALCHEMY_ENGINE_OPTIONS for file databases
+POOL_OPTIONS = {
+    "default": {},
+    "production": {"pool_size": 10, "max_overflow": 20, "pool_timeout": 30},
+}
+
+BEGIN_MODES = ("deferred", "immediate")
+
+
+def is_sqlite_file(uri):
+    return uri.startswith("sqlite") and ":memory:" not in uri and uri not in ("sqlite://", "sqlite:///")
+
+
+def _profile(config):
+    profile = config.get("SQLITE_PROFILE", "default")
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown SQLITE_PROFILE {profile!r}; expected one of {tuple(PROFILES)}")
+    return profile
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured profile (call before db.init_app)."""
+    options = dict(config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    uri = config.get("SQLALCHEMY_DATABASE_URI", "")
+    if not is_sqlite_file(uri):
+        return options
+    profile = _profile(config)
+    for key, value in POOL_OPTIONS[profile].items():
+        options.setdefault(key, value)
+    connect_args = dict(options.get("connect_args") or {})
+    # sqlite3's own busy wait, in seconds; matches busy_timeout below
+    connect_args.setdefault("timeout", PROFILES[profile]["busy_timeout"] / 1000)
+    connect_args.setdefault("check_same_thread", False)
+    options["connect_args"] = connect_args
+    return options
+
+
+def pragmas(config):
+    values = dict(PROFILES[_profile(config)])
+    values.update(config.get("SQLITE_PRAGMAS") or {})
+    return values
+
+
+# Pragmas that change the database file; a read engine only queries
+WRITE_PRAGMAS = ("journal_mode", "wal_autocheckpoint")
+
+
+def _install(engine, values, begin_mode):
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        if begin_mode == "immediate":
+            # Let us emit BEGIN ourselves (see _begin below)
+            dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in values.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    if begin_mode == "immediate":
+        @event.listens_for(engine, "begin")
+        def _begin(conn):
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def init_app(app, db):
+    """Install connect/begin hooks on the app's SQLite engines (the primary and any read engine)."""
+    from .routing import READ_BIND
+
+    values = pragmas(app.config)
+    begin_mode = app.config.get("SQLITE_BEGIN_MODE", "deferred")
+    if begin_mode not in BEGIN_MODES:
+        raise ValueError(f"Unknown SQLITE_BEGIN_MODE {begin_mode!r}; expected one of {BEGIN_MODES}")
+
+    with app.app_context():
+        engines = dict(db.engines)
+    for key, engine in engines.items():
+        if engine.dialect.name != "sqlite":
+            continue
+        if key == READ_BIND:
+            read_values = {k: v for k, v in values.items() if k not in WRITE_PRAGMAS}
+            _install(engine, {**read_values, "query_only": 1}, "deferred")
+        else:
+            _install(engine, values, begin_mode)
@@ -0,0 +1,264 @@
+"""
+Per-assignment submission and score statistics.
+
+``assignment_stats`` keeps, for every assignment, the number of submitted
+and graded submissions, the sum and sum of squares of the scores (so mean
+and standard deviation are O(1)), min/max and a fixed-bin histogram. The
+row is updated incrementally in the same transaction as the submission
+change: mapper events record each submission's old and new contribution,
+and after the flush one UPDATE per touched assignment applies the net
+change. Min/max are only recomputed from the submissions when a score equal
+to the current extreme goes away.
+
+``rebuild()`` recomputes rows from scratch (also used by the migration that
+adds the table) and ``check()`` reports rows that disagree with the data;
+both are exposed as ``flask stats rebuild`` / ``flask stats check``.
+"""
+import json
+import math
+
+from sqlalchemy import Integer, case, cast, event, func, inspect, select, true, update
+from sqlalchemy.orm import Session, object_session
+
+from .models import db, Assignment, AssignmentStats, Submission
+
+# Histogram: BIN_COUNT bins of BIN_WIDTH points; the last bin also takes
+# everything above it.
+BIN_WIDTH = 10.0
+BIN_COUNT = 10
+
+WATCHED_COLUMNS = ("assignment_id", "student_file_path", "total_score")
+
+
+def score_bin(score):
+    return min(max(int(score // BIN_WIDTH), 0), BIN_COUNT - 1)
+
+
+def _empty_delta():
+    return {"submitted": 0, "graded": 0, "sum": 0.0, "sumsq": 0.0,
+            "bins": [0] * BIN_COUNT, "added": [], "removed": []}
+
+
+def _record(session, values, sign):
+    """Add (sign=1) or remove (sign=-1) one submission's contribution."""
+    assignment_id, file_path, score = values
+    if assignment_id is None:
+        return
+    deltas = session.info.setdefault("stats_deltas", {})
+    delta = deltas.setdefault(assignment_id, _empty_delta())
+    if file_path is not None:
+        delta["submitted"] += sign
+    # Non-finite scores (older rows; the forms reject them now) count as ungraded
+    if score is not None and math.isfinite(score):
+        delta["graded"] += sign
+        delta["sum"] += sign * score
+        delta["sumsq"] += sign * score * score
+        delta["bins"][score_bin(score)] += sign
+        delta["added" if sign > 0 else "removed"].append(score)
+
+
+def _current(target):
+    return tuple(getattr(target, col) for col in WATCHED_COLUMNS)
+
+
+def _previous(connection, target):
+    state = inspect(target)
+    values = []
+    for col in WATCHED_COLUMNS:
+        history = state.attrs[col].history
+        if history.deleted:
+            values.append(history.deleted[0])
+        elif history.added:
+            # Set on an expired instance, so the old value was never loaded
+            row = connection.execute(
+                select(*(getattr(Submission, c) for c in WATCHED_COLUMNS))
+                .where(Submission.id == target.id)
+            ).one()
+            return tuple(row)
+        else:
+            values.append(getattr(target, col))
+    return tuple(values)
+
+
+@event.listens_for(Submission, "after_insert")
+def _submission_inserted(mapper, connection, target):
+    _record(object_session(target), _current(target), 1)
+
+
+@event.listens_for(Submission, "before_update")
+def _submission_updating(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[col].history.has_changes() for col in WATCHED_COLUMNS):
+        return
+    session = object_session(target)
+    _record(session, _previous(connection, target), -1)
+    _record(session, _current(target), 1)
+
+
+@event.listens_for(Submission, "before_delete")
+def _submission_deleted(mapper, connection, target):
+    _record(object_session(target), _previous(connection, target), -1)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_deltas(session, flush_context):
+    deltas = session.info.pop("stats_deltas", None)
+    if not deltas:
+        return
+    connection = session.connection()
+    missing = []
+    for assignment_id, delta in deltas.items():
+        table = AssignmentStats.__table__
+        updated = connection.execute(
+            update(table)
+            .where(table.c.assignment_id == assignment_id)
+            .values(
+                submitted_count=table.c.submitted_count + delta["submitted"],
+                graded_count=table.c.graded_count + delta["graded"],
+                score_sum=table.c.score_sum + delta["sum"],
+                score_sumsq=table.c.score_sumsq + delta["sumsq"],
+            )
+        ).rowcount
+        if not updated:
+            missing.append(assignment_id)
+        elif delta["added"] or delta["removed"]:
+            # The UPDATE above holds the row lock, so this read-modify-write is safe
+            _update_distribution(connection, assignment_id, delta)
+    if missing:
+        rebuild(missing, connection=connection)
+
+
+def _update_distribution(connection, assignment_id, delta):
+    table = AssignmentStats.__table__
+    lo, hi, histogram = connection.execute(
+        select(table.c.score_min, table.c.score_max, table.c.histogram)
+        .where(table.c.assignment_id == assignment_id)
+    ).one()
+    bins = json.loads(histogram or "[]") or [0] * BIN_COUNT
+    bins = [count + change for count, change in zip(bins, delta["bins"])]
+
+    removed = delta["removed"]
+    if (lo is not None and lo in removed) or (hi is not None and hi in removed):
+        lo, hi = connection.execute(
+            select(func.min(Submission.total_score), func.max(Submission.total_score))
+            .where(Submission.assignment_id == assignment_id)
+        ).one()
+    elif delta["added"]:
+        lo = min(delta["added"] + ([lo] if lo is not None else []))
+        hi = max(delta["added"] + ([hi] if hi is not None else []))
+
+    connection.execute(
+        update(table)
+        .where(table.c.assignment_id == assignment_id)
+        .values(score_min=lo, score_max=hi, histogram=json.dumps(bins))
+    )
+
+
+def compute(assignment_ids=None, connection=None):
+    """Fresh stats computed from the submissions: {assignment_id: {column: value}}."""
+    connection = connection or db.session.connection()
+    assignments = select(Assignment.id)
+    if assignment_ids is not None:
+        assignments = assignments.where(Assignment.id.in_(assignment_ids))
+    result = {
+        aid: {
+            "submitted_count": 0, "graded_count": 0, "score_sum": 0.0, "score_sumsq": 0.0,
+            "score_min": None, "score_max": None, "histogram": [0] * BIN_COUNT,
+        }
+        for aid in connection.execute(assignments).scalars()
+    }
+    if not result:
+        return result
+
+    score = Submission.total_score
+    in_scope = true() if assignment_ids is None else Submission.assignment_id.in_(list(result))
+    totals = connection.execute(
+        select(
+            Submission.assignment_id,
+            func.count(Submission.student_file_path),
+            func.count(score),
+            func.coalesce(func.sum(score), 0.0),
+            func.coalesce(func.sum(score * score), 0.0),
+            func.min(score),
+            func.max(score),
+        )
+        .where(in_scope)
+        .group_by(Submission.assignment_id)
+    )
+    for aid, submitted, graded, total, sumsq, lo, hi in totals:
+        if aid not in result:
+            continue  # orphaned submission
+        result[aid].update(
+            submitted_count=submitted, graded_count=graded, score_sum=float(total),
+            score_sumsq=float(sumsq), score_min=lo, score_max=hi,
+        )
+
+    # Same binning as score_bin(), in SQL
+    bin_expr = case(
+        (score < 0, 0),
+        (score >= BIN_WIDTH * (BIN_COUNT - 1), BIN_COUNT - 1),
+        else_=cast(score / BIN_WIDTH, Integer),
+    )
+    bins = connection.execute(
+        select(Submission.assignment_id, bin_expr, func.count())
+        .where(in_scope, score.isnot(None))
+        .group_by(Submission.assignment_id, bin_expr)
+    )
+    for aid, index, count in bins:
+        if aid in result:
+            result[aid]["histogram"][index] = count
+    return result
+
+
+def rebuild(assignment_ids=None, connection=None):
+    """Recompute and store stats rows (all assignments by default). Returns the count."""
+    connection = connection or db.session.connection()
+    fresh = compute(assignment_ids, connection)
+    table = AssignmentStats.__table__
+    stale = table.delete()
+    if assignment_ids is not None:
+        stale = stale.where(table.c.assignment_id.in_(assignment_ids))
+    connection.execute(stale)
+    if fresh:
+        connection.execute(table.insert(), [
+            dict(values, assignment_id=aid, histogram=json.dumps(values["histogram"]))
+            for aid, values in fresh.items()
+        ])
+    return len(fresh)
+
+
+def check(connection=None):
+    """List of (assignment_id, column, stored, expected) where stored stats are wrong."""
+    connection = connection or db.session.connection()
+    fresh = compute(connection=connection)
+    stored = {
+        row.assignment_id: row._mapping
+        for row in connection.execute(select(AssignmentStats.__table__))
+    }
+    problems = []
+    for aid, expected in fresh.items():
+        row = stored.get(aid)
+        if row is None:
+            if expected["submitted_count"] or expected["graded_count"]:
+                problems.append((aid, "row", None, "missing"))
+            continue
+        for column, value in expected.items():
+            actual = json.loads(row[column]) if column == "histogram" else row[column]
+            if isinstance(value, float) and actual is not None:
+                ok = math.isclose(actual, value, rel_tol=1e-9, abs_tol=1e-6)
+            else:
+                ok = actual == value
+            if not ok:
+                problems.append((aid, column, actual, value))
+    for aid in stored.keys() - fresh.keys():
+        problems.append((aid, "row", "present", "no such assignment"))
+    return problems
+
+
+def stats_for_course(course_id):
+    """{assignment_id: AssignmentStats} for every assignment of a course that has a row."""
+    rows = (
+        AssignmentStats.query.join(Assignment, Assignment.id == AssignmentStats.assignment_id)
+        .filter(Assignment.course_id == course_id)
+    )
+    return {row.assignment_id: row for row in rows}
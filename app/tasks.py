@@ -0,0 +1,32 @@
+"""Job handlers run by the background workers (see jobs.py)."""
+import logging
+import os
+
+from flask import current_app
+
+from .jobs import job_handler
+from .pdf import inspect_pdf
+
+log = logging.getLogger(__name__)
+
+
+def upload_path(filename):
+    return os.path.join(str(current_app.config["UPLOAD_FOLDER"]), filename)
+
+
+@job_handler("inspect_pdf")
+def inspect_uploaded_pdf(path):
+    """Validate an uploaded PDF, count its pages, build its previews and index its text."""
+    result = inspect_pdf(upload_path(path))
+    if result["valid"]:
+        from . import previews, search
+        try:
+            previews.build(path, result["pages"])
+        except Exception:
+            # Previews are a convenience; the inspection result still stands
+            log.exception("Building previews for %s failed", path)
+        try:
+            search.index_uploaded_pdf(path, upload_path(path))
+        except Exception:
+            log.exception("Indexing the text of %s failed", path)
+    return result
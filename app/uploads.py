@@ -0,0 +1,74 @@
+"""
+Shared upload pipeline for PDFs (assignment prompts, submissions, graded files).
+
+Uploads are copied from the request stream in fixed-size chunks into a temp
+file inside UPLOAD_FOLDER, hashed with SHA-256 on the way through, and then
+atomically renamed into the content-addressed blob store (see blobstore.py).
+Memory use per upload is one chunk, no matter how large the file is.
+"""
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+
+from flask import current_app
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from . import blobstore
+
+CHUNK_SIZE = 64 * 1024
+
+
+class UploadTooLarge(RequestEntityTooLarge):
+    description = "The uploaded file exceeds the maximum allowed size."
+
+
+@dataclass
+class StoredUpload:
+    filename: str  # name relative to UPLOAD_FOLDER (what the models store)
+    size: int
+    sha256: str
+
+
+def upload_folder():
+    folder = str(current_app.config["UPLOAD_FOLDER"])
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def save_upload(file):
+    """
+    Stream a Werkzeug FileStorage into the blob store.
+
+    The returned ``filename`` is the blob path to store on the model; identical
+    content always maps to the same path. Raises UploadTooLarge (HTTP 413) if
+    the file is bigger than MAX_CONTENT_LENGTH; nothing is left behind then.
+    """
+    folder = upload_folder()
+    max_size = current_app.config.get("MAX_CONTENT_LENGTH")
+    chunk_size = current_app.config.get("UPLOAD_CHUNK_SIZE", CHUNK_SIZE)
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = file.stream.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise UploadTooLarge()
+                digest.update(chunk)
+                out.write(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+        sha256 = digest.hexdigest()
+        filename = blobstore.store(tmp_path, sha256, folder)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return StoredUpload(filename=filename, size=size, sha256=sha256)
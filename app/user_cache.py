@@ -0,0 +1,147 @@
+"""
+Identity cache for Flask-Login's user_loader.
+
+Authenticated requests only need a user's id, email and role, so instead of
+loading the User row on every request we keep a compact record in a
+TTL-bounded cache. The storage is pluggable:
+
+- LRUBackend (default): in-process, bounded, thread-safe.
+- SerializingBackend: stores JSON strings like a shared cache (Redis,
+  memcached) would; used in tests as a stand-in for one.
+- Any object with get(key) / set(key, value, ttl) / delete(key) methods.
+
+The backends live in cache.py and are shared with the fragment cache.
+
+Entries are dropped whenever a User's email, role or password hash is
+updated, or the user is deleted. Only the committing process sees that
+eviction, so with the in-process default every other server process can
+keep serving the old role until its entry expires. Records are therefore
+kept USER_CACHE_LOCAL_TTL seconds (a few) in-process, and USER_CACHE_TTL
+only with a shared USER_CACHE_BACKEND, where evictions reach everyone.
+"""
+from flask_login import UserMixin
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from .cache import LRUBackend, SerializingBackend  # noqa: F401 (re-exported)
+from .models import db, User
+
+# Columns whose change must evict the cached record
+WATCHED_COLUMNS = ("email", "role", "password_hash")
+
+
+class CachedUser(UserMixin):
+    """Read-only stand-in for User, holding just what requests need."""
+
+    def __init__(self, id, email, role):
+        self.id = id
+        self.email = email
+        self.role = role
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.email, user.role)
+
+    def to_record(self):
+        return {"id": self.id, "email": self.email, "role": self.role}
+
+    @classmethod
+    def from_record(cls, record):
+        return cls(record["id"], record["email"], record["role"])
+
+    def __repr__(self):
+        return f"<CachedUser {self.email}>"
+
+
+class UserCache:
+    def __init__(self, backend=None, ttl=300):
+        self.backend = backend or LRUBackend()
+        self.ttl = ttl
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.enabled = app.config.get("USER_CACHE_ENABLED", True)
+        backend = app.config.get("USER_CACHE_BACKEND")
+        if backend is not None:
+            self.backend = backend() if callable(backend) else backend
+            self.ttl = app.config.get("USER_CACHE_TTL", self.ttl)
+        else:
+            # Fresh in-process cache per app, so ids never leak between databases.
+            # Other processes never see our evictions: bound how stale a role can get.
+            self.backend = LRUBackend(maxsize=app.config.get("USER_CACHE_SIZE", 10000))
+            self.ttl = app.config.get("USER_CACHE_LOCAL_TTL", 5)
+        self.reset_stats()
+
+    @staticmethod
+    def key(user_id):
+        return f"user:{user_id}"
+
+    def load(self, user_id):
+        """Return a CachedUser for user_id, or None if there is no such user."""
+        if not self.enabled:
+            user = db.session.get(User, user_id)
+            return CachedUser.from_user(user) if user else None
+
+        record = self.backend.get(self.key(user_id))
+        if record is not None:
+            self.hits += 1
+            return CachedUser.from_record(record)
+
+        self.misses += 1
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        cached = CachedUser.from_user(user)
+        self.backend.set(self.key(user_id), cached.to_record(), self.ttl)
+        return cached
+
+    def invalidate(self, user_id):
+        self.backend.delete(self.key(user_id))
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+    def reset_stats(self):
+        self.hits = self.misses = 0
+
+
+user_cache = UserCache()
+
+
+def _evict(target):
+    # Evict now, and again after commit: a request running between our flush
+    # and commit could otherwise re-cache the old, still-committed row.
+    user_cache.invalidate(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("evict_user_ids", set()).add(target.id)
+
+
+@event.listens_for(User, "after_update")
+def _evict_changed_user(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[col].history.has_changes() for col in WATCHED_COLUMNS):
+        _evict(target)
+
+
+@event.listens_for(User, "after_delete")
+def _evict_deleted_user(mapper, connection, target):
+    _evict(target)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_after_commit(session):
+    for user_id in session.info.pop("evict_user_ids", ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_evictions(session):
+    session.info.pop("evict_user_ids", None)
@@ -0,0 +1,71 @@
+"""
+Timing for rubric analytics on a large assignment.
+
+    python -m benchmarks.bench_analytics --submissions 2000 --items 30
+
+Seeds an in-memory database with one assignment, its rubric items and a
+full score matrix, then times load_matrix() and rubric_analytics().
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy import insert
+
+from app import create_app
+from app.models import db, Course, Assignment, User, Submission, RubricItem, SubmissionRubricScore
+
+
+def seed(submissions, items, graders, rng):
+    course = Course(code="BENCH", title="Benchmark")
+    assignment = Assignment(course=course, title="Final")
+    db.session.add(assignment)
+    db.session.flush()
+    db.session.execute(insert(User), [
+        {"id": u, "email": f"u{u}@example.com", "password_hash": "x"}
+        for u in range(1, submissions + graders + 1)
+    ])
+    db.session.execute(insert(RubricItem), [
+        {"id": j, "assignment_id": assignment.id, "label": f"Q{j}", "max_points": 10.0}
+        for j in range(1, items + 1)
+    ])
+    db.session.execute(insert(Submission.__table__), [
+        {"id": s, "assignment_id": assignment.id, "student_id": s,
+         "graded_by_id": submissions + 1 + s % graders, "total_score": None}
+        for s in range(1, submissions + 1)
+    ])
+    db.session.execute(insert(SubmissionRubricScore.__table__), [
+        {"submission_id": s, "rubric_item_id": j, "points": round(rng.uniform(0, 10), 1)}
+        for s in range(1, submissions + 1)
+        for j in range(1, items + 1)
+    ])
+    db.session.commit()
+    return assignment.id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--submissions", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=30)
+    parser.add_argument("--graders", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    from app.analytics import load_matrix, rubric_analytics
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+    with app.app_context():
+        db.create_all()
+        assignment_id = seed(args.submissions, args.items, args.graders, random.Random(16))
+
+        for label, func in (("load_matrix", load_matrix), ("rubric_analytics", rubric_analytics)):
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                func(assignment_id)
+                best = min(best, time.perf_counter() - start)
+            print(f"{label:18s} {args.submissions} x {args.items}: {best * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Cost of polling the dashboard versus waiting on the status stream.
+
+    python -m benchmarks.bench_events --students 60 --listeners 1000
+
+Generates one semester with benchmarks.datagen in a throwaway SQLite file
+and measures, for a student: one dashboard render (what every manual
+refresh costs), and with ``--listeners`` open subscriptions, how long the
+commit of one grade takes with publishing on and off (what the stream
+costs the grader) and how quickly the student's stream sees it.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from app import create_app
+from app.migrations import upgrade
+from app.models import db, Submission
+from app.pubsub import broker
+from benchmarks.datagen import generate
+from benchmarks.load_submit import percentile
+
+
+def timed(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return percentile(times, 50), percentile(times, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--courses", type=int, default=5)
+    parser.add_argument("--students", type=int, default=60, help="Students per course.")
+    parser.add_argument("--assignments", type=int, default=12, help="Assignments per course.")
+    parser.add_argument("--listeners", type=int, default=1000, help="Open subscriptions (other students).")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(workdir, 'events.db')}",
+        "SQLITE_PROFILE": "production",
+        "UPLOAD_FOLDER": os.path.join(workdir, "uploads"),
+        "JOB_WORKER_THREADS": 0,
+        "PASSWORD_HASH_WORKERS": 0,
+    })
+    with app.app_context():
+        upgrade()
+        data = generate(courses=args.courses, students=args.students, assignments=args.assignments, pdfs=2, pdf_kb=1)
+        student_id = data.roster[data.course_ids[0]][0]
+        sub = db.session.scalars(db.select(Submission).where(Submission.student_id == student_id)).first()
+
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess["_user_id"] = str(student_id)
+            sess["_fresh"] = True
+        p50, p95 = timed(lambda: client.get(f"/dashboard?course_id={data.course_ids[0]}"), args.repeat)
+        print(f"student dashboard render       p50 {p50:7.2f} ms   p95 {p95:7.2f} ms")
+
+        listeners = [broker.subscribe([f"user:{-n}"]) for n in range(1, args.listeners)]
+        mine = broker.subscribe([f"user:{student_id}"])
+
+        def grade():
+            sub.total_score = (sub.total_score or 0) + 1
+            db.session.commit()
+
+        for enabled in (False, True):
+            broker.enabled = enabled
+            p50, p95 = timed(grade, args.repeat)
+            print(f"{'grade commit, publishing ' + ('on' if enabled else 'off'):30} p50 {p50:7.2f} ms   p95 {p95:7.2f} ms")
+        while mine.get(timeout=0):
+            pass
+
+        delays = []
+        for _ in range(args.repeat):
+            received = []
+            waiter = threading.Thread(target=lambda: received.append((mine.get(timeout=5), time.perf_counter())))
+            waiter.start()
+            start = time.perf_counter()
+            grade()
+            waiter.join()
+            delays.append((received[0][1] - start) * 1000)
+        print(f"commit to stream delivery      p50 {percentile(delays, 50):7.2f} ms   "
+              f"p95 {percentile(delays, 95):7.2f} ms   ({args.listeners} open subscriptions)")
+
+        for listener in listeners + [mine]:
+            listener.close()
+
+
+if __name__ == "__main__":
+    main()
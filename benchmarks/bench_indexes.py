@@ -0,0 +1,149 @@
+"""
+Query plans and timings for the hot submission/enrollment lookups,
+before and after the index migration.
+
+    python -m benchmarks.bench_indexes --submissions 1000000
+
+Builds a throwaway SQLite database (default: a temp file), seeds it with
+synthetic rows, times each query with no secondary indexes, applies
+app.migrations.upgrade() and times them again.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+
+from app.migrations import upgrade
+from app.models import db
+
+
+QUERIES = {
+    "submit_assignment lookup": (
+        "SELECT id FROM submission WHERE assignment_id = :a AND student_id = :s LIMIT 1",
+        lambda r, n: {"a": r.randrange(1, n["assignments"] + 1), "s": r.randrange(1, n["students"] + 1)},
+    ),
+    "list_submissions page": (
+        "SELECT id, student_id, submitted_at FROM submission WHERE assignment_id = :a "
+        "ORDER BY submitted_at DESC NULLS LAST",
+        lambda r, n: {"a": r.randrange(1, n["assignments"] + 1)},
+    ),
+    "student enrollments": (
+        "SELECT course_id FROM enrollment WHERE user_id = :u",
+        lambda r, n: {"u": r.randrange(1, n["students"] + 1)},
+    ),
+    "course assignments": (
+        "SELECT id FROM assignment WHERE course_id = :c ORDER BY due_date",
+        lambda r, n: {"c": r.randrange(1, n["courses"] + 1)},
+    ),
+}
+
+
+def seed(path, sizes, rng):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    now = datetime(2025, 1, 1)
+
+    conn.executemany(
+        "INSERT INTO course (id, code) VALUES (?, ?)",
+        ((c, f"C-{c}") for c in range(1, sizes["courses"] + 1)),
+    )
+    conn.executemany(
+        "INSERT INTO user (id, email, password_hash, role) VALUES (?, ?, 'x', 'student')",
+        ((u, f"s{u}@example.com") for u in range(1, sizes["students"] + 1)),
+    )
+    conn.executemany(
+        "INSERT INTO enrollment (user_id, course_id, role) VALUES (?, ?, 'student')",
+        ((u, (u % sizes["courses"]) + 1) for u in range(1, sizes["students"] + 1)),
+    )
+    conn.executemany(
+        "INSERT INTO assignment (id, course_id, title, due_date) VALUES (?, ?, ?, ?)",
+        ((a, (a % sizes["courses"]) + 1, f"A{a}", now + timedelta(days=a % 90))
+         for a in range(1, sizes["assignments"] + 1)),
+    )
+
+    # Every (assignment, student) pair at most once, to satisfy the unique index later
+    per_assignment = sizes["submissions"] // sizes["assignments"]
+
+    def rows():
+        for a in range(1, sizes["assignments"] + 1):
+            for s in rng.sample(range(1, sizes["students"] + 1), per_assignment):
+                submitted = now + timedelta(minutes=rng.randrange(100000)) if rng.random() < 0.9 else None
+                yield a, s, submitted
+
+    conn.executemany(
+        "INSERT INTO submission (assignment_id, student_id, submitted_at) VALUES (?, ?, ?)",
+        rows(),
+    )
+    conn.commit()
+    conn.close()
+
+
+def drop_secondary_indexes(engine):
+    with engine.begin() as conn:
+        for table in db.metadata.tables.values():
+            for index in table.indexes:
+                conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+
+
+def run_queries(engine, sizes, repeat, label):
+    print(f"\n== {label} ==")
+    with engine.connect() as conn:
+        for name, (sql, params) in QUERIES.items():
+            rng = random.Random(1)
+            plan = conn.execute(text("EXPLAIN QUERY PLAN " + sql), params(rng, sizes)).fetchall()
+            start = time.perf_counter()
+            for _ in range(repeat):
+                conn.execute(text(sql), params(rng, sizes)).fetchall()
+            per_query = (time.perf_counter() - start) / repeat * 1000
+            print(f"{name:28s} {per_query:9.3f} ms/query")
+            for row in plan:
+                print(f"    plan: {row[-1]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--submissions", type=int, default=1_000_000)
+    parser.add_argument("--students", type=int, default=20_000)
+    parser.add_argument("--assignments", type=int, default=200)
+    parser.add_argument("--courses", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--db", default=None, help="SQLite path (default: temp file)")
+    args = parser.parse_args()
+
+    sizes = {
+        "submissions": args.submissions,
+        "students": args.students,
+        "assignments": args.assignments,
+        "courses": args.courses,
+    }
+    if sizes["submissions"] // sizes["assignments"] > sizes["students"]:
+        parser.error("--submissions / --assignments cannot exceed --students")
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "bench_indexes.db")
+    engine = create_engine(f"sqlite:///{path}")
+    db.metadata.create_all(engine)
+    drop_secondary_indexes(engine)
+
+    start = time.perf_counter()
+    seed(path, sizes, random.Random(42))
+    print(f"Seeded {sizes} in {time.perf_counter() - start:.1f}s at {path}")
+
+    run_queries(engine, sizes, args.repeat, "before (no secondary indexes)")
+
+    start = time.perf_counter()
+    upgrade(engine)
+    print(f"\nMigration applied in {time.perf_counter() - start:.1f}s")
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+
+    run_queries(engine, sizes, args.repeat, "after (migrated)")
+
+
+if __name__ == "__main__":
+    main()
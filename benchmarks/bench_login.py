@@ -0,0 +1,94 @@
+"""
+Login throughput, and how much a login burst slows everything else.
+
+    python -m benchmarks.bench_login --users 200 --threads 32 --workers 2
+
+Creates users in a throwaway SQLite file, then has a thread pool log every
+user in through the Flask test client while one more thread keeps loading
+a cheap page. Reports logins/second, login latency and the cheap page's
+latency during the burst. Compare --workers 0 (hash on the request thread)
+with a process pool.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+from app.migrations import upgrade
+from app.models import db, User
+from benchmarks.load_submit import percentile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=2, help="Hashing processes (0 = request thread).")
+    parser.add_argument("--method", default="scrypt", help="werkzeug hash method / work factor.")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(workdir, 'login.db')}",
+        "SQLITE_PROFILE": "production",
+        "WTF_CSRF_ENABLED": False,
+        "JOB_WORKER_THREADS": 0,
+        "PASSWORD_HASH_METHOD": args.method,
+        "PASSWORD_HASH_WORKERS": args.workers,
+        "PASSWORD_HASH_MAX_PENDING": args.users + args.threads,
+        "RATE_LIMIT_ENABLED": False,
+    })
+    with app.app_context():
+        upgrade()
+        pwhash = generate_password_hash("password123", method=args.method)
+        db.session.execute(db.insert(User.__table__), [
+            {"email": f"u{i}@example.com", "password_hash": pwhash, "role": "student"}
+            for i in range(args.users)
+        ])
+        db.session.commit()
+
+    def login(i):
+        client = app.test_client()
+        start = time.perf_counter()
+        resp = client.post("/auth/login", data={"email": f"u{i}@example.com", "password": "password123"})
+        return time.perf_counter() - start, resp.status_code
+
+    done = threading.Event()
+    page_times = []
+
+    def browse():
+        client = app.test_client()
+        while not done.is_set():
+            start = time.perf_counter()
+            client.get("/auth/login")
+            page_times.append(time.perf_counter() - start)
+
+    browser = threading.Thread(target=browse)
+    browser.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(login, range(args.users)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    browser.join()
+
+    latencies = [t for t, _ in results]
+    failed = sum(1 for _, status in results if status != 302)
+    print(f"workers={args.workers} method={args.method} users={args.users} threads={args.threads}")
+    print(f"logins/s        {args.users / elapsed:8.1f}  (failed: {failed})")
+    print(f"login p50/p95   {percentile(latencies, 50) * 1000:8.1f} / {percentile(latencies, 95) * 1000:.1f} ms")
+    if page_times:
+        print(
+            f"page  p50/p95   {percentile(page_times, 50) * 1000:8.1f} / {percentile(page_times, 95) * 1000:.1f} ms"
+            f"  (mean {statistics.mean(page_times) * 1000:.1f} ms, {len(page_times)} loads)"
+        )
+
+
+if __name__ == "__main__":
+    main()
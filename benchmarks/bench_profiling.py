@@ -0,0 +1,103 @@
+"""
+Overhead of the request profiler (app/profiling.py).
+
+    python -m benchmarks.bench_profiling --requests 200 --rounds 5
+
+Seeds a throwaway SQLite file with a course, students, assignments and
+submissions, then builds two apps on it, one with PROFILING_ENABLED, and
+loads the instructor dashboard and a submissions page through the test
+client, alternating which app goes first each round. Reports the best
+round's per-request time for each (the least disturbed by other load on
+the machine) and the relative overhead.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+from app.migrations import upgrade
+from app.models import db, User, Course, Assignment, Enrollment, Submission
+
+
+def seed(students, assignments):
+    course = Course(code="BENCH 101", title="Benchmark")
+    db.session.add(course)
+    db.session.add(User(email="prof@example.com", password_hash=generate_password_hash("password123"),
+                        role="instructor"))
+    db.session.flush()
+    db.session.execute(db.insert(User.__table__), [
+        {"email": f"s{i}@example.com", "password_hash": "x", "role": "student"} for i in range(students)
+    ])
+    student_ids = [uid for (uid,) in db.session.execute(db.select(User.id).where(User.role == "student"))]
+    db.session.execute(db.insert(Enrollment.__table__), [
+        {"user_id": uid, "course_id": course.id, "role": "student"} for uid in student_ids
+    ])
+    items = [Assignment(course=course, title=f"HW {n}") for n in range(assignments)]
+    db.session.add_all(items)
+    db.session.flush()
+    db.session.add_all(
+        Submission(assignment_id=a.id, student_id=uid, student_file_path="x.pdf", total_score=uid % 100)
+        for a in items for uid in student_ids
+    )
+    db.session.commit()
+    return items[0].id
+
+
+def build(path, enabled):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+        "SQLITE_PROFILE": "production",
+        "WTF_CSRF_ENABLED": False,
+        "JOB_WORKER_THREADS": 0,
+        "PASSWORD_HASH_WORKERS": 0,
+        "PROFILING_ENABLED": enabled,
+    })
+    client = app.test_client()
+    client.post("/auth/login", data={"email": "prof@example.com", "password": "password123"})
+    return client
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per app per round.")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--students", type=int, default=100)
+    parser.add_argument("--assignments", type=int, default=10)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "profile.db")
+    seed_app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", "JOB_WORKER_THREADS": 0})
+    with seed_app.app_context():
+        upgrade()
+        assignment_id = seed(args.students, args.assignments)
+
+    clients = {"off": build(path, False), "on": build(path, True)}
+    urls = ["/dashboard", f"/assignments/{assignment_id}/submissions"]
+    for client in clients.values():  # warm caches and connections
+        for url in urls:
+            client.get(url)
+
+    per_request = {name: [] for name in clients}
+    order = list(clients.items())
+    for _ in range(args.rounds):
+        order.reverse()
+        for name, client in order:
+            start = time.perf_counter()
+            for i in range(args.requests):
+                client.get(urls[i % len(urls)])
+            per_request[name].append((time.perf_counter() - start) / args.requests)
+
+    off = min(per_request["off"])
+    on = min(per_request["on"])
+    print(f"requests={args.requests} x {args.rounds} rounds, {args.students} students, "
+          f"{args.assignments} assignments")
+    print(f"profiling off   {off * 1000:8.3f} ms/request")
+    print(f"profiling on    {on * 1000:8.3f} ms/request")
+    print(f"overhead        {(on - off) / off * 100:8.2f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Full-text search latency over a semester of synthetic data.
+
+    python -m benchmarks.bench_search --courses 30 --students 60 --assignments 12
+
+Generates the dataset with benchmarks.datagen (feedback comments included)
+in a throwaway SQLite file, then times search() for a mix of common words,
+rare words, phrases and prefixes, as an instructor (all courses), an
+instructor scoped to one course and a student.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from app import create_app, search
+from app.migrations import upgrade
+from app.models import db, User
+from benchmarks.datagen import generate
+from benchmarks.load_submit import percentile
+
+QUERIES = ("recursion", "office hours", '"see office hours"', "edge cases", "dynamic programming",
+           "optim*", "base case recursion", "unit test*", "nonexistentword")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--courses", type=int, default=30)
+    parser.add_argument("--students", type=int, default=60, help="Students per course.")
+    parser.add_argument("--assignments", type=int, default=12, help="Assignments per course.")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(workdir, 'search.db')}",
+        "SQLITE_PROFILE": "production",
+        "UPLOAD_FOLDER": os.path.join(workdir, "uploads"),
+        "JOB_WORKER_THREADS": 0,
+    })
+    with app.app_context():
+        upgrade()
+        data = generate(courses=args.courses, students=args.students, assignments=args.assignments,
+                        grade_rate=0.9, pdfs=5, pdf_kb=1)
+        documents = db.session.execute(db.text(f"SELECT count(*) FROM {search.TABLE}")).scalar()
+        print(f"{data.submissions} submissions, {documents} indexed documents")
+
+        instructor = db.session.get(User, data.instructor_ids[0])
+        student = db.session.get(User, data.roster[data.course_ids[0]][0])
+        cases = [
+            ("instructor", instructor, {}),
+            ("one course", instructor, {"course_id": data.course_ids[0]}),
+            ("student", student, {}),
+        ]
+        print(f"{'query':24} " + " ".join(f"{name + ' p50/p95 ms':>24}" for name, _, _ in cases))
+        for query in QUERIES:
+            row = []
+            for _name, user, kwargs in cases:
+                times = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    search.search(query, user, **kwargs)
+                    times.append((time.perf_counter() - start) * 1000)
+                row.append(f"{percentile(times, 50):11.2f} / {percentile(times, 95):6.2f}")
+            print(f"{query:24} " + " ".join(f"{cell:>24}" for cell in row))
+
+
+if __name__ == "__main__":
+    main()
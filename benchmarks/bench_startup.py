@@ -0,0 +1,61 @@
+"""
+Cold-start cost of the app: ``import app`` and ``create_app()``.
+
+    python -m benchmarks.bench_startup --runs 20
+
+Each run is a fresh interpreter, so nothing is cached in sys.modules. Also
+checks that create_app() opens no database connection (the database file
+must not be created).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+created = app.create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + sys.argv[1]})
+t2 = time.perf_counter()
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "create_app_ms": (t2 - t1) * 1000}))
+"""
+
+
+def run_once(db_path):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, db_path],
+        cwd=root,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "startup.db")
+    results = [run_once(db_path) for _ in range(args.runs)]
+
+    for key in ("import_ms", "create_app_ms"):
+        values = sorted(r[key] for r in results)
+        print(
+            f"{key:14s} median {statistics.median(values):7.1f} ms   "
+            f"min {values[0]:7.1f}   max {values[-1]:7.1f}"
+        )
+    touched = os.path.exists(db_path)
+    print(f"database touched during startup: {'YES' if touched else 'no'}")
+    sys.exit(1 if touched else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Deterministic synthetic data: courses, users, assignments, rubrics, submissions.
+
+    python -m benchmarks.datagen --db /tmp/scanva.db --courses 20 --students 60
+
+Bulk-inserts (Core executemany, no ORM events) into an upgraded database,
+writes a small pool of fake PDFs into the blob store and points submissions
+at them, then rebuilds the derived tables the ORM hooks would have kept up
+to date (assignment stats, blob reference counts, search index). The same
+--seed always produces the same rows and files. Used by benchmarks.load_suite.
+"""
+import argparse
+import hashlib
+import os
+import random
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import insert, select
+
+from app import create_app
+from app import blobstore, search, stats
+from app.migrations import upgrade
+from app.models import (
+    db,
+    User,
+    Course,
+    Enrollment,
+    Assignment,
+    RubricItem,
+    Submission,
+    SubmissionRubricScore,
+    Blob,
+)
+
+EPOCH = datetime(2025, 1, 6, 9, 0)  # fixed so runs are reproducible
+
+TOPICS = ("recursion", "linked lists", "hash tables", "sorting", "binary search", "graphs", "dynamic programming",
+          "unit testing", "design patterns", "concurrency", "SQL joins", "REST APIs", "git branching", "big-O")
+REMARKS = ("Nice work on {t}.", "Check the base case for {t}.", "Please see office hours about {t}.",
+           "Your {t} answer is missing edge cases.", "Good explanation of {t}, but show your steps.",
+           "Off by one in the {t} loop.", "Cite the lecture notes on {t}.", "Clean and well tested.")
+
+
+@dataclass
+class Dataset:
+    course_ids: list = field(default_factory=list)
+    instructor_ids: list = field(default_factory=list)
+    student_ids: list = field(default_factory=list)
+    assignment_ids: list = field(default_factory=list)
+    # course id -> [student ids], assignment id -> course id
+    roster: dict = field(default_factory=dict)
+    assignment_course: dict = field(default_factory=dict)
+    submissions: int = 0
+    pdf_paths: list = field(default_factory=list)
+
+
+def fake_pdf(rng, pages, pad_kb):
+    """A small PDF-looking file with ``pages`` page objects and random padding."""
+    body = b"".join(b"%d 0 obj << /Type /Page >> endobj\n" % (n + 3) for n in range(pages))
+    padding = rng.randbytes(pad_kb * 1024)
+    return (
+        b"%PDF-1.4\n1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj\n"
+        + b"2 0 obj << /Type /Pages /Count %d >> endobj\n" % pages
+        + body + b"stream\n" + padding + b"\nendstream\n%%EOF\n"
+    )
+
+
+def write_pdfs(rng, count, pad_kb, folder):
+    """Store ``count`` distinct fake PDFs in the blob store; returns their blob paths."""
+    paths = []
+    for _ in range(count):
+        data = fake_pdf(rng, rng.randint(1, 8), pad_kb)
+        sha = hashlib.sha256(data).hexdigest()
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        paths.append(blobstore.store(tmp, sha, folder))
+    return paths
+
+
+def generate(courses=10, students=50, instructors=1, assignments=8, rubric_items=5,
+             submit_rate=0.8, grade_rate=0.5, pdfs=20, pdf_kb=32, seed=131, password_hash="x"):
+    """
+    Populate the current app's database. ``students`` and ``instructors``
+    are per course; students may be in several courses. Returns a Dataset.
+    """
+    rng = random.Random(seed)
+    folder = str(current_app.config["UPLOAD_FOLDER"])
+    os.makedirs(folder, exist_ok=True)
+    data = Dataset(pdf_paths=write_pdfs(rng, pdfs, pdf_kb, folder))
+
+    total_students = max(students, int(courses * students * 0.6))
+    db.session.execute(insert(Course), [
+        {"code": f"SYN {100 + c}-{c % 3 + 1:02d}", "title": f"Synthetic Course {c}"} for c in range(courses)
+    ])
+    db.session.execute(insert(User), [
+        {"email": f"prof{i}@example.com", "password_hash": password_hash, "role": "instructor"}
+        for i in range(courses * instructors)
+    ] + [
+        {"email": f"student{i}@example.com", "password_hash": password_hash, "role": "student"}
+        for i in range(total_students)
+    ])
+    data.course_ids = list(db.session.scalars(select(Course.id).where(Course.code.like("SYN %")).order_by(Course.id)))
+    data.instructor_ids = list(db.session.scalars(
+        select(User.id).where(User.email.like("prof%@example.com")).order_by(User.id)))
+    data.student_ids = list(db.session.scalars(
+        select(User.id).where(User.email.like("student%@example.com")).order_by(User.id)))
+
+    enrollments = []
+    for c, course_id in enumerate(data.course_ids):
+        staff = data.instructor_ids[c * instructors:(c + 1) * instructors]
+        members = rng.sample(data.student_ids, students)
+        data.roster[course_id] = members
+        enrollments += [{"user_id": uid, "course_id": course_id, "role": "instructor"} for uid in staff]
+        enrollments += [{"user_id": uid, "course_id": course_id, "role": "student"} for uid in members]
+    db.session.execute(insert(Enrollment), enrollments)
+
+    db.session.execute(insert(Assignment), [
+        {
+            "course_id": course_id,
+            "title": f"Homework {n + 1}",
+            "description": f"Practice on {rng.choice(TOPICS)} and {rng.choice(TOPICS)}.",
+            "due_date": EPOCH + timedelta(days=7 * n),
+            "created_at": EPOCH,
+            "prompt_file_path": rng.choice(data.pdf_paths),
+        }
+        for course_id in data.course_ids for n in range(assignments)
+    ])
+    rows = db.session.execute(
+        select(Assignment.id, Assignment.course_id, Assignment.due_date)
+        .where(Assignment.course_id.in_(data.course_ids))
+        .order_by(Assignment.id)
+    ).all()
+    data.assignment_ids = [aid for aid, _, _ in rows]
+    data.assignment_course = {aid: cid for aid, cid, _ in rows}
+
+    db.session.execute(insert(RubricItem), [
+        {"assignment_id": aid, "label": f"Q{j + 1}", "max_points": float(rng.choice((5, 10, 20)))}
+        for aid in data.assignment_ids for j in range(rubric_items)
+    ])
+    items = {}
+    for item_id, aid, max_points in db.session.execute(
+        select(RubricItem.id, RubricItem.assignment_id, RubricItem.max_points)
+        .where(RubricItem.assignment_id.in_(data.assignment_ids))
+        .order_by(RubricItem.id)
+    ):
+        items.setdefault(aid, []).append((item_id, max_points))
+
+    submissions, graded = [], []
+    for aid, course_id, due in rows:
+        grader = data.instructor_ids[data.course_ids.index(course_id) * instructors]
+        for uid in data.roster[course_id]:
+            if rng.random() >= submit_rate:
+                continue
+            submitted = due - timedelta(minutes=rng.randint(0, 5 * 24 * 60))
+            row = {
+                "assignment_id": aid,
+                "student_id": uid,
+                "created_at": submitted,
+                "submitted_at": submitted,
+                "student_file_path": rng.choice(data.pdf_paths),
+                "graded_at": None,
+                "graded_by_id": None,
+                "total_score": None,
+                "graded_file_path": None,
+                "general_comment": None,
+            }
+            if rng.random() < grade_rate:
+                points = [round(rng.uniform(0.3, 1.0) * mx, 1) for _, mx in items[aid]]
+                row.update(
+                    graded_at=due + timedelta(days=rng.randint(1, 5)),
+                    graded_by_id=grader,
+                    total_score=round(sum(points), 1),
+                    graded_file_path=rng.choice(data.pdf_paths),
+                    general_comment=rng.choice(REMARKS).format(t=rng.choice(TOPICS)),
+                )
+                comments = [rng.choice(REMARKS).format(t=rng.choice(TOPICS)) if rng.random() < 0.3 else None
+                            for _ in points]
+                graded.append(((aid, uid), points, comments))
+            submissions.append(row)
+    if submissions:
+        db.session.execute(insert(Submission), submissions)
+    data.submissions = len(submissions)
+
+    if graded:
+        ids = {
+            (aid, uid): sid
+            for aid, uid, sid in db.session.execute(
+                select(Submission.assignment_id, Submission.student_id, Submission.id)
+                .where(Submission.assignment_id.in_(data.assignment_ids))
+            )
+        }
+        db.session.execute(insert(SubmissionRubricScore), [
+            {"submission_id": ids[key], "rubric_item_id": item_id, "points": p, "comment": c}
+            for key, points, comments in graded
+            for (item_id, _), p, c in zip(items[key[0]], points, comments)
+        ])
+
+    # Derived data the ORM hooks maintain for normal writes
+    refs = blobstore.count_references()
+    existing = set(db.session.scalars(select(Blob.sha256)))
+    blobs = [
+        {"sha256": sha, "size": os.path.getsize(os.path.join(folder, blobstore.blob_path(sha))), "ref_count": n}
+        for sha, n in refs.items() if sha not in existing
+    ]
+    if blobs:
+        db.session.execute(insert(Blob), blobs)
+    db.session.commit()
+    stats.rebuild(data.assignment_ids)
+    search.rebuild()
+    db.session.commit()
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", required=True, help="SQLite file to create (must not hold synthetic data yet).")
+    parser.add_argument("--uploads", help="UPLOAD_FOLDER (default: uploads/ next to the database).")
+    parser.add_argument("--courses", type=int, default=10)
+    parser.add_argument("--students", type=int, default=50, help="Students per course.")
+    parser.add_argument("--instructors", type=int, default=1, help="Instructors per course.")
+    parser.add_argument("--assignments", type=int, default=8, help="Assignments per course.")
+    parser.add_argument("--rubric-items", type=int, default=5)
+    parser.add_argument("--submit-rate", type=float, default=0.8)
+    parser.add_argument("--grade-rate", type=float, default=0.5)
+    parser.add_argument("--pdfs", type=int, default=20, help="Distinct fake PDFs to share.")
+    parser.add_argument("--pdf-kb", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=131)
+    args = parser.parse_args()
+
+    path = os.path.abspath(args.db)
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+        "SQLITE_PROFILE": "production",
+        "UPLOAD_FOLDER": args.uploads or os.path.join(os.path.dirname(path), "uploads"),
+        "JOB_WORKER_THREADS": 0,
+    })
+    with app.app_context():
+        upgrade()
+        start = time.perf_counter()
+        data = generate(
+            courses=args.courses, students=args.students, instructors=args.instructors,
+            assignments=args.assignments, rubric_items=args.rubric_items,
+            submit_rate=args.submit_rate, grade_rate=args.grade_rate,
+            pdfs=args.pdfs, pdf_kb=args.pdf_kb, seed=args.seed,
+        )
+        print(
+            f"{len(data.course_ids)} courses, {len(data.instructor_ids) + len(data.student_ids)} users, "
+            f"{len(data.assignment_ids)} assignments, {data.submissions} submissions "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Write-contention load test: many students submitting at the same moment.
+
+    python -m benchmarks.load_submit --students 300 --threads 50 --profile production
+
+Builds a throwaway file-backed SQLite database, logs every student in, then
+fires one submit_assignment POST per student from a thread pool through the
+Flask test client. Reports request latency and commit latency (time spent in
+session.commit(), i.e. flush + COMMIT) percentiles and any failed requests.
+Run once per --profile / --begin-mode to compare.
+"""
+import argparse
+import io
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import create_app
+from app.migrations import upgrade
+from app.models import db, User, Course, Assignment
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def build_app(args, workdir):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(workdir, 'load.db')}",
+        "SQLITE_PROFILE": args.profile,
+        "SQLITE_BEGIN_MODE": args.begin_mode,
+        "UPLOAD_FOLDER": os.path.join(workdir, "uploads"),
+        "WTF_CSRF_ENABLED": False,
+        "JOB_WORKER_THREADS": 0,
+    })
+    with app.app_context():
+        upgrade()
+        course = Course(code="LOAD 101")
+        assignment = Assignment(course=course, title="Midterm")
+        db.session.add_all([course, assignment])
+        db.session.flush()
+        db.session.execute(db.insert(User.__table__), [
+            {"email": f"s{i}@example.com", "password_hash": "x", "role": "student"}
+            for i in range(args.students)
+        ])
+        db.session.commit()
+        user_ids = [uid for (uid,) in db.session.execute(db.select(User.id))]
+        assignment_id = assignment.id
+    return app, assignment_id, user_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=300)
+    parser.add_argument("--threads", type=int, default=50)
+    parser.add_argument("--profile", default="production", choices=["default", "production"])
+    parser.add_argument("--begin-mode", default="deferred", choices=["deferred", "immediate"])
+    parser.add_argument("--pdf-kb", type=int, default=64)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    app, assignment_id, user_ids = build_app(args, workdir)
+
+    commit_times = []
+    local = threading.local()
+    lock = threading.Lock()
+
+    @event.listens_for(Session, "before_commit")
+    def _start(session):
+        local.commit_start = time.perf_counter()
+
+    @event.listens_for(Session, "after_commit")
+    def _end(session):
+        start = getattr(local, "commit_start", None)
+        if start is not None:
+            with lock:
+                commit_times.append(time.perf_counter() - start)
+            local.commit_start = None
+
+    clients = []
+    for uid in user_ids:
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess["_user_id"] = str(uid)
+            sess["_fresh"] = True
+        clients.append((uid, client))
+
+    payload = b"%PDF-1.4\n" + os.urandom(args.pdf_kb * 1024) + b"\n%%EOF\n"
+    barrier = threading.Barrier(min(args.threads, len(clients)))
+
+    def submit(item):
+        uid, client = item
+        try:
+            barrier.wait(timeout=5)
+        except threading.BrokenBarrierError:
+            pass
+        start = time.perf_counter()
+        resp = client.post(
+            f"/assignments/{assignment_id}/submit",
+            data={"student_file": (io.BytesIO(payload + str(uid).encode()), "exam.pdf")},
+            content_type="multipart/form-data",
+        )
+        return time.perf_counter() - start, resp.status_code
+
+    commit_times.clear()
+    wall = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(submit, clients))
+    wall = time.perf_counter() - wall
+
+    latencies = [t for t, status in results if status == 302]
+    failures = [status for _, status in results if status != 302]
+    ms = lambda v: f"{v * 1000:8.1f} ms"
+
+    print(f"profile={args.profile} begin={args.begin_mode} students={args.students} threads={args.threads}")
+    print(f"  ok {len(latencies)}  failed {len(failures)} {sorted(set(failures)) if failures else ''}")
+    print(f"  throughput        {len(latencies) / wall:8.1f} submits/s")
+    print(f"  request  p50 {ms(percentile(latencies, 50))}  p99 {ms(percentile(latencies, 99))}")
+    print(f"  commit   p50 {ms(percentile(commit_times, 50))}  p99 {ms(percentile(commit_times, 99))}"
+          f"  mean {ms(statistics.mean(commit_times) if commit_times else float('nan'))}")
+
+
+if __name__ == "__main__":
+    main()
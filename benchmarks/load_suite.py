@@ -0,0 +1,288 @@
+"""
+End-to-end load test: simulated students and instructors on synthetic data.
+
+    python -m benchmarks.load_suite --students 40 --instructors 5 --duration 30
+    python -m benchmarks.load_suite --compare benchmarks/results/<old>.json
+
+Generates a dataset with benchmarks.datagen in a throwaway SQLite file, then
+runs one thread per simulated user against the Flask app (test client, no
+network) for --duration seconds. Students load their dashboard, submit PDFs
+and download their own files; instructors load their dashboard, page through
+submissions and open submitted PDFs. Each user follows its own seeded random
+script, so runs are repeatable.
+
+Per-route throughput and latency percentiles are printed and written as
+JSON (with the git commit) to --out. --compare reports the change against
+an earlier result file and exits 1 if any route got slower than
+--threshold percent at p50 or p95.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+
+from app import create_app
+from app.migrations import upgrade
+from app.models import db, Submission
+from benchmarks.datagen import generate, fake_pdf
+from benchmarks.load_submit import percentile
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def git_commit():
+    try:
+        sha = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return sha, dirty
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}  # route -> [seconds]
+        self.errors = {}  # route -> count
+        self._lock = threading.Lock()
+
+    def record(self, route, seconds, ok):
+        with self._lock:
+            self.samples.setdefault(route, []).append(seconds)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+    def summary(self, wall):
+        routes = {}
+        for route, samples in sorted(self.samples.items()):
+            ms = [s * 1000 for s in samples]
+            routes[route] = {
+                "count": len(ms),
+                "errors": self.errors.get(route, 0),
+                "throughput": len(ms) / wall,
+                "mean_ms": sum(ms) / len(ms),
+                "p50_ms": percentile(ms, 50),
+                "p90_ms": percentile(ms, 90),
+                "p95_ms": percentile(ms, 95),
+                "p99_ms": percentile(ms, 99),
+                "max_ms": max(ms),
+            }
+        return routes
+
+
+def _timed(recorder, route, client, method, url, expect, **kwargs):
+    start = time.perf_counter()
+    resp = client.open(url, method=method, **kwargs)
+    resp.get_data()
+    resp.close()
+    recorder.record(route, time.perf_counter() - start, resp.status_code in expect)
+    return resp
+
+
+def student_script(client, rng, recorder, plan, uid, payload):
+    assignments = plan["student_assignments"][uid]
+    files = plan["student_files"].get(uid, [])
+    action = rng.choices(("dashboard", "submit", "file"), weights=(5, 2, 3))[0]
+    if action == "dashboard" or not assignments:
+        _timed(recorder, "main.dashboard", client, "GET", "/dashboard", (200,))
+    elif action == "submit":
+        aid = rng.choice(assignments)
+        _timed(
+            recorder, "main.submit_assignment", client, "POST", f"/assignments/{aid}/submit", (302,),
+            data={"student_file": (io.BytesIO(payload + b"%d-%d" % (uid, rng.getrandbits(32))), "hw.pdf")},
+            content_type="multipart/form-data",
+        )
+    elif files:
+        _timed(recorder, "main.uploaded_file", client, "GET", f"/uploads/{rng.choice(files)}", (200,))
+
+
+def instructor_script(client, rng, recorder, plan, uid, payload):
+    assignments = plan["instructor_assignments"][uid]
+    action = rng.choices(("dashboard", "submissions", "file"), weights=(3, 4, 3))[0]
+    if action == "dashboard":
+        _timed(recorder, "main.dashboard", client, "GET", "/dashboard", (200,))
+    elif action == "submissions":
+        aid = rng.choice(assignments)
+        status = rng.choice((None, "submitted", "graded"))
+        url = f"/assignments/{aid}/submissions" + (f"?status={status}" if status else "")
+        _timed(recorder, "main.list_submissions", client, "GET", url, (200,))
+    else:
+        files = plan["assignment_files"][rng.choice(assignments)]
+        if files:
+            _timed(recorder, "main.uploaded_file", client, "GET", f"/uploads/{rng.choice(files)}", (200,))
+
+
+def build(args, workdir):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(workdir, 'suite.db')}",
+        "SQLITE_PROFILE": "production",
+        "UPLOAD_FOLDER": os.path.join(workdir, "uploads"),
+        "WTF_CSRF_ENABLED": False,
+        "JOB_WORKER_THREADS": 0,
+        "PASSWORD_HASH_WORKERS": 0,
+        "RATE_LIMIT_ENABLED": False,
+    })
+    with app.app_context():
+        upgrade()
+        data = generate(
+            courses=args.courses, students=args.course_size, assignments=args.assignments,
+            pdfs=args.pdfs, pdf_kb=args.pdf_kb, seed=args.seed,
+        )
+        rng = random.Random(args.seed)
+        students = rng.sample(data.student_ids, min(args.students, len(data.student_ids)))
+        instructors = rng.sample(data.instructor_ids, min(args.instructors, len(data.instructor_ids)))
+        by_course = {}
+        for aid, cid in data.assignment_course.items():
+            by_course.setdefault(cid, []).append(aid)
+        files = {}
+        student_files = {}
+        for aid, sid, path in db.session.execute(
+            select(Submission.assignment_id, Submission.student_id, Submission.student_file_path)
+        ):
+            files.setdefault(aid, []).append(path)
+            student_files.setdefault(sid, []).append(path)
+        plan = {
+            "student_assignments": {
+                uid: [aid for cid, members in data.roster.items() if uid in members for aid in by_course[cid]]
+                for uid in students
+            },
+            "student_files": student_files,
+            "instructor_assignments": {
+                uid: by_course[data.course_ids[data.instructor_ids.index(uid)]] for uid in instructors
+            },
+            "assignment_files": {aid: files.get(aid, []) for aid in data.assignment_ids},
+        }
+        dataset = {
+            "courses": len(data.course_ids),
+            "users": len(data.student_ids) + len(data.instructor_ids),
+            "assignments": len(data.assignment_ids),
+            "submissions": data.submissions,
+        }
+    return app, plan, dataset, [(uid, student_script) for uid in students] + [
+        (uid, instructor_script) for uid in instructors]
+
+
+def run(app, plan, users, args):
+    recorder = Recorder()
+    payload = fake_pdf(random.Random(args.seed), 2, args.pdf_kb)
+    barrier = threading.Barrier(len(users) + 1)
+    stop = threading.Event()
+
+    def simulate(index, uid, script):
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess["_user_id"] = str(uid)
+            sess["_fresh"] = True
+        rng = random.Random(args.seed * 100003 + index)
+        barrier.wait()
+        while not stop.is_set():
+            script(client, rng, recorder, plan, uid, payload)
+            if args.think_ms:
+                time.sleep(rng.expovariate(1000 / args.think_ms))
+
+    threads = [threading.Thread(target=simulate, args=(i, uid, script)) for i, (uid, script) in enumerate(users)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    time.sleep(args.duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    return wall, recorder
+
+
+def compare(current, baseline, threshold):
+    """Print per-route deltas; returns the routes that regressed."""
+    regressed = []
+    print(f"\nvs {baseline['meta'].get('commit') or '?'} ({baseline['meta'].get('timestamp')})")
+    for route, now in current["routes"].items():
+        old = baseline["routes"].get(route)
+        if old is None:
+            print(f"  {route:28} (new)")
+            continue
+        deltas = {key: (now[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+                  for key in ("throughput", "p50_ms", "p95_ms")}
+        slower = [key for key in ("p50_ms", "p95_ms") if deltas[key] > threshold]
+        if slower:
+            regressed.append(route)
+        print(f"  {route:28} rps {deltas['throughput']:+6.1f}%  p50 {deltas['p50_ms']:+6.1f}%  "
+              f"p95 {deltas['p95_ms']:+6.1f}%{'  REGRESSED' if slower else ''}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=40, help="Concurrent simulated students.")
+    parser.add_argument("--instructors", type=int, default=5, help="Concurrent simulated instructors.")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds of load.")
+    parser.add_argument("--think-ms", type=float, default=0, help="Mean pause between a user's requests.")
+    parser.add_argument("--courses", type=int, default=10)
+    parser.add_argument("--course-size", type=int, default=50, help="Students per course.")
+    parser.add_argument("--assignments", type=int, default=8, help="Assignments per course.")
+    parser.add_argument("--pdfs", type=int, default=20)
+    parser.add_argument("--pdf-kb", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=131)
+    parser.add_argument("--out", help="Result file (default: benchmarks/results/load_suite-<commit>.json).")
+    parser.add_argument("--compare", help="Earlier result file to compare against.")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent slowdown that counts as a regression.")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    app, plan, dataset, users = build(args, workdir)
+    wall, recorder = run(app, plan, users, args)
+
+    commit, dirty = git_commit()
+    routes = recorder.summary(wall)
+    total = sum(r["count"] for r in routes.values())
+    result = {
+        "meta": {
+            "commit": commit,
+            "dirty": dirty,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        },
+        "dataset": dataset,
+        "wall_seconds": wall,
+        "requests": total,
+        "throughput": total / wall,
+        "errors": sum(r["errors"] for r in routes.values()),
+        "routes": routes,
+    }
+
+    print(f"{len(users)} users for {wall:.1f}s on {dataset['submissions']} submissions: "
+          f"{total} requests, {result['throughput']:.1f} req/s, {result['errors']} errors")
+    print(f"  {'route':28} {'count':>6} {'err':>4} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for route, r in routes.items():
+        print(f"  {route:28} {r['count']:6d} {r['errors']:4d} {r['throughput']:7.1f} "
+              f"{r['p50_ms']:7.1f}ms {r['p95_ms']:7.1f}ms {r['p99_ms']:7.1f}ms")
+
+    out = args.out or os.path.join(RESULTS_DIR, f"load_suite-{(commit or 'unknown')[:10]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"wrote {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressed = compare(result, json.load(f), args.threshold)
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,4 +3,11 @@ from app import create_app
 app = create_app()
 
 if __name__ == "__main__":
+    # Local dev convenience; deployments run "flask --app app schema upgrade" instead
+    from app.migrations import upgrade, seed_demo_course
+
+    with app.app_context():
+        upgrade()
+        seed_demo_course()
+
     app.run(debug=True)
\ No newline at end of file
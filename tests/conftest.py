@@ -6,13 +6,12 @@ from werkzeug.security import generate_password_hash
 
 @pytest.fixture
 def app():
-    app = create_app()
-    app.config.update(
-        TESTING=True,
-        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
-        WTF_CSRF_ENABLED=False,  # make WTForms easy to test
-        LOGIN_DISABLED=False,
-    )
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "WTF_CSRF_ENABLED": False,  # make WTForms easy to test
+        "LOGIN_DISABLED": False,
+    })
 
     with app.app_context():
         db.create_all()
@@ -50,4 +49,21 @@ def instructor_user(app):
     )
     db.session.add(u)
     db.session.commit()
-    return u
\ No newline at end of file
+    return u
+
+@pytest.fixture
+def student_user(app):
+    """Create a student account enrolled in the seeded course."""
+    from app.models import User, Enrollment
+
+    u = User(
+        email="student@example.com",
+        password_hash=generate_password_hash("password123"),
+        role="student",
+    )
+    db.session.add(u)
+    db.session.flush()
+    course = Course.query.first()
+    db.session.add(Enrollment(user_id=u.id, course_id=course.id, role="student"))
+    db.session.commit()
+    return u
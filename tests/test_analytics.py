@@ -0,0 +1,125 @@
+import math
+
+import numpy as np
+from sqlalchemy import event
+
+from app import analytics
+from app.analytics import load_matrix, rubric_analytics, item_statistics
+from app.models import db, User, Course, Assignment, Submission, RubricItem, SubmissionRubricScore
+
+
+def _scored_assignment(scores, graders=None):
+    """scores: one list of per-item points (None = not scored) per submission."""
+    assignment = Assignment(course=Course.query.first(), title="Midterm")
+    items = [RubricItem(assignment=assignment, label=f"Q{j + 1}", max_points=10) for j in range(len(scores[0]))]
+    db.session.add_all([assignment, *items])
+    db.session.flush()
+    for i, row in enumerate(scores):
+        sub = Submission(
+            assignment=assignment,
+            student=User(email=f"a{i}@example.com", password_hash="x"),
+            graded_by_id=graders[i] if graders else None,
+        )
+        db.session.add(sub)
+        db.session.flush()
+        for item, points in zip(items, row):
+            if points is not None:
+                db.session.add(SubmissionRubricScore(submission_id=sub.id, rubric_item_id=item.id, points=points))
+    db.session.commit()
+    return assignment, items
+
+
+def test_load_matrix_places_scores_and_marks_missing(app):
+    assignment, items = _scored_assignment([[1, 2], [None, 4], [5, None]])
+    submission_ids, _graders, loaded_items, matrix = load_matrix(assignment.id)
+
+    assert [i[0] for i in loaded_items] == [i.id for i in items]
+    assert len(submission_ids) == 3
+    assert matrix[0].tolist() == [1, 2]
+    assert math.isnan(matrix[1, 0]) and matrix[1, 1] == 4
+    assert matrix[2, 0] == 5 and math.isnan(matrix[2, 1])
+
+
+def test_load_matrix_drops_scores_committed_after_the_submission_list(app, monkeypatch):
+    assignment, items = _scored_assignment([[1, 2], [3, 4]])
+    rows = analytics._score_rows(assignment.id)
+    last_sub = max(r[0] for r in rows)
+    late = [(last_sub + 1, items[0].id, 9.0), (last_sub - 1, items[1].id + 1, 9.0), (0, items[0].id, 9.0)]
+    monkeypatch.setattr(analytics, "_score_rows", lambda assignment_id: rows + late)
+
+    _ids, _graders, _items, matrix = load_matrix(assignment.id)
+    assert matrix.tolist() == [[1, 2], [3, 4]]
+
+
+def test_score_query_goes_through_engine_events(app):
+    assignment, _ = _scored_assignment([[1, 2]])
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "submission_rubric_score" in statement:
+            seen.append(parameters)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        load_matrix(assignment.id)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    assert seen and assignment.id in seen[0]
+
+
+def test_item_statistics_match_hand_computation():
+    matrix = np.array([[10, 0, 2], [8, 1, 3], [2, 9, 4], [0, 10, 5]], dtype=float)
+    stats = item_statistics(matrix, np.array([10.0, 10.0, 10.0]))
+
+    assert stats["mean"].tolist() == [5.0, 5.0, 3.5]
+    # item 1 against the total of items 2 and 3
+    rest = matrix[:, 1] + matrix[:, 2]
+    assert np.isclose(stats["item_total_correlation"][0], np.corrcoef(matrix[:, 0], rest)[0, 1])
+    # top/bottom group of one submission each (rounded 27% of 4)
+    order = np.argsort(matrix.sum(axis=1), kind="stable")
+    assert np.isclose(stats["discrimination"][2], (matrix[order[-1], 2] - matrix[order[0], 2]) / 10)
+
+
+def test_rubric_analytics_flags_outlier_grader(app, instructor_user):
+    rng = np.random.default_rng(7)
+    lenient = User(email="ta@example.com", password_hash="x", role="instructor")
+    db.session.add(lenient)
+    db.session.commit()
+    scores, graders = [], []
+    for i in range(120):
+        generous = i % 4 == 0
+        row = np.clip(rng.normal(9 if generous else 5, 1.0, size=3), 0, 10).round(1)
+        scores.append(row.tolist())
+        graders.append(lenient.id if generous else instructor_user.id)
+    assignment, _ = _scored_assignment(scores, graders)
+
+    result = rubric_analytics(assignment.id)
+    assert result["submissions"] == 120
+    assert [item["scored"] for item in result["items"]] == [120, 120, 120]
+    by_email = {g["email"]: g for g in result["graders"]}
+    assert by_email["ta@example.com"]["outlier"] is True
+    assert by_email["ta@example.com"]["mean_percent"] > by_email[instructor_user.email]["mean_percent"]
+
+
+def test_rubric_analytics_endpoint(client, instructor_user):
+    assignment, _ = _scored_assignment([[1, 2], [3, 4]])
+    client.post("/auth/login", data={"email": instructor_user.email, "password": "password123"})
+
+    resp = client.get(f"/assignments/{assignment.id}/rubric-analytics.json")
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert [item["mean"] for item in data["items"]] == [2.0, 3.0]
+
+
+def test_zero_point_items_give_null_not_infinity(client, instructor_user):
+    assignment, items = _scored_assignment([[1, 0], [3, 0]])
+    for item in items:
+        item.max_points = 0
+    db.session.commit()
+    client.post("/auth/login", data={"email": instructor_user.email, "password": "password123"})
+
+    resp = client.get(f"/assignments/{assignment.id}/rubric-analytics.json")
+    assert b"Infinity" not in resp.data and b"NaN" not in resp.data
+    data = resp.get_json()
+    assert data["items"][0]["difficulty"] is None
+    assert data["graders"][0]["mean_percent"] is None
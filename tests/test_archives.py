@@ -0,0 +1,149 @@
+import io
+import zipfile
+
+import pytest
+
+from app.models import db, Course, Assignment, Submission, Job
+
+PDF = b"%PDF-1.4\n<< /Type /Page >>\n%%EOF\n"
+
+
+@pytest.fixture
+def assignment(app, client, student_user, tmp_path):
+    app.config["UPLOAD_FOLDER"] = tmp_path
+    assignment = Assignment(course=Course.query.first(), title="HW 1")
+    db.session.add(assignment)
+    db.session.commit()
+    client.post("/auth/login", data={"email": student_user.email, "password": "password123"})
+    client.post(
+        f"/assignments/{assignment.id}/submit",
+        data={"student_file": (io.BytesIO(PDF), "hw1.pdf")},
+        content_type="multipart/form-data",
+    )
+    client.get("/auth/logout")
+    return assignment
+
+
+def _login(client, user):
+    client.post("/auth/login", data={"email": user.email, "password": "password123"})
+
+
+def test_zip_download_streams_stored_entries(client, assignment, student_user, instructor_user):
+    _login(client, instructor_user)
+    resp = client.get(f"/assignments/{assignment.id}/submissions.zip")
+    assert resp.status_code == 200
+    assert resp.is_streamed
+    assert resp.mimetype == "application/zip"
+
+    with zipfile.ZipFile(io.BytesIO(resp.data)) as archive:
+        info = archive.getinfo(f"submissions/{student_user.email}.pdf")
+        assert info.compress_type == zipfile.ZIP_STORED
+        assert archive.read(info) == PDF
+        assert archive.testzip() is None
+
+
+def test_missing_files_are_listed(client, assignment, instructor_user):
+    Submission.query.one().student_file_path = "blobs/00/gone.pdf"
+    db.session.commit()
+    _login(client, instructor_user)
+    with zipfile.ZipFile(io.BytesIO(client.get(f"/assignments/{assignment.id}/submissions.zip").data)) as archive:
+        assert "gone" not in "".join(archive.namelist())
+        assert "student@example.com" in archive.read("MISSING.txt").decode()
+
+
+def test_graded_zip_round_trip(client, assignment, student_user, instructor_user):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as archive:
+        archive.writestr(f"graded/{student_user.email.upper()}.pdf", PDF + b"% graded\n")
+        archive.writestr("graded/nobody@example.com.pdf", PDF)
+    buf.seek(0)
+
+    _login(client, instructor_user)
+    resp = client.post(
+        f"/assignments/{assignment.id}/graded-zip",
+        data={"graded_zip": (buf, "graded.zip")},
+        content_type="multipart/form-data",
+        follow_redirects=True,
+    )
+    assert b"Attached 1 graded PDFs" in resp.data
+    assert b"nobody@example.com.pdf" in resp.data
+
+    sub = Submission.query.one()
+    assert sub.graded_by_id == instructor_user.id
+    assert sub.graded_file_path.startswith("blobs/")
+    assert Job.query.filter_by(submission_id=sub.id, kind="inspect_pdf").count() == 2
+
+    resp = client.get(f"/assignments/{assignment.id}/submissions.zip?graded=1")
+    with zipfile.ZipFile(io.BytesIO(resp.data)) as archive:
+        assert archive.read(f"graded/{student_user.email}.pdf").endswith(b"% graded\n")
+
+
+def test_oversized_entry_attaches_nothing(app, client, assignment, instructor_user):
+    app.config["MAX_CONTENT_LENGTH"] = 500
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as archive:
+        archive.writestr("a@example.com.pdf", PDF)
+        archive.writestr("student@example.com.pdf", PDF + b"x" * 1000)
+    buf.seek(0)
+
+    _login(client, instructor_user)
+    resp = client.post(
+        f"/assignments/{assignment.id}/graded-zip",
+        data={"graded_zip": (buf, "graded.zip")},
+        content_type="multipart/form-data",
+        follow_redirects=True,
+    )
+    assert resp.status_code == 200
+    assert b"larger than the upload limit" in resp.data
+    assert Submission.query.one().graded_file_path is None
+
+
+def test_archives_are_instructor_only(client, assignment, student_user):
+    _login(client, student_user)
+    assert client.get(f"/assignments/{assignment.id}/submissions.zip").status_code == 403
+    assert client.post(f"/assignments/{assignment.id}/graded-zip").status_code == 403
+
+
+def test_download_does_not_block_writers(tmp_path):
+    import sqlite3
+
+    from werkzeug.security import generate_password_hash
+
+    from app import create_app
+    from app.models import User
+
+    path = tmp_path / "app.db"
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", "UPLOAD_FOLDER": tmp_path})
+    (tmp_path / "s.pdf").write_bytes(PDF)
+    with app.app_context():
+        db.create_all()
+        course = Course(code="CMPE 131")
+        prof = User(email="prof@example.com", password_hash=generate_password_hash("password123"), role="instructor")
+        assignment = Assignment(course=course, title="HW 1")
+        db.session.add_all([course, prof, assignment])
+        db.session.flush()
+        # More rows than one fetch batch, so a streaming cursor would stay open
+        db.session.execute(db.insert(User), [
+            {"email": f"s{i:04}@example.com", "password_hash": "x"} for i in range(800)
+        ])
+        db.session.execute(db.insert(Submission), [
+            {"assignment_id": assignment.id, "student_id": uid, "student_file_path": "s.pdf"}
+            for uid in db.session.scalars(db.select(User.id).where(User.role == "student"))
+        ])
+        db.session.commit()
+        assignment_id, prof_id = assignment.id, prof.id
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(prof_id)
+        sess["_fresh"] = True
+    resp = client.get(f"/assignments/{assignment_id}/submissions.zip")
+    body = iter(resp.response)
+    next(body)  # mid-download
+
+    writer = sqlite3.connect(path, timeout=0)
+    writer.execute("UPDATE submission SET total_score = 1")
+    writer.commit()
+    writer.close()
+    b"".join(body)
+    resp.close()
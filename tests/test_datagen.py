@@ -0,0 +1,27 @@
+from sqlalchemy import select
+
+from app import blobstore, stats
+from app.models import db, Blob, Submission
+from benchmarks.datagen import generate
+
+
+def _snapshot():
+    return db.session.execute(
+        select(Submission.assignment_id, Submission.student_id, Submission.total_score, Submission.student_file_path)
+        .order_by(Submission.id)
+    ).all()
+
+
+def test_generator_is_deterministic_and_consistent(app, tmp_path):
+    app.config["UPLOAD_FOLDER"] = tmp_path / "a"
+    data = generate(courses=2, students=5, assignments=2, rubric_items=2, pdfs=3, pdf_kb=1, seed=7)
+    first = _snapshot()
+    assert len(first) == data.submissions > 0
+    assert stats.check() == []
+    assert dict(db.session.execute(select(Blob.sha256, Blob.ref_count)).all()) == blobstore.count_references()
+
+    db.drop_all()
+    db.create_all()
+    app.config["UPLOAD_FOLDER"] = tmp_path / "b"
+    generate(courses=2, students=5, assignments=2, rubric_items=2, pdfs=3, pdf_kb=1, seed=7)
+    assert _snapshot() == first
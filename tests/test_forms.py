@@ -1,4 +1,4 @@
-from app.forms import LoginForm, RegistrationForm
+from app.forms import GradeForm, LoginForm, RegistrationForm
 
 
 def test_login_form_requires_valid_email(app):
@@ -17,4 +17,15 @@ def test_registration_passwords_must_match(app):
         }
     )
     assert not form.validate()
-    assert any("must match" in err for err in form.confirm_password.errors)
\ No newline at end of file
+    assert any("must match" in err for err in form.confirm_password.errors)
+
+
+def test_grade_form_rejects_non_finite_scores(app):
+    from werkzeug.datastructures import MultiDict
+
+    with app.test_request_context(method="POST"):
+        for value in ("inf", "1e400", "nan"):
+            form = GradeForm(formdata=MultiDict({"total_score": value}))
+            assert not form.validate()
+            assert form.total_score.errors == ["Enter a finite number."]
+        assert GradeForm(formdata=MultiDict({"total_score": "9.5"})).validate()
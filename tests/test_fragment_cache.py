@@ -0,0 +1,95 @@
+import pytest
+
+from app import create_app
+from app.cache import SerializingBackend
+from app.fragment_cache import fragment_cache
+from app.models import db, User, Course, Assignment, Submission
+
+
+@pytest.fixture(autouse=True)
+def single_process(app):
+    # The tests run in one process, where the in-process cache is safe
+    fragment_cache.enabled = True
+
+
+def _login(client, user):
+    client.post("/auth/login", data={"email": user.email, "password": "password123"})
+
+
+def test_instructor_dashboard_served_from_cache_until_assignment_commit(app, client, instructor_user):
+    course = Course.query.first()
+    _login(client, instructor_user)
+    fragment_cache.reset_stats()
+
+    client.get(f"/dashboard?course_id={course.id}")
+    resp = client.get(f"/dashboard?course_id={course.id}")
+    assert fragment_cache.stats()["instructor_assignments"] == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+    assert b"No assignments yet" in resp.data
+
+    db.session.add(Assignment(course=course, title="HW 7"))
+    db.session.commit()
+    resp = client.get(f"/dashboard?course_id={course.id}")
+    assert b"HW 7" in resp.data
+    assert fragment_cache.stats()["instructor_assignments"]["misses"] == 2
+
+
+def test_rollback_does_not_invalidate(app, client, instructor_user):
+    course = Course.query.first()
+    _login(client, instructor_user)
+    client.get(f"/dashboard?course_id={course.id}")
+    fragment_cache.reset_stats()
+
+    db.session.add(Assignment(course=course, title="Never saved"))
+    db.session.flush()
+    db.session.rollback()
+    client.get(f"/dashboard?course_id={course.id}")
+    assert fragment_cache.stats()["instructor_assignments"]["hits"] == 1
+
+
+def test_grading_invalidates_only_that_students_table(app, client, student_user):
+    course = Course.query.first()
+    hw = Assignment(course=course, title="HW 1")
+    other = User(email="other@example.com", password_hash="x", role="student")
+    db.session.add_all([hw, other])
+    db.session.flush()
+    mine = Submission(assignment=hw, student=student_user, student_file_path="a.pdf")
+    db.session.add_all([mine, Submission(assignment=hw, student=other, student_file_path="b.pdf")])
+    db.session.commit()
+
+    _login(client, student_user)
+    assert b"Submitted" in client.get(f"/dashboard?course_id={course.id}").data
+    fragment_cache.reset_stats()
+
+    Submission.query.filter_by(student_id=other.id).one().total_score = 4.0
+    db.session.commit()
+    client.get(f"/dashboard?course_id={course.id}")
+    assert fragment_cache.stats()["student_assignments"]["hits"] == 1
+
+    mine.total_score = 8.5
+    db.session.commit()
+    resp = client.get(f"/dashboard?course_id={course.id}")
+    assert b"8.5" in resp.data
+    assert fragment_cache.stats()["student_assignments"]["misses"] == 1
+
+
+def test_lost_generation_never_revives_old_fragment(app):
+    fragment_cache.backend = SerializingBackend()
+    calls = []
+
+    def render():
+        calls.append(1)
+        return f"<p>{len(calls)}</p>"
+
+    assert fragment_cache.render("demo", ["course:1"], [], render) == "<p>1</p>"
+    fragment_cache.backend.delete("gen:course:1")  # e.g. evicted from the LRU
+    assert fragment_cache.render("demo", ["course:1"], [], render) == "<p>2</p>"
+
+
+def test_in_process_cache_is_off_unless_enabled_explicitly():
+    config = {"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"}
+    create_app(config)
+    assert fragment_cache.enabled is False
+    create_app({**config, "FRAGMENT_CACHE_BACKEND": SerializingBackend})
+    assert fragment_cache.enabled is True
+    create_app({**config, "FRAGMENT_CACHE_ENABLED": True})
+    assert fragment_cache.enabled is True
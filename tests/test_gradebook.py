@@ -0,0 +1,104 @@
+import csv
+import io
+
+import pytest
+
+from app import gradebook
+from app.models import db, User, Course, Enrollment, Assignment, Submission, RubricItem, SubmissionRubricScore
+
+
+def _seed(course):
+    hw1 = Assignment(course=course, title="HW 1")
+    hw2 = Assignment(course=course, title="HW 2")
+    item = RubricItem(assignment=hw1, label="Correctness", max_points=10)
+    db.session.add_all([hw1, hw2, item])
+    students = []
+    for email in ["bea@example.com", "amy@example.com", "cal@example.com"]:
+        user = User(email=email, password_hash="hash")
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Enrollment(user_id=user.id, course_id=course.id, role="student"))
+        students.append(user)
+    bea, amy, _cal = students
+    sub = Submission(assignment=hw1, student=amy, total_score=9.0)
+    db.session.add_all([
+        sub,
+        Submission(assignment=hw2, student=amy, total_score=7.5),
+        Submission(assignment=hw1, student=bea),  # submitted, not graded
+        SubmissionRubricScore(submission=sub, rubric_item=item, points=9),
+    ])
+    # a submission in another course must not leak in
+    other = Course(code="OTHER", title="x")
+    db.session.add(Submission(assignment=Assignment(course=other, title="HW 1"), student=bea, total_score=1))
+    db.session.commit()
+
+
+@pytest.mark.parametrize("batch", [500, 1])
+def test_gradebook_csv_pivots_scores(app, client, instructor_user, monkeypatch, batch):
+    monkeypatch.setattr(gradebook, "BATCH_STUDENTS", batch)
+    course = Course.query.first()
+    _seed(course)
+    client.post("/auth/login", data={"email": instructor_user.email, "password": "password123"})
+
+    resp = client.get(f"/courses/{course.id}/gradebook.csv?rubric=1")
+
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/csv"
+    assert "attachment" in resp.headers["Content-Disposition"]
+    rows = list(csv.reader(io.StringIO(resp.get_data(as_text=True))))
+    assert rows == [
+        ["email", "HW 1", "HW 2", "HW 1: Correctness"],
+        ["amy@example.com", "9", "7.5", "9"],
+        ["bea@example.com", "", "", ""],
+        ["cal@example.com", "", "", ""],
+    ]
+
+
+def test_gradebook_requires_instructor(app, client, student_user):
+    client.post("/auth/login", data={"email": student_user.email, "password": "password123"})
+    assert client.get(f"/courses/{Course.query.first().id}/gradebook.csv").status_code == 403
+
+
+def test_export_does_not_block_writers(tmp_path, monkeypatch):
+    import sqlite3
+
+    from werkzeug.security import generate_password_hash
+
+    from app import create_app
+
+    monkeypatch.setattr(gradebook, "BATCH_STUDENTS", 100)
+    path = tmp_path / "app.db"
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}"})
+    with app.app_context():
+        db.create_all()
+        course = Course(code="CMPE 131")
+        prof = User(email="prof@example.com", password_hash=generate_password_hash("password123"), role="instructor")
+        db.session.add_all([course, prof, Assignment(course=course, title="HW 1")])
+        db.session.flush()
+        # More rows than one yield_per fetch, so a streaming cursor would stay open
+        db.session.execute(db.insert(User), [
+            {"email": f"s{i:04}@example.com", "password_hash": "x"} for i in range(2500)
+        ])
+        db.session.execute(db.insert(Enrollment), [
+            {"user_id": uid, "course_id": course.id, "role": "student"}
+            for uid in db.session.scalars(db.select(User.id).where(User.role == "student"))
+        ])
+        db.session.commit()
+        course_id, prof_id = course.id, prof.id
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(prof_id)
+        sess["_fresh"] = True
+    resp = client.get(f"/courses/{course_id}/gradebook.csv")
+    body = iter(resp.response)
+    next(body)  # header
+    next(body)  # mid-export
+
+    writer = sqlite3.connect(path, timeout=0)
+    writer.execute("UPDATE course SET title = 'Renamed'")
+    writer.commit()
+    writer.close()
+    lines = list(body)
+    resp.close()
+    assert len(lines) == 2499
@@ -0,0 +1,121 @@
+from datetime import datetime
+
+import pytest
+
+from app.grading import apply_grades, GradingError
+from app.models import db, User, Course, Assignment, Submission, RubricItem, SubmissionRubricScore
+
+
+@pytest.fixture
+def graded_assignment(app):
+    course = Course.query.first()
+    assignment = Assignment(course=course, title="HW 1")
+    other = Assignment(course=course, title="HW 2")
+    db.session.add_all([assignment, other])
+    db.session.flush()
+    q1 = RubricItem(assignment=assignment, label="Q1", max_points=5)
+    q2 = RubricItem(assignment=assignment, label="Q2", max_points=3)
+    foreign = RubricItem(assignment=other, label="X", max_points=10)
+    subs = []
+    for i in range(3):
+        student = User(email=f"g{i}@example.com", password_hash="x")
+        subs.append(Submission(assignment=assignment, student=student, student_file_path=f"{i}.pdf"))
+    stray = Submission(assignment=other, student=User(email="stray@example.com", password_hash="x"))
+    db.session.add_all([q1, q2, foreign, *subs, stray])
+    db.session.commit()
+    return assignment, (q1, q2, foreign), subs, stray
+
+
+def test_batch_upserts_rubric_points_and_recomputes_totals(graded_assignment):
+    assignment, (q1, q2, _), subs, _ = graded_assignment
+    db.session.add(SubmissionRubricScore(submission=subs[0], rubric_item=q2, points=1, comment="old"))
+    db.session.commit()
+
+    count = apply_grades(assignment, [
+        {"submission_id": subs[0].id, "rubric": [{"rubric_item_id": q1.id, "points": 4}]},
+        {"submission_id": subs[1].id, "general_comment": "Good",
+         "rubric": [{"rubric_item_id": q1.id, "points": 5}, {"rubric_item_id": q2.id, "points": 2.5}]},
+        {"submission_id": subs[2].id, "total_score": 7},
+    ])
+    assert count == 3
+
+    db.session.expire_all()
+    assert subs[0].total_score == 5.0  # new Q1 plus the existing Q2 point
+    assert subs[1].total_score == 7.5 and subs[1].general_comment == "Good"
+    assert subs[2].total_score == 7.0
+    assert all(s.graded_at is not None for s in subs)
+
+    apply_grades(assignment, [{"submission_id": subs[0].id, "rubric": [{"rubric_item_id": q2.id, "points": 3}]}])
+    db.session.expire_all()
+    row = SubmissionRubricScore.query.filter_by(submission_id=subs[0].id, rubric_item_id=q2.id).one()
+    assert (row.points, row.comment) == (3.0, "old")
+    assert subs[0].total_score == 7.0
+
+
+def test_comment_only_entry_keeps_manual_total(graded_assignment):
+    assignment, (q1, _, _), subs, _ = graded_assignment
+    graded_at = datetime(2024, 1, 1)
+    subs[0].total_score, subs[0].graded_at = 9.5, graded_at
+    db.session.commit()
+
+    apply_grades(assignment, [
+        {"submission_id": subs[0].id, "rubric": [{"rubric_item_id": q1.id, "comment": "see page 2"}]},
+    ])
+    db.session.expire_all()
+    assert subs[0].total_score == 9.5
+    assert subs[0].graded_at == graded_at
+    row = SubmissionRubricScore.query.filter_by(submission_id=subs[0].id, rubric_item_id=q1.id).one()
+    assert (row.points, row.comment) == (None, "see page 2")
+
+
+def test_non_finite_total_is_rejected(graded_assignment):
+    assignment, _, subs, _ = graded_assignment
+    for value in (float("inf"), float("nan")):
+        with pytest.raises(GradingError):
+            apply_grades(assignment, [{"submission_id": subs[0].id, "total_score": value}])
+
+
+def test_invalid_entry_rejects_whole_batch(graded_assignment):
+    assignment, (q1, _, foreign), subs, stray = graded_assignment
+
+    with pytest.raises(GradingError) as exc:
+        apply_grades(assignment, [
+            {"submission_id": subs[0].id, "total_score": 3},
+            {"submission_id": subs[1].id, "rubric": [{"rubric_item_id": q1.id, "points": 6}]},
+            {"submission_id": subs[2].id, "rubric": [{"rubric_item_id": foreign.id, "points": 1}]},
+            {"submission_id": stray.id, "total_score": 1},
+        ])
+    assert [e["index"] for e in exc.value.errors] == [1, 2, 3]
+
+    db.session.rollback()
+    assert subs[0].total_score is None
+    assert SubmissionRubricScore.query.count() == 0
+
+
+def test_batch_grade_endpoint(client, instructor_user, graded_assignment):
+    assignment, (q1, _, _), subs, _ = graded_assignment
+    client.post("/auth/login", data={"email": instructor_user.email, "password": "password123"})
+
+    resp = client.post(f"/assignments/{assignment.id}/grades", json={
+        "grades": [{"submission_id": s.id, "rubric": [{"rubric_item_id": q1.id, "points": 2}]} for s in subs],
+    })
+    assert resp.status_code == 200
+    assert resp.get_json()["graded"] == 3
+
+    resp = client.post(f"/assignments/{assignment.id}/grades", json={"grades": [{"submission_id": subs[0].id, "total_score": -1}]})
+    assert resp.status_code == 400
+    assert resp.get_json()["errors"][0]["submission_id"] == subs[0].id
+
+
+def test_malformed_ids_and_rubric_are_reported_not_raised(client, instructor_user, graded_assignment):
+    assignment, (q1, _, _), subs, _ = graded_assignment
+    client.post("/auth/login", data={"email": instructor_user.email, "password": "password123"})
+
+    resp = client.post(f"/assignments/{assignment.id}/grades", json={"grades": [
+        {"submission_id": [subs[0].id]},
+        {"submission_id": True},
+        {"submission_id": subs[1].id, "rubric": 5},
+        {"submission_id": subs[2].id, "rubric": [{"rubric_item_id": [q1.id], "points": 1}]},
+    ]})
+    assert resp.status_code == 400
+    assert [e["index"] for e in resp.get_json()["errors"]] == [0, 1, 2, 3]
@@ -0,0 +1,127 @@
+import io
+import json
+import sys
+import types
+
+import pytest
+
+from app import jobs
+from app.jobs import enqueue, run_pending, claim_next, requeue_stale, job_handler
+from app.models import db, Job, Course, Assignment, Submission
+
+
+@pytest.fixture
+def upload_dir(app, tmp_path):
+    app.config["UPLOAD_FOLDER"] = tmp_path
+    return tmp_path
+
+
+PDF = b"%PDF-1.4\n<< /Type /Page >>\n<< /Type /Page >>\n<< /Type /Pages /Count 2 >>\n%%EOF\n"
+
+
+def test_submit_enqueues_job_and_worker_records_result(app, client, student_user, upload_dir):
+    assignment = Assignment(course=Course.query.first(), title="HW 1")
+    db.session.add(assignment)
+    db.session.commit()
+    client.post("/auth/login", data={"email": student_user.email, "password": "password123"})
+
+    client.post(
+        f"/assignments/{assignment.id}/submit",
+        data={"student_file": (io.BytesIO(PDF), "hw1.pdf")},
+        content_type="multipart/form-data",
+    )
+    job = Job.query.one()
+    assert (job.kind, job.status) == ("inspect_pdf", "queued")
+
+    assert run_pending() == 1
+    job = db.session.get(Job, job.id)
+    assert job.status == "done"
+    assert job.result_data == {"valid": True, "pages": 2, "size": len(PDF), "error": None}
+
+    sub = Submission.query.one()
+    resp = client.get(f"/submissions/{sub.id}")
+    assert b"2 pages" in resp.data
+
+
+def test_failed_job_is_retried_then_marked_failed(app):
+    app.config["JOB_MAX_ATTEMPTS"] = 2
+    calls = []
+
+    @job_handler("explode")
+    def explode():
+        calls.append(1)
+        raise RuntimeError("boom")
+
+    try:
+        enqueue("explode")
+        db.session.commit()
+
+        run_pending()
+        job = Job.query.one()
+        assert job.status == "queued" and job.attempts == 1
+        assert "boom" in job.error
+
+        job.run_after = job.created_at  # skip the backoff
+        db.session.commit()
+        run_pending()
+        job = Job.query.one()
+        assert job.status == "failed" and job.attempts == 2
+        assert len(calls) == 2
+    finally:
+        jobs.HANDLERS.pop("explode")
+
+
+def test_claim_is_exclusive_and_stale_jobs_requeue(app):
+    enqueue("inspect_pdf", path="missing.pdf")
+    db.session.commit()
+
+    job = claim_next()
+    assert job.status == "running"
+    assert claim_next() is None
+
+    assert requeue_stale(stale_after=-1) == 1
+    assert db.session.get(Job, job.id).status == "queued"
+
+
+def test_enqueue_rolls_back_with_the_request(app):
+    enqueue("inspect_pdf", path="x.pdf")
+    db.session.rollback()
+    assert Job.query.count() == 0
+    assert json.loads(enqueue("inspect_pdf", path="y.pdf").payload) == {"path": "y.pdf"}
+
+
+def test_inspect_pdf_counts_pages_across_chunk_boundaries(tmp_path):
+    from app.pdf import inspect_pdf
+
+    path = tmp_path / "scan.pdf"
+    body = b"".join(b"<< /Type /Page /Parent 2 0 R >>\n" for _ in range(25))
+    path.write_bytes(b"%PDF-1.7\n" + body + b"<< /Type /Pages >>\n%%EOF")
+
+    for chunk_size in (1, 5, 64, 4096):
+        assert inspect_pdf(path, chunk_size=chunk_size)["pages"] == 25
+
+    path.write_bytes(b"%PDF-1.7\n" + body)  # truncated
+    assert inspect_pdf(path)["valid"] is False
+
+
+def test_inspect_pdf_prefers_pymupdf_page_count(tmp_path, monkeypatch):
+    from app.pdf import inspect_pdf
+
+    class FakeDoc(list):
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    # Page objects inside a compressed object stream: the byte scan sees none
+    path = tmp_path / "compressed.pdf"
+    path.write_bytes(b"%PDF-1.5\n1 0 obj << /Type /ObjStm /Filter /FlateDecode >>\n%%EOF")
+    assert inspect_pdf(path)["pages"] == 0
+    monkeypatch.setitem(sys.modules, "fitz", types.SimpleNamespace(open=lambda p: FakeDoc([1, 2, 3])))
+    assert inspect_pdf(path)["pages"] == 3
+
+    # An incremental update left an orphaned page object behind: trust the parser
+    path.write_bytes(b"%PDF-1.4\n<< /Type /Page >>\n<< /Type /Page >>\n%%EOF")
+    monkeypatch.setitem(sys.modules, "fitz", types.SimpleNamespace(open=lambda p: FakeDoc([1])))
+    assert inspect_pdf(path)["pages"] == 1
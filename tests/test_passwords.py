@@ -0,0 +1,89 @@
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app.models import db, User
+from app.passwords import PasswordHasher, HasherBusy, password_hasher
+from app.ratelimit import auth_limiter
+
+FAST = "pbkdf2:sha256:1000"
+
+
+def _login(client, email, password="password123"):
+    return client.post("/auth/login", data={"email": email, "password": password})
+
+
+def test_pool_hashes_and_verifies():
+    hasher = PasswordHasher(method=FAST, workers=1, max_pending=4)
+    try:
+        pwhash = hasher.hash("s3cret")
+        assert pwhash.startswith("pbkdf2:sha256:1000$")
+        assert hasher.verify(pwhash, "s3cret")
+        assert not hasher.verify(pwhash, "wrong")
+        assert not hasher.needs_rehash(pwhash)
+        assert hasher.needs_rehash(generate_password_hash("s3cret", method="pbkdf2:sha256:2000"))
+    finally:
+        hasher.shutdown()
+
+
+def test_full_queue_raises_busy():
+    hasher = PasswordHasher(method=FAST, max_pending=1)
+    hasher._slots.acquire()
+    with pytest.raises(HasherBusy):
+        hasher.hash("x")
+
+
+def test_login_rehashes_outdated_hash(app, client, instructor_user):
+    password_hasher.method = FAST
+    assert password_hasher.needs_rehash(instructor_user.password_hash)
+
+    resp = _login(client, instructor_user.email)
+    assert resp.status_code == 302
+    db.session.refresh(instructor_user)
+    assert instructor_user.password_hash.startswith("pbkdf2:sha256:1000$")
+    assert password_hasher.verify(instructor_user.password_hash, "password123")
+
+
+def test_busy_hasher_answers_503(app, client, instructor_user, monkeypatch):
+    def busy(*args):
+        raise HasherBusy("full")
+
+    monkeypatch.setattr(password_hasher, "verify", busy)
+    resp = _login(client, instructor_user.email)
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"]
+
+
+def test_login_attempts_are_rate_limited_per_account(app, client, instructor_user):
+    auth_limiter.limit = 3
+    for _ in range(3):
+        assert _login(client, instructor_user.email, "wrong-password").status_code == 200
+    resp = _login(client, instructor_user.email)
+    assert resp.status_code == 429
+    assert int(resp.headers["Retry-After"]) > 0
+
+    # other accounts behind the same address are unaffected
+    db.session.add(User(email="other@example.com", password_hash=generate_password_hash("password123")))
+    db.session.commit()
+    assert _login(client, "other@example.com").status_code == 302
+
+
+def test_ip_limit_keys_on_the_forwarded_client_address():
+    from app import create_app
+
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "WTF_CSRF_ENABLED": False,
+        "PROXY_TRUSTED_HOPS": 1,
+        "LOGIN_IP_RATE_LIMIT": 2,
+    })
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+
+        def attempt(addr):
+            return client.post("/auth/login", data={"email": "nobody@example.com", "password": "whatever"},
+                               headers={"X-Forwarded-For": addr})
+
+        assert [attempt("203.0.113.1").status_code for _ in range(3)] == [200, 200, 429]
+        assert attempt("203.0.113.2").status_code == 200
@@ -0,0 +1,140 @@
+import io
+import os
+
+import pytest
+
+from app import previews
+from app.jobs import run_pending
+from app.models import db, Course, Assignment, Submission
+
+PDF = b"%PDF-1.4\n" + b"<< /Type /Page >>\n" * 3 + b"<< /Type /Pages /Count 3 >>\n%%EOF\n"
+
+
+@pytest.fixture
+def fake_renderer(app, tmp_path, monkeypatch):
+    app.config.update(UPLOAD_FOLDER=tmp_path, PREVIEW_RENDERER="fake")
+    calls = []
+
+    def render(pdf_path, page, dpi, out_path):
+        calls.append((page, dpi))
+        with open(out_path, "wb") as f:
+            f.write(b"\x89PNG fake %d %d" % (page, dpi) + b"." * 100)
+
+    monkeypatch.setitem(previews.RENDERERS, "fake", render)
+    return calls
+
+
+def _submit(client, student_user):
+    assignment = Assignment(course=Course.query.first(), title="HW 1")
+    db.session.add(assignment)
+    db.session.commit()
+    client.post("/auth/login", data={"email": student_user.email, "password": "password123"})
+    client.post(
+        f"/assignments/{assignment.id}/submit",
+        data={"student_file": (io.BytesIO(PDF), "hw1.pdf")},
+        content_type="multipart/form-data",
+    )
+    client.get("/auth/logout")
+    run_pending()
+    return Submission.query.one()
+
+
+def test_upload_job_builds_thumbnails_once_per_file(app, client, student_user, fake_renderer):
+    sub = _submit(client, student_user)
+    info = previews.preview_info(sub.student_file_path)
+    assert (info["pages"], info["thumbs"]) == (3, 3)
+    assert fake_renderer == [(1, 20), (2, 20), (3, 20)]
+
+    # Same bytes again: everything is already cached under the hash
+    assert previews.build(sub.student_file_path, 3) == 3
+    assert len(fake_renderer) == 3
+
+
+def test_full_page_rendered_lazily_for_instructors(app, client, student_user, instructor_user, fake_renderer):
+    sub = _submit(client, student_user)
+    sha = previews.preview_info(sub.student_file_path)["sha"]
+
+    client.post("/auth/login", data={"email": instructor_user.email, "password": "password123"})
+    grading = client.get(f"/assignments/{sub.assignment_id}/grade/{sub.id}")
+    assert f"/previews/{sha}/2-thumb.png".encode() in grading.data
+
+    resp = client.get(f"/previews/{sha}/2-page.png")
+    assert resp.status_code == 200
+    assert resp.data.startswith(b"\x89PNG fake 2 100")
+    client.get(f"/previews/{sha}/2-page.png")
+    assert fake_renderer.count((2, 100)) == 1
+
+    assert client.get(f"/previews/{sha}/4-page.png").status_code == 404
+    assert client.get(f"/previews/{sha}/1-huge.png").status_code == 404
+
+
+def test_cache_evicts_least_recently_used_files(app, fake_renderer):
+    folder = app.config["UPLOAD_FOLDER"]
+    for n, sha in enumerate(["a" * 64, "b" * 64, "c" * 64]):
+        path = os.path.join(folder, previews.image_path(sha, 1, "thumb"))
+        os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as f:
+            f.write(b"x" * 1000)
+        os.utime(os.path.dirname(path), (n, n))
+
+    assert previews.enforce_budget(max_bytes=2000) == 1000
+    assert not os.path.exists(os.path.join(folder, previews.preview_dir("a" * 64)))
+    assert os.path.exists(os.path.join(folder, previews.preview_dir("c" * 64)))
+
+
+def test_budget_sweep_skips_directories_evicted_mid_scan(app, fake_renderer, monkeypatch):
+    folder = app.config["UPLOAD_FOLDER"]
+    for n, sha in enumerate(["a" * 64, "b" * 64, "c" * 64]):
+        path = os.path.join(folder, previews.image_path(sha, 1, "thumb"))
+        os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as f:
+            f.write(b"x" * 1000)
+        os.utime(os.path.dirname(path), (n, n))
+    scandir = os.scandir
+    gone = {os.path.join(folder, previews.preview_dir("b" * 64)),
+            os.path.dirname(os.path.join(folder, previews.preview_dir("c" * 64)))}
+
+    def racing_scandir(path):
+        # another worker removes these between our listing and our visit
+        if path in gone:
+            previews.shutil.rmtree(path)
+        return scandir(path)
+
+    monkeypatch.setattr(previews.os, "scandir", racing_scandir)
+    assert previews.enforce_budget(max_bytes=0) == 1000
+    assert not os.path.exists(os.path.join(folder, previews.preview_dir("a" * 64)))
+
+
+def test_on_demand_renders_sweep_rarely(app, fake_renderer, monkeypatch):
+    sweeps = []
+    monkeypatch.setattr(previews, "enforce_budget", lambda: sweeps.append(1))
+    monkeypatch.setattr(previews, "_last_sweep", 0.0)
+    sha = "d" * 64
+    for page in (1, 2, 3):
+        previews.render_page(sha, page, "page")
+    assert len(fake_renderer) == 3
+    assert sweeps == [1]
+
+
+def test_render_survives_its_directory_being_evicted(app, fake_renderer, monkeypatch):
+    sha = "e" * 64
+    folder = app.config["UPLOAD_FOLDER"]
+    os.makedirs(os.path.join(folder, previews.preview_dir(sha)))
+    render = previews.RENDERERS["fake"]
+
+    def evicted_while_rendering(pdf_path, page, dpi, out_path):
+        previews.shutil.rmtree(os.path.join(folder, previews.preview_dir(sha)))
+        render(pdf_path, page, dpi, out_path)
+
+    monkeypatch.setitem(previews.RENDERERS, "fake", evicted_while_rendering)
+    rel = previews.render_page(sha, 1, "page", enforce=False)
+    with open(os.path.join(folder, rel), "rb") as f:
+        assert f.read().startswith(b"\x89PNG fake 1 100")
+    assert os.listdir(os.path.join(folder, previews.PREVIEW_DIR, previews.TMP_DIR)) == []
+
+
+def test_without_renderer_only_page_count_is_kept(app, client, student_user, tmp_path):
+    app.config.update(UPLOAD_FOLDER=tmp_path, PREVIEW_RENDERER="none")
+    sub = _submit(client, student_user)
+    assert previews.preview_info(sub.student_file_path)["thumbs"] == 0
+    assert previews.preview_info(sub.student_file_path)["pages"] == 3
@@ -0,0 +1,71 @@
+import pytest
+
+from app import create_app
+from app.models import db, User, Course
+from app.profiling import profiler
+
+
+@pytest.fixture
+def app():
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "WTF_CSRF_ENABLED": False,
+        "PROFILING_ENABLED": True,
+        "PROFILING_METRICS_TOKEN": "scrape-me",
+    })
+
+    def lookups():
+        for user_id in range(1, 7):
+            db.session.get(User, user_id)
+        return "ok"
+
+    app.add_url_rule("/_lookups", "lookups", lookups)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Course(code="CMPE 131-01", title="Software Engineering"))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    profiler.reset()
+
+
+def test_records_sql_rows_and_templates_per_endpoint(client, instructor_user):
+    client.post("/auth/login", data={"email": instructor_user.email, "password": "password123"})
+    profiler.reset()
+    client.get("/dashboard")
+    client.get("/dashboard")
+
+    stats = profiler.snapshot()["main.dashboard"]
+    assert stats["requests"] == 2
+    assert stats["mean_queries"] >= 1
+    assert stats["mean_template_ms"] > 0
+    assert stats["mean_rows"] >= 1
+    assert stats["duration_histogram"]["+Inf"] == 2
+    assert stats["nplusone_requests"] == 0
+
+
+def test_repeated_statement_is_flagged_as_nplusone(client, caplog):
+    client.get("/_lookups")
+    stats = profiler.snapshot()["lookups"]
+    assert stats["nplusone_requests"] == 1
+    assert stats["nplusone_statements"][0]["max_executions"] == 6
+    assert "Possible N+1 in lookups" in caplog.text
+
+
+def test_endpoints_require_instructor_or_token(client, student_user, instructor_user):
+    assert client.get("/admin/metrics").status_code == 403
+
+    resp = client.get("/admin/metrics", headers={"Authorization": "Bearer scrape-me"})
+    assert resp.status_code == 200
+    assert "# TYPE scanva_request_duration_seconds histogram" in resp.text
+    assert 'scanva_request_sql_queries_count{endpoint="profiling.metrics"}' in resp.text
+
+    client.post("/auth/login", data={"email": student_user.email, "password": "password123"})
+    assert client.get("/admin/profile").status_code == 403
+    client.get("/auth/logout")
+    client.post("/auth/login", data={"email": instructor_user.email, "password": "password123"})
+    body = client.get("/admin/profile").get_json()
+    assert "auth.login" in body["endpoints"]
+    assert "total" in body["fragment_cache"]
@@ -0,0 +1,95 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from app.jobs import enqueue, run_pending
+from app.models import db, Assignment, Course, Submission
+from app.pubsub import LocalBackend, broker
+
+
+@pytest.fixture
+def submission(app, student_user):
+    app.config.update(SSE_ENABLED=True, SSE_HEARTBEAT=0.05, SSE_MAX_AGE=0.2)
+    assignment = Assignment(course=Course.query.first(), title="HW 1")
+    db.session.add(assignment)
+    sub = Submission(assignment=assignment, student_id=student_user.id)
+    db.session.add(sub)
+    db.session.commit()
+    return sub
+
+
+def _login(client, user):
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(user.id)
+        sess["_fresh"] = True
+
+
+def _events(resp):
+    events = []
+    for block in resp.get_data(as_text=True).split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if line.startswith(("event", "data")))
+        if "data" in lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_commits_publish_and_rollbacks_do_not(app, submission, student_user):
+    listener = broker.subscribe([f"user:{student_user.id}", f"course:{submission.assignment.course_id}"])
+    submission.total_score = 9
+    db.session.flush()
+    db.session.rollback()
+    assert listener.get(timeout=0) is None
+
+    submission.submitted_at = datetime.utcnow()
+    db.session.commit()
+    submission.total_score = 9
+    db.session.commit()
+    messages = [json.loads(listener.get(timeout=0)) for _ in range(4)]
+    assert [m["status"] for m in messages] == ["submitted", "submitted", "graded", "graded"]
+    assert messages[0]["submission_id"] == submission.id
+    listener.close()
+
+    app.config["JOB_MAX_ATTEMPTS"] = 1
+    enqueue("inspect_pdf", submission_id=submission.id, path="missing.pdf")
+    db.session.commit()
+    listener = broker.subscribe([f"user:{student_user.id}"])
+    run_pending()
+    assert json.loads(listener.get(timeout=0))["status"] == "processed"
+    listener.close()
+
+
+def test_student_stream_only_carries_their_submissions(app, client, submission, student_user, instructor_user):
+    _login(client, student_user)
+    resp = client.get("/events")
+    assert resp.mimetype == "text/event-stream"
+
+    other = Submission(assignment=submission.assignment, student_id=instructor_user.id, total_score=1)
+    db.session.add(other)
+    submission.total_score = 10
+    db.session.commit()
+
+    events = _events(resp)
+    assert [(name, e["submission_id"], e["status"]) for name, e in events] == [
+        ("submission", submission.id, "graded")
+    ]
+    assert isinstance(broker.backend, LocalBackend) and broker.backend.subscriber_count() == 0
+
+
+def test_streams_are_off_unless_enabled(app, client, submission, student_user):
+    app.config["SSE_ENABLED"] = False
+    _login(client, student_user)
+    assert b"EventSource" not in client.get("/dashboard").data
+    assert client.get("/events").status_code == 204
+
+    app.config["SSE_ENABLED"] = True
+    assert b"EventSource" in client.get("/dashboard").data
+
+
+def test_slow_subscriber_gets_resync():
+    backend = LocalBackend(maxsize=2)
+    listener = backend.subscribe(["course:1"])
+    for i in range(3):
+        backend.publish("course:1", json.dumps({"status": "graded", "submission_id": i}))
+    assert json.loads(listener.get(timeout=0)) == {"status": "resync"}
+    assert listener.get(timeout=0) is None
@@ -0,0 +1,149 @@
+import hashlib
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import resumable
+from app.models import db, Course, Assignment, Job, Submission, UploadSession
+
+
+@pytest.fixture
+def assignment(app, tmp_path):
+    app.config.update(UPLOAD_FOLDER=tmp_path, UPLOAD_SESSION_CHUNK_SIZE=10)
+    assignment = Assignment(course=Course.query.first(), title="HW 1")
+    db.session.add(assignment)
+    db.session.commit()
+    return assignment
+
+
+@pytest.fixture
+def student_client(client, student_user):
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(student_user.id)
+        sess["_fresh"] = True
+    return client
+
+
+DATA = b"%PDF-1.4 " + bytes(range(256)) * 2 + b"%%EOF"
+SHA = hashlib.sha256(DATA).hexdigest()
+
+
+def _start(client, assignment, **body):
+    resp = client.post(f"/assignments/{assignment.id}/upload-sessions", json={"size": len(DATA), **body})
+    assert resp.status_code == 201
+    return resp.get_json()
+
+
+def _put(client, upload_id, index, data=None):
+    data = DATA[index * 10:(index + 1) * 10] if data is None else data
+    return client.put(f"/upload-sessions/{upload_id}/chunks/{index}", data=data)
+
+
+def test_chunks_resume_and_finalize_into_submission(assignment, student_client, tmp_path):
+    upload = _start(student_client, assignment, filename="scan.pdf")
+    upload_id, count = upload["upload_id"], upload["chunk_count"]
+    assert count == 53 and upload["received"] == []
+
+    # Out of order, one resent, one too short
+    for index in reversed(range(0, count, 2)):
+        assert _put(student_client, upload_id, index).status_code == 200
+    assert _put(student_client, upload_id, 0).status_code == 200
+    assert _put(student_client, upload_id, 1, b"short").status_code == 400
+
+    status = student_client.get(f"/upload-sessions/{upload_id}").get_json()
+    assert status["received"] == list(range(0, count, 2))
+    resp = student_client.post(f"/upload-sessions/{upload_id}/complete", json={"sha256": SHA})
+    assert resp.status_code == 409 and resp.get_json()["missing"] == list(range(1, count, 2))
+
+    for index in range(1, count, 2):
+        _put(student_client, upload_id, index)
+    resp = student_client.post(f"/upload-sessions/{upload_id}/complete", json={"sha256": SHA})
+    assert resp.status_code == 200
+
+    sub = db.session.get(Submission, resp.get_json()["submission_id"])
+    assert (tmp_path / sub.student_file_path).read_bytes() == DATA
+    assert sub.submitted_at is not None
+    assert Job.query.filter_by(submission_id=sub.id, kind="inspect_pdf").count() == 1
+    assert UploadSession.query.count() == 0
+    assert os.listdir(tmp_path / resumable.CHUNK_DIR) == []
+
+
+def test_checksum_mismatch_reopens_the_session(assignment, student_client):
+    upload = _start(student_client, assignment, sha256=SHA)
+    for index in range(upload["chunk_count"]):
+        _put(student_client, upload["upload_id"], index, b"x" * 10 if index == 3 else None)
+
+    resp = student_client.post(f"/upload-sessions/{upload['upload_id']}/complete")
+    assert resp.status_code == 422
+    assert Submission.query.count() == 0
+
+    _put(student_client, upload["upload_id"], 3)
+    assert student_client.post(f"/upload-sessions/{upload['upload_id']}/complete").status_code == 200
+
+
+def _upload_all(client, assignment):
+    upload = _start(client, assignment, sha256=SHA)
+    for index in range(upload["chunk_count"]):
+        _put(client, upload["upload_id"], index)
+    return upload["upload_id"]
+
+
+def test_failed_attach_reopens_the_session(assignment, student_client, monkeypatch):
+    from app.main import routes
+
+    upload_id = _upload_all(student_client, assignment)
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(routes, "_record_submission", broken)
+    with pytest.raises(RuntimeError):
+        student_client.post(f"/upload-sessions/{upload_id}/complete")
+    assert db.session.get(UploadSession, upload_id).status == "open"
+    assert len(os.listdir(resumable.chunk_dir(upload_id))) == 53
+
+    monkeypatch.undo()
+    assert student_client.post(f"/upload-sessions/{upload_id}/complete").status_code == 200
+
+
+def test_stale_claim_can_be_taken_again(app, assignment, student_client):
+    upload_id = _upload_all(student_client, assignment)
+    session = db.session.get(UploadSession, upload_id)
+    session.status, session.claimed_at = "assembling", datetime.utcnow()
+    db.session.commit()
+    assert student_client.post(f"/upload-sessions/{upload_id}/complete").status_code == 409
+
+    # The process holding the claim died
+    session.claimed_at = datetime.utcnow() - timedelta(seconds=app.config["UPLOAD_SESSION_CLAIM_TIMEOUT"] + 1)
+    db.session.commit()
+    assert student_client.post(f"/upload-sessions/{upload_id}/complete").status_code == 200
+
+
+def test_deleted_assignment_discards_the_session(assignment, student_client):
+    upload_id = _upload_all(student_client, assignment)
+    db.session.delete(assignment)
+    db.session.commit()
+
+    assert student_client.post(f"/upload-sessions/{upload_id}/complete").status_code == 410
+    assert db.session.get(UploadSession, upload_id) is None
+    assert not os.path.exists(resumable.chunk_dir(upload_id))
+    assert Submission.query.count() == 0
+
+
+def test_sessions_are_private_limited_and_expire(app, assignment, student_client, instructor_user):
+    assert student_client.post(f"/assignments/{assignment.id}/upload-sessions",
+                               json={"size": app.config["MAX_CONTENT_LENGTH"] + 1}).status_code == 413
+    upload = _start(student_client, assignment)
+
+    student_client.get("/auth/logout")
+    student_client.post("/auth/login", data={"email": instructor_user.email, "password": "password123"})
+    assert student_client.get(f"/upload-sessions/{upload['upload_id']}").status_code == 404
+
+    session = db.session.get(UploadSession, upload["upload_id"])
+    session.expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    assert resumable.expire() == 1
+    db.session.commit()
+    assert UploadSession.query.count() == 0
+    assert not os.path.exists(resumable.chunk_dir(upload["upload_id"]))
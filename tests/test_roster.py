@@ -0,0 +1,110 @@
+import io
+
+from werkzeug.security import check_password_hash
+
+from app import roster
+from app.models import User, Course, Enrollment
+from app.roster import import_roster
+
+
+CSV = """email,role,password,course
+Alice@example.com,student,alicepw1,
+bob@example.com,,,
+carol@example.com,instructor,carolpw1,CMPE 131-01
+not-an-email,student,x,
+dave@example.com,student,davepw12,NOPE 999
+"""
+
+
+def test_import_roster_creates_users_and_enrollments(app):
+    course = Course.query.first()
+
+    result = import_roster(io.StringIO(CSV), default_password="changeme", default_course=course, workers=0)
+
+    assert result.rows == 5
+    assert result.users_created == 3
+    assert result.enrollments_created == 3
+    assert [line for line, _ in result.skipped] == [5, 6]
+
+    alice = User.query.filter_by(email="alice@example.com").one()
+    assert check_password_hash(alice.password_hash, "alicepw1")
+    bob = User.query.filter_by(email="bob@example.com").one()
+    assert bob.role == "student"
+    assert check_password_hash(bob.password_hash, "changeme")
+    assert Enrollment.query.filter_by(course_id=course.id).count() == 3
+
+
+def test_import_roster_is_idempotent(app):
+    course = Course.query.first()
+    import_roster(io.StringIO(CSV), default_password="changeme", default_course=course, workers=0)
+
+    again = import_roster(io.StringIO(CSV), default_password="changeme", default_course=course, workers=0)
+
+    assert again.users_created == 0
+    assert again.enrollments_created == 0
+    assert User.query.count() == 3
+
+
+def test_import_roster_hashes_in_process_pool(app, monkeypatch):
+    monkeypatch.setattr(roster, "POOL_THRESHOLD", 1)
+    rows = "email\n" + "".join(f"s{i}@example.com\n" for i in range(4))
+
+    result = import_roster(io.StringIO(rows), default_password="poolpass", workers=2)
+
+    assert result.users_created == 4
+    user = User.query.filter_by(email="s3@example.com").one()
+    assert check_password_hash(user.password_hash, "poolpass")
+
+
+def _post_roster(client, course, rows):
+    return client.post(
+        f"/courses/{course.id}/roster",
+        data={"roster_file": (io.BytesIO(rows.encode()), "roster.csv"), "default_password": "webpass1"},
+        content_type="multipart/form-data",
+    )
+
+
+def test_web_import_hashes_on_its_own_pool(app, client, instructor_user, monkeypatch):
+    import concurrent.futures
+    from app.passwords import password_hasher
+
+    own = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(roster, "POOL_THRESHOLD", 1)
+    monkeypatch.setattr(roster, "web_pool", lambda: own)
+
+    def no_new_pool(*args, **kwargs):
+        raise AssertionError("roster import started a pool of its own")
+
+    monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", no_new_pool)
+    monkeypatch.setattr(password_hasher, "_executor", no_new_pool)
+    course = Course.query.first()
+    client.post("/auth/login", data={"email": instructor_user.email, "password": "password123"})
+
+    rows = "email\n" + "".join(f"w{i}@example.com\n" for i in range(3))
+    assert _post_roster(client, course, rows).status_code == 302
+    assert User.query.filter(User.email.like("w%@example.com")).count() == 3
+    assert own.submit(sum, [1, 2]).result() == 3  # left running for the next import
+    own.shutdown()
+
+
+def test_web_import_refuses_large_rosters(app, client, instructor_user):
+    app.config["ROSTER_WEB_MAX_ROWS"] = 2
+    course = Course.query.first()
+    client.post("/auth/login", data={"email": instructor_user.email, "password": "password123"})
+
+    rows = "email\n" + "".join(f"big{i}@example.com\n" for i in range(3))
+    resp = _post_roster(client, course, rows)
+    assert resp.status_code == 200
+    assert b"flask roster import" in resp.data
+    assert User.query.filter(User.email.like("big%")).count() == 0
+
+
+def test_roster_cli(app, runner, tmp_path):
+    path = tmp_path / "roster.csv"
+    path.write_text("email,password\nzed@example.com,zedpass1\n")
+
+    result = runner.invoke(args=["roster", "import", str(path), "--course", "CMPE 131-01", "--workers", "0"])
+
+    assert result.exit_code == 0, result.output
+    assert "1 users and 1 enrollments created" in result.output
+    assert User.query.filter_by(email="zed@example.com").one().enrollments
@@ -44,4 +44,113 @@ def test_register_creates_user(app, client):
 def test_dashboard_requires_login(app, client):
     resp = client.get("/dashboard", follow_redirects=False)
     # Flask-Login should redirect anonymous users to login page (302)
-    assert resp.status_code in (302, 401)
\ No newline at end of file
+    assert resp.status_code in (302, 401)
+
+def test_student_dashboard_shows_only_own_submission(app, client, student_user):
+    from app.models import Course, Assignment, Submission
+
+    course = Course.query.first()
+    other = User(email="other@example.com", password_hash="hash", role="student")
+    hw1 = Assignment(course=course, title="HW 1")
+    hw2 = Assignment(course=course, title="HW 2")
+    db.session.add_all([other, hw1, hw2])
+    db.session.flush()
+    db.session.add_all([
+        Submission(assignment=hw1, student=student_user, total_score=9.5),
+        Submission(assignment=hw2, student=other, total_score=3.0),
+    ])
+    db.session.commit()
+
+    client.post(
+        "/auth/login",
+        data={"email": student_user.email, "password": "password123"},
+    )
+    resp = client.get(f"/dashboard?course_id={course.id}")
+    assert resp.status_code == 200
+    assert b"9.5" in resp.data
+    assert b"Graded" in resp.data
+    # classmate's score on HW 2 must not leak into this student's row
+    assert b"3.0" not in resp.data
+    assert b"Not submitted" in resp.data
+
+
+def _seed_submissions(course, count):
+    from datetime import datetime, timedelta
+    from app.models import Assignment, Enrollment, Submission
+
+    assignment = Assignment(course=course, title="Big HW")
+    db.session.add(assignment)
+    base = datetime(2025, 3, 1)
+    for i in range(count):
+        student = User(email=f"s{i}@example.com", password_hash="hash")
+        db.session.add(Enrollment(user=student, course=course))
+        # every fifth student never submitted (no row at all); some ties on submitted_at, some graded
+        if i % 5 == 0:
+            continue
+        db.session.add(Submission(
+            assignment=assignment,
+            student=student,
+            submitted_at=base + timedelta(minutes=i // 2),
+            student_file_path=f"f{i}.pdf",
+            total_score=float(i) if i % 3 == 0 else None,
+        ))
+    db.session.commit()
+    return assignment
+
+
+def test_submissions_json_keyset_pages_cover_everything(app, client, instructor_user):
+    from app.models import Course, Submission
+
+    assignment = _seed_submissions(Course.query.first(), 13)
+    client.post("/auth/login", data={"email": instructor_user.email, "password": "password123"})
+
+    seen, cursor = [], None
+    while True:
+        url = f"/assignments/{assignment.id}/submissions.json?per_page=4"
+        resp = client.get(url + (f"&after={cursor}" if cursor else ""))
+        assert resp.status_code == 200
+        page = resp.get_json()
+        assert len(page["submissions"]) <= 4
+        seen.extend(page["submissions"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    expected = (
+        Submission.query.filter_by(assignment_id=assignment.id)
+        .order_by(Submission.submitted_at.desc().nullslast(), Submission.id.desc())
+        .all()
+    )
+    assert [s["id"] for s in seen] == [s.id for s in expected]
+    assert seen[0]["student_email"].endswith("@example.com")
+
+
+def test_submissions_list_status_filter(app, client, instructor_user):
+    from app.models import Course
+
+    assignment = _seed_submissions(Course.query.first(), 10)
+    client.post("/auth/login", data={"email": instructor_user.email, "password": "password123"})
+
+    graded = client.get(f"/assignments/{assignment.id}/submissions.json?status=graded").get_json()
+    assert graded["submissions"] and all(s["total_score"] is not None for s in graded["submissions"])
+
+    missing = client.get(f"/assignments/{assignment.id}/submissions.json?status=not_submitted").get_json()
+    assert {s["student_email"] for s in missing["submissions"]} == {"s0@example.com", "s5@example.com"}
+    assert all(s["id"] is None for s in missing["submissions"])
+    first = client.get(f"/assignments/{assignment.id}/submissions.json?status=not_submitted&per_page=1").get_json()
+    rest = client.get(
+        f"/assignments/{assignment.id}/submissions.json?status=not_submitted&after={first['next_cursor']}"
+    ).get_json()
+    assert [s["student_email"] for s in first["submissions"] + rest["submissions"]] == [
+        "s5@example.com", "s0@example.com"
+    ]
+    assert rest["next_cursor"] is None
+    resp = client.get(f"/assignments/{assignment.id}/submissions?status=not_submitted")
+    assert b"s5@example.com" in resp.data and b"No file uploaded" in resp.data
+
+    resp = client.get(f"/assignments/{assignment.id}/submissions?status=submitted")
+    assert resp.status_code == 200
+    assert b"Graded" not in resp.data.split(b"<tbody>")[1]
+
+    assert client.get(f"/assignments/{assignment.id}/submissions?status=bogus").status_code == 400
+    assert client.get(f"/assignments/{assignment.id}/submissions?after=!!").status_code == 400
@@ -0,0 +1,123 @@
+import io
+import shutil
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+from app.models import db, User, Course, Enrollment, Assignment, Submission
+from app.routing import READ_BIND
+
+
+def _seed():
+    course = Course(code="CMPE 131-01")
+    student = User(email="student@example.com", password_hash=generate_password_hash("password123"))
+    db.session.add_all([course, student])
+    db.session.flush()
+    assignment = Assignment(course=course, title="HW 1")
+    db.session.add_all([Enrollment(user_id=student.id, course_id=course.id), assignment])
+    db.session.flush()
+    sub = Submission(assignment=assignment, student_id=student.id)
+    db.session.add(sub)
+    db.session.commit()
+    return student.id, assignment.id, sub.id
+
+
+@pytest.fixture
+def replicated(tmp_path):
+    """App with a primary and a replica file that starts as a copy of it."""
+    primary, replica = tmp_path / "primary.db", tmp_path / "replica.db"
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{primary}",
+        "SQLALCHEMY_READ_URI": f"sqlite:///{replica}",
+        "UPLOAD_FOLDER": tmp_path / "uploads",
+        "WTF_CSRF_ENABLED": False,
+    })
+    with app.app_context():
+        db.create_all()
+        ids = _seed()
+        db.session.remove()
+        db.engine.dispose()
+    shutil.copy(primary, replica)
+    with app.app_context():
+        # Only the primary sees this until "replication" catches up
+        db.session.get(Assignment, ids[1]).title = "HW 1 (revised)"
+        db.session.commit()
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(ids[0])
+        sess["_fresh"] = True
+    return app, client, ids
+
+
+def test_read_only_views_read_the_replica_until_the_user_writes(replicated):
+    app, client, (_, assignment_id, sub_id) = replicated
+
+    assert b"HW 1 (revised)" not in client.get(f"/submissions/{sub_id}").data
+    assert b"HW 1 (revised)" in client.get(f"/assignments/{assignment_id}/submit").data
+
+    resp = client.post(
+        f"/assignments/{assignment_id}/submit",
+        data={"student_file": (io.BytesIO(b"%PDF-1.4 hello"), "hw1.pdf")},
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 302
+    # Sticky after the write: the same view now reads the primary
+    assert b"HW 1 (revised)" in client.get(f"/submissions/{sub_id}").data
+
+    app.config["DB_READ_STICKY_SECONDS"] = 0
+    with client.session_transaction() as sess:
+        sess.pop("_db_primary_until")
+    assert b"HW 1 (revised)" not in client.get(f"/submissions/{sub_id}").data
+
+
+def test_streamed_gradebook_reads_the_replica(replicated, tmp_path):
+    import sqlite3
+
+    app, client, (_, assignment_id, _sub_id) = replicated
+    for name in ("primary.db", "replica.db"):
+        conn = sqlite3.connect(tmp_path / name)
+        conn.execute("UPDATE user SET role = 'instructor'")
+        conn.commit()
+        conn.close()
+    with app.app_context():
+        course_id = db.session.get(Assignment, assignment_id).course_id
+
+    resp = client.get(f"/courses/{course_id}/gradebook.csv")
+    assert resp.status_code == 200
+    assert resp.get_data(as_text=True).splitlines()[0] == "email,HW 1"
+
+
+def test_fragments_rendered_from_the_replica_are_not_cached(replicated):
+    from app.fragment_cache import fragment_cache
+
+    app, client, _ids = replicated
+    fragment_cache.enabled = True
+    fragment_cache.reset_stats()
+    client.get("/dashboard")
+    client.get("/dashboard")
+    assert fragment_cache.stats()["student_assignments"]["hits"] == 0
+
+    app.config["SQLALCHEMY_BINDS"].pop(READ_BIND)  # no replica: rendered from the primary
+    client.get("/dashboard")
+    client.get("/dashboard")
+    assert fragment_cache.stats()["student_assignments"]["hits"] == 1
+
+
+def test_read_only_sqlite_engine_on_the_primary_file(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'app.db'}",
+        "SQLITE_PROFILE": "production",
+        "SQLITE_READ_ONLY_ENGINE": True,
+    })
+    with app.app_context():
+        db.create_all()
+        _seed()
+        read = db.engines[READ_BIND]
+        with read.connect() as conn:
+            assert conn.exec_driver_sql("SELECT title FROM assignment").scalar() == "HW 1"
+            with pytest.raises(OperationalError, match="readonly|read-only"):
+                conn.exec_driver_sql("UPDATE assignment SET title = 'x'")
+        db.session.remove()
@@ -0,0 +1,132 @@
+import io
+import zlib
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import search
+from app.grading import apply_grades
+from app.jobs import run_pending
+from app.models import db, User, Course, Enrollment, Assignment, Submission, RubricItem
+
+
+def _pdf(text):
+    content = zlib.compress(b"BT /F1 12 Tf (" + text.encode() + b") Tj ET")
+    return (b"%PDF-1.4\n1 0 obj << /Type /Page >> endobj\n4 0 obj << /Filter /FlateDecode >>\nstream\n"
+            + content + b"\nendstream\n%%EOF\n")
+
+
+@pytest.fixture
+def graded(app, student_user):
+    course = Course.query.first()
+    assignment = Assignment(course=course, title="Recursion lab", description="Write a recursive descent parser.")
+    db.session.add(assignment)
+    db.session.flush()
+    sub = Submission(assignment=assignment, student_id=student_user.id, general_comment="Please see office hours.")
+    db.session.add(sub)
+    db.session.commit()
+    return assignment, sub
+
+
+def _kinds(query, user, **kwargs):
+    return [(hit.kind, hit.submission_id) for hit in search.search(query, user, **kwargs)]
+
+
+def test_index_follows_orm_writes(graded, instructor_user):
+    assignment, sub = graded
+    assert _kinds("recursive", instructor_user) == [("assignment", None)]
+    assert _kinds('"office hours"', instructor_user) == [("comment", sub.id)]
+
+    sub.general_comment = "Great job."
+    assignment.title = "Iteration lab"
+    db.session.commit()
+    assert _kinds("office", instructor_user) == []
+    assert search.search("iteration", instructor_user)[0].assignment_title == "Iteration lab"
+
+    old_course, elsewhere = assignment.course_id, Course(code="CMPE 148")
+    assignment.course = elsewhere
+    db.session.commit()
+    assert _kinds("iteration", instructor_user, course_id=elsewhere.id) == [("assignment", None)]
+    assert _kinds("great", instructor_user, course_id=elsewhere.id) == [("comment", sub.id)]
+    assert _kinds("iteration", instructor_user, course_id=old_course) == []
+
+    db.session.delete(assignment)
+    db.session.commit()
+    assert _kinds("great", instructor_user) == _kinds("iteration", instructor_user) == []
+
+
+def test_rollback_leaves_index_alone(graded, instructor_user):
+    _, sub = graded
+    sub.general_comment = "Rewrite from scratch"
+    db.session.flush()
+    db.session.rollback()
+    assert _kinds("office", instructor_user) == [("comment", sub.id)]
+    assert _kinds("scratch", instructor_user) == []
+
+
+def test_batch_grading_indexes_rubric_comments(graded, instructor_user):
+    assignment, sub = graded
+    item = RubricItem(assignment=assignment, label="Base case", max_points=5)
+    db.session.add(item)
+    db.session.commit()
+
+    apply_grades(assignment, [{"submission_id": sub.id, "rubric": [{"rubric_item_id": item.id, "points": 3,
+                                                                    "comment": "missing the empty list"}]}])
+    hits = search.search("empty list", instructor_user)
+    assert [(h.kind, h.title) for h in hits] == [("rubric_comment", "Base case")]
+    assert "<mark>empty</mark>" in hits[0].snippet
+
+
+def test_students_only_see_their_courses_and_submissions(graded, student_user):
+    assignment, sub = graded
+    other = User(email="other@example.com", password_hash=generate_password_hash("password123"))
+    elsewhere = Course(code="CMPE 148")
+    db.session.add_all([other, elsewhere])
+    db.session.flush()
+    db.session.add_all([
+        Enrollment(user_id=other.id, course_id=assignment.course_id),
+        Submission(assignment=assignment, student_id=other.id, general_comment="see office hours too"),
+        Assignment(course=elsewhere, title="Recursion in networking"),
+    ])
+    db.session.commit()
+
+    assert _kinds("office", student_user) == [("comment", sub.id)]
+    assert _kinds("recursion", student_user) == [("assignment", None)]
+    assert len(search.search("office", other)) == 1
+
+
+def test_uploaded_pdf_text_is_searchable(app, client, student_user, tmp_path):
+    app.config.update(UPLOAD_FOLDER=tmp_path, PREVIEW_RENDERER="none")
+    assignment = Assignment(course=Course.query.first(), title="HW 1")
+    db.session.add(assignment)
+    db.session.commit()
+    client.post("/auth/login", data={"email": student_user.email, "password": "password123"})
+    client.post(
+        f"/assignments/{assignment.id}/submit",
+        data={"student_file": (io.BytesIO(_pdf("memoization speeds up fibonacci")), "hw1.pdf")},
+        content_type="multipart/form-data",
+    )
+    run_pending()
+
+    resp = client.get("/search.json?q=memoiz*")
+    assert [r["kind"] for r in resp.get_json()["results"]] == ["submission_pdf"]
+    assert b"<mark>fibonacci</mark>" in client.get("/search?q=fibonacci").data
+
+    # Replacing the file drops the old text straight away
+    Submission.query.one().student_file_path = None
+    db.session.commit()
+    assert client.get("/search.json?q=fibonacci").get_json()["results"] == []
+
+
+def test_bad_course_id_and_huge_page_are_not_server_errors(graded, client, instructor_user):
+    client.post("/auth/login", data={"email": instructor_user.email, "password": "password123"})
+    assert client.get("/search.json?q=office&course_id=-1").status_code == 400
+    assert client.get("/search.json?q=office&course_id=0").status_code == 400
+    resp = client.get(f"/search.json?q=office&page={10 ** 30}")
+    assert resp.status_code == 200 and resp.get_json()["results"] == []
+
+
+def test_rebuild_and_query_syntax(graded, instructor_user):
+    assert search.match_expression('office "see  hours" optim* -- ()') == '"office" "see hours" "optim"*'
+    assert search.rebuild() == 2
+    assert len(search.search("Office, hours!", instructor_user)) == 1
@@ -0,0 +1,65 @@
+import io
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from app.uploads import save_upload
+
+
+@pytest.fixture
+def logged_in(app, client, instructor_user, tmp_path):
+    app.config["UPLOAD_FOLDER"] = tmp_path
+    client.post("/auth/login", data={"email": instructor_user.email, "password": "password123"})
+    return client
+
+
+def _store(data):
+    return save_upload(FileStorage(stream=io.BytesIO(data), filename="a.pdf"))
+
+
+def test_blob_served_with_strong_etag_and_304(logged_in):
+    stored = _store(b"%PDF-1.4 prompt")
+
+    resp = logged_in.get(f"/uploads/{stored.filename}")
+    assert resp.status_code == 200
+    assert resp.data == b"%PDF-1.4 prompt"
+    assert resp.headers["ETag"] == f'"{stored.sha256}"'
+    assert "private" in resp.headers["Cache-Control"]
+
+    resp = logged_in.get(f"/uploads/{stored.filename}", headers={"If-None-Match": f'"{stored.sha256}"'})
+    assert resp.status_code == 304
+
+
+def test_range_request_returns_partial_content(logged_in):
+    stored = _store(b"0123456789")
+
+    resp = logged_in.get(f"/uploads/{stored.filename}", headers={"Range": "bytes=2-5"})
+    assert resp.status_code == 206
+    assert resp.data == b"2345"
+    assert resp.headers["Content-Range"] == "bytes 2-5/10"
+
+
+def test_accel_redirect_backend_hands_off_to_proxy(app, logged_in):
+    app.config.update(UPLOAD_SERVE_BACKEND="x-accel-redirect", UPLOAD_ACCEL_PREFIX="/internal/")
+    stored = _store(b"%PDF-1.4 scan")
+
+    resp = logged_in.get(f"/uploads/{stored.filename}")
+    assert resp.status_code == 200
+    assert resp.data == b""
+    assert resp.headers["X-Accel-Redirect"] == f"/internal/{stored.filename}"
+    assert resp.headers["ETag"] == f'"{stored.sha256}"'
+
+    resp = logged_in.get(f"/uploads/{stored.filename}", headers={"If-None-Match": f'"{stored.sha256}"'})
+    assert resp.status_code == 304
+
+
+def test_missing_or_escaping_paths_are_404(logged_in):
+    assert logged_in.get("/uploads/blobs/00/nope.pdf").status_code == 404
+    assert logged_in.get("/uploads/../app.db").status_code == 404
+
+
+def test_unknown_serve_backend_fails_at_startup():
+    from app import create_app
+
+    with pytest.raises(ValueError, match="UPLOAD_SERVE_BACKEND"):
+        create_app({"TESTING": True, "UPLOAD_SERVE_BACKEND": "x-sendfle"})
@@ -0,0 +1,46 @@
+import pytest
+
+from app import create_app
+from app.models import db
+
+
+def _pragma(name):
+    return db.session.execute(db.text(f"PRAGMA {name}")).scalar()
+
+
+def test_production_profile_sets_wal_and_pragmas(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'prod.db'}",
+        "SQLITE_PROFILE": "production",
+        "SQLITE_PRAGMAS": {"cache_size": -1234},
+    })
+    with app.app_context():
+        assert _pragma("journal_mode") == "wal"
+        assert _pragma("synchronous") == 1  # NORMAL
+        assert _pragma("busy_timeout") == 15000
+        assert _pragma("cache_size") == -1234
+        assert db.engine.pool.size() == 10
+        db.session.remove()
+
+
+def test_immediate_begin_mode_takes_write_lock(tmp_path):
+    import sqlite3
+
+    path = tmp_path / "imm.db"
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+        "SQLITE_BEGIN_MODE": "immediate",
+    })
+    with app.app_context():
+        db.session.execute(db.text("SELECT 1"))  # a read opens the transaction...
+        other = sqlite3.connect(path, timeout=0)
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            other.execute("BEGIN IMMEDIATE")  # ...and it already holds the write lock
+        other.close()
+        db.session.rollback()
+        db.session.remove()
+
+
+def test_unknown_profile_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'x.db'}", "SQLITE_PROFILE": "turbo"})
@@ -0,0 +1,116 @@
+import json
+import random
+
+from app.grading import apply_grades
+from app.models import db, User, Course, Assignment, AssignmentStats, Submission
+from app.stats import check, rebuild, BIN_COUNT
+
+
+def _assignment_with_students(count):
+    assignment = Assignment(course=Course.query.first(), title="HW 1")
+    students = [User(email=f"st{i}@example.com", password_hash="x") for i in range(count)]
+    db.session.add_all([assignment, *students])
+    db.session.commit()
+    return assignment, students
+
+
+def test_stats_follow_submits_grades_and_deletes(app):
+    assignment, students = _assignment_with_students(20)
+    rng = random.Random(131)
+    subs = []
+    for student in students:
+        sub = Submission(assignment=assignment, student=student, student_file_path=f"{student.id}.pdf")
+        db.session.add(sub)
+        subs.append(sub)
+        db.session.commit()
+    for sub in subs[:15]:
+        sub.total_score = float(rng.randint(0, 100))
+        db.session.commit()
+    # regrade (including the current extremes), then remove some submissions
+    scored = sorted(subs[:15], key=lambda s: s.total_score)
+    scored[0].total_score = 50.0
+    scored[-1].total_score = None
+    db.session.delete(subs[3])
+    db.session.delete(subs[17])
+    db.session.commit()
+
+    assert check() == []
+    stats = db.session.get(AssignmentStats, assignment.id)
+    graded = [s.total_score for s in subs if s in db.session and s.total_score is not None]
+    assert stats.submitted_count == 18
+    assert stats.graded_count == len(graded)
+    assert stats.mean == sum(graded) / len(graded)
+    assert (stats.score_min, stats.score_max) == (min(graded), max(graded))
+    assert sum(stats.histogram_counts) == len(graded) and len(stats.histogram_counts) == BIN_COUNT
+
+
+def test_batch_grading_updates_stats_in_same_transaction(app):
+    assignment, students = _assignment_with_students(4)
+    subs = [Submission(assignment=assignment, student=s, student_file_path="a.pdf") for s in students]
+    db.session.add_all(subs)
+    db.session.commit()
+
+    apply_grades(assignment, [{"submission_id": s.id, "total_score": 10 * (i + 5)} for i, s in enumerate(subs)])
+
+    stats = db.session.get(AssignmentStats, assignment.id)
+    assert (stats.graded_count, stats.score_sum, stats.score_min, stats.score_max) == (4, 260.0, 50.0, 80.0)
+    assert stats.histogram_counts[5:9] == [1, 1, 1, 1]
+    assert check() == []
+
+
+def test_non_finite_score_is_not_counted(app):
+    assignment, students = _assignment_with_students(2)
+    subs = [Submission(assignment=assignment, student=s, student_file_path="a.pdf") for s in students]
+    db.session.add_all(subs)
+    db.session.commit()
+
+    subs[0].total_score, subs[1].total_score = float("inf"), 40.0
+    db.session.commit()
+    stats = db.session.get(AssignmentStats, assignment.id)
+    assert (stats.graded_count, stats.score_sum) == (1, 40.0)
+
+
+def test_rollback_leaves_stats_untouched(app):
+    assignment, students = _assignment_with_students(1)
+    db.session.add(Submission(assignment=assignment, student=students[0], student_file_path="a.pdf", total_score=5))
+    db.session.flush()
+    db.session.rollback()
+    assert check() == []
+    assert db.session.get(AssignmentStats, assignment.id) is None
+
+
+def test_check_and_rebuild_commands(app, runner):
+    assignment, students = _assignment_with_students(2)
+    db.session.add_all([
+        Submission(assignment=assignment, student=s, student_file_path="a.pdf", total_score=7) for s in students
+    ])
+    db.session.commit()
+
+    stats = db.session.get(AssignmentStats, assignment.id)
+    stats.graded_count = 5
+    stats.histogram = json.dumps([0] * BIN_COUNT)
+    db.session.commit()
+
+    result = runner.invoke(args=["stats", "check"])
+    assert result.exit_code != 0
+    assert "graded_count is 5, expected 2" in result.output
+
+    result = runner.invoke(args=["stats", "rebuild"])
+    assert result.exit_code == 0
+    assert runner.invoke(args=["stats", "check"]).exit_code == 0
+    assert rebuild() == 1
+
+
+def test_instructor_dashboard_reads_stats(app, client, instructor_user):
+    assignment, students = _assignment_with_students(2)
+    db.session.add_all([
+        Submission(assignment=assignment, student=students[0], student_file_path="a.pdf", total_score=8),
+        Submission(assignment=assignment, student=students[1], student_file_path="b.pdf"),
+    ])
+    db.session.commit()
+
+    client.post("/auth/login", data={"email": instructor_user.email, "password": "password123"})
+    resp = client.get(f"/dashboard?course_id={assignment.course_id}")
+    assert b"Submissions: 2" in resp.data
+    assert b"Graded: 1" in resp.data
+    assert b"Mean: 8.0" in resp.data
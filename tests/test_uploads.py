@@ -0,0 +1,135 @@
+import hashlib
+import io
+import os
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from app.blobstore import blob_path, collect_garbage
+from app.models import db, Blob, Course, Assignment, Submission
+from app.uploads import save_upload, UploadTooLarge
+
+
+def _pdf(data, name="scan.pdf"):
+    return FileStorage(stream=io.BytesIO(data), filename=name)
+
+
+def test_save_upload_streams_and_hashes(app, tmp_path):
+    app.config.update(UPLOAD_FOLDER=tmp_path, UPLOAD_CHUNK_SIZE=7)
+    data = b"%PDF-1.4 " + os.urandom(1000)
+
+    stored = save_upload(_pdf(data))
+
+    assert stored.size == len(data)
+    assert stored.sha256 == hashlib.sha256(data).hexdigest()
+    assert stored.filename == blob_path(stored.sha256)
+    assert (tmp_path / stored.filename).read_bytes() == data
+    # no temp files left behind
+    assert os.listdir(tmp_path) == ["blobs"]
+
+
+def test_save_upload_rejects_oversized_file(app, tmp_path):
+    app.config.update(UPLOAD_FOLDER=tmp_path, MAX_CONTENT_LENGTH=100)
+
+    with pytest.raises(UploadTooLarge):
+        save_upload(_pdf(b"x" * 101))
+    assert os.listdir(tmp_path) == []
+
+
+def test_submit_assignment_saves_file(app, client, student_user, tmp_path):
+    app.config["UPLOAD_FOLDER"] = tmp_path
+    assignment = Assignment(course=Course.query.first(), title="HW 1")
+    db.session.add(assignment)
+    db.session.commit()
+
+    client.post("/auth/login", data={"email": student_user.email, "password": "password123"})
+    resp = client.post(
+        f"/assignments/{assignment.id}/submit",
+        data={"student_file": (io.BytesIO(b"%PDF-1.4 hello"), "hw1.pdf")},
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 302
+
+    sub = Submission.query.filter_by(assignment_id=assignment.id).one()
+    assert (tmp_path / sub.student_file_path).read_bytes() == b"%PDF-1.4 hello"
+
+
+def test_identical_uploads_share_one_blob(app, tmp_path):
+    app.config["UPLOAD_FOLDER"] = tmp_path
+    course = Course.query.first()
+    a1 = Assignment(course=course, title="HW 1", prompt_file_path=save_upload(_pdf(b"%PDF same")).filename)
+    a2 = Assignment(course=course, title="HW 1 (sec 2)", prompt_file_path=save_upload(_pdf(b"%PDF same")).filename)
+    db.session.add_all([a1, a2])
+    db.session.commit()
+
+    assert a1.prompt_file_path == a2.prompt_file_path
+    blob = Blob.query.one()
+    assert blob.ref_count == 2
+    assert blob.size == len(b"%PDF same")
+
+    a2.prompt_file_path = save_upload(_pdf(b"%PDF new")).filename
+    db.session.delete(a1)
+    db.session.commit()
+    assert blob.ref_count == 0
+
+
+def test_collect_garbage_removes_unreferenced_blobs(app, tmp_path):
+    app.config["UPLOAD_FOLDER"] = tmp_path
+    assignment = Assignment(course=Course.query.first(), title="HW 1")
+    assignment.prompt_file_path = save_upload(_pdf(b"%PDF old")).filename
+    db.session.add(assignment)
+    db.session.commit()
+    old_path = assignment.prompt_file_path
+
+    assignment.prompt_file_path = save_upload(_pdf(b"%PDF new")).filename
+    db.session.commit()
+    stray = save_upload(_pdf(b"%PDF never committed")).filename
+
+    stats = collect_garbage(grace_seconds=0)
+
+    assert stats["deleted_blobs"] == 1
+    assert stats["deleted_orphan_files"] == 1
+    assert not (tmp_path / old_path).exists()
+    assert not (tmp_path / stray).exists()
+    assert (tmp_path / assignment.prompt_file_path).exists()
+    assert [b.ref_count for b in Blob.query.all()] == [1]
+
+
+def test_concurrent_first_references_share_one_blob_row(tmp_path):
+    import threading
+    import time
+    from app import create_app
+
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'blobs.db'}",
+                      "UPLOAD_FOLDER": tmp_path})
+    path = blob_path("ab" * 32)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Course(code="CMPE 131-01", title="Demo"))
+        db.session.commit()
+        course_id = Course.query.one().id
+        db.session.remove()
+
+    errors = []
+
+    def other_worker():
+        with app.app_context():
+            try:
+                db.session.add(Assignment(course_id=course_id, title="Sec 2", prompt_file_path=path))
+                db.session.commit()  # waits on the first worker's write lock
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                db.session.remove()
+
+    with app.app_context():
+        db.session.add(Assignment(course_id=course_id, title="Sec 1", prompt_file_path=path))
+        db.session.flush()  # inserts the Blob row, not yet committed
+        worker = threading.Thread(target=other_worker)
+        worker.start()
+        time.sleep(0.3)
+        db.session.commit()
+        worker.join()
+        assert errors == []
+        assert Blob.query.one().ref_count == 2
+        db.session.remove()
@@ -0,0 +1,70 @@
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+from app.models import db
+from app.user_cache import user_cache, CachedUser, LRUBackend, SerializingBackend
+
+
+@pytest.fixture(params=["lru", "shared"])
+def cache(request, app):
+    user_cache.backend = LRUBackend() if request.param == "lru" else SerializingBackend()
+    user_cache.reset_stats()
+    return user_cache
+
+
+def test_load_hits_cache_after_first_miss(cache, instructor_user):
+    first = cache.load(instructor_user.id)
+    second = cache.load(instructor_user.id)
+
+    assert isinstance(second, CachedUser)
+    assert (second.id, second.email, second.role) == (
+        instructor_user.id, instructor_user.email, "instructor",
+    )
+    assert first.get_id() == str(instructor_user.id)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_role_or_password_change_invalidates(cache, instructor_user):
+    cache.load(instructor_user.id)
+
+    instructor_user.role = "student"
+    db.session.commit()
+    assert cache.load(instructor_user.id).role == "student"
+
+    instructor_user.password_hash = generate_password_hash("newpass123")
+    db.session.commit()
+    cache.load(instructor_user.id)
+    assert cache.stats()["misses"] == 3
+
+
+def test_deleted_user_is_not_served(cache, instructor_user):
+    user_id = instructor_user.id
+    cache.load(user_id)
+
+    db.session.delete(instructor_user)
+    db.session.commit()
+    assert cache.load(user_id) is None
+
+
+def test_lru_backend_bounds_size_and_expires():
+    backend = LRUBackend(maxsize=2)
+    backend.set("a", 1, ttl=60)
+    backend.set("b", 2, ttl=60)
+    backend.get("a")
+    backend.set("c", 3, ttl=60)
+    assert backend.get("b") is None  # least recently used
+    assert backend.get("a") == 1
+
+    backend.set("d", 4, ttl=-1)
+    assert backend.get("d") is None
+
+
+
+def test_in_process_records_expire_quickly():
+    config = {"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:", "USER_CACHE_TTL": 300}
+    create_app(config)
+    assert user_cache.ttl == 5
+    create_app({**config, "USER_CACHE_BACKEND": SerializingBackend})
+    assert user_cache.ttl == 300